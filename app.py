@@ -1,49 +1,229 @@
-from flask import Flask, render_template, jsonify, request, redirect, url_for
+from flask import Blueprint, Flask, Response, abort, current_app, g, render_template, jsonify, request, redirect, send_file, url_for, stream_with_context
 from datetime import datetime
+import base64
+import json
+import os
+import random
+import threading
+import time
+from sqlalchemy import func, or_, update
 
 # 导入数据库模型和初始化函数
-from models import db, Database, Table, Column
+from models import db, Database, DatabaseHealth, Table, Column, SchemaChange, SyncJob, SyncSchedule
 import db_util
+import migrations
+from meta_sync import engines, jobs, history, health, scheduler
+from meta_sync.executor import SyncExecutor
+from meta_sync.instrument import SyncTimer
+from search import like_pattern
+from page_cache import PageCache
+import schema_export
+import metrics
+from query_stats import QueryStats
+from profiler import Profiler
+import server
 
-# 载入配置文件
-config = db_util.load_config()
+# 页面路由，由 create_app 注册到应用
+bp = Blueprint('meta', __name__)
 
-# 创建Flask应用, 初始化数据库连接
-app = Flask(__name__)
-db_util.init_db(app, config, db)
+# 配置文件内容，由 create_app 载入
+config = {}
+sync_config = {}
+query_config = {}
+profiler_config = {}
+health_config = {}
+scheduler_config = {}
 
-# 全局同步任务map，用于存储同步状态
-import threading
-sync_tasks = {}
-sync_lock = threading.Lock()
+# 表搜索：按元数据库类型使用全文/模糊索引，不可用时回退为LIKE查询，由 create_app 按配置选择
+table_search = None
+
+# 页面缓存：数据表页和表信息页的渲染结果，按条数和总大小限制
+page_cache = PageCache()
+
+# 同步线程池：限制同时执行的同步任务数和单个源库主机的并发数，其余任务排队；首次提交任务时才启动线程
+sync_executor = SyncExecutor()
+metrics.SYNC_QUEUE_DEPTH.set_function(sync_executor.queue_depth)
+metrics.SYNC_RUNNING.set_function(sync_executor.running_count)
+
+# SQL查询统计：每个请求和每次同步的语句数、耗时和重复语句，超过阈值输出警告
+query_stats = QueryStats()
+
+# 性能剖析：按比例抽样的请求、带剖析口令的请求和指定数据库的同步
+profiler = Profiler()
+
+# 定时同步线程：按 tb_sync_schedule 中各数据库的间隔和时间段提交同步，服务开始处理请求时启动
+sync_scheduler = scheduler.Scheduler()
+
+
+def create_app(app_config=None):
+    """
+    创建Flask应用：载入配置、初始化数据库连接和各组件、注册路由
+    不创建表和执行迁移（由 setup_db.py 或启动服务前的 db_util.upgrade_schema 执行），多进程服务的每个进程可以直接调用
+    同一进程只创建一个应用，配置和组件保存在模块中供路由使用
+    """
+    global config, sync_config, query_config, profiler_config, health_config, scheduler_config, table_search
+    config = app_config or db_util.load_config()
+    sync_config = config.get('sync') or {}
+    query_config = config.get('query_stats') or {}
+    profiler_config = config.get('profiler') or {}
+    health_config = config.get('health') or {}
+    scheduler_config = config.get('scheduler') or {}
+
+    app = Flask(__name__)
+    db_util.init_db(app, config, db)
+    table_search = db_util.get_search_backend(config, db)
+
+    cache_config = config.get('cache') or {}
+    page_cache.configure(cache_config.get('max_entries', 1000), cache_config.get('max_mb', 64) * 1024 * 1024)
+
+    # 同步配置：源库连接池、同步线程池等
+    engines.configure(sync_config)
+    sync_executor.configure(sync_config.get('max_workers', 4), sync_config.get('per_host_limit', 2))
+
+    query_stats.configure(query_config.get('keep', 50))
+    if query_config.get('enabled', True):
+        query_stats.install()
+
+    profiler.configure(profiler_config.get('dir') or os.path.join(app.instance_path, 'profiles'),
+                       profiler_config.get('keep', 50))
+    # 未开启性能剖析时不注册请求钩子
+    if profiler_config.get('enabled', False):
+        app.before_request(start_request_profile)
+        app.after_request(stop_request_profile)
+        # 请求异常时不会执行 after_request，在这里结束剖析
+        app.teardown_request(lambda exc: stop_request_profile(None))
+
+    app.register_blueprint(bp)
+
+    # 调试页面会暴露请求、同步的语句和耗时，未开启对应功能时不注册
+    debug_bp = Blueprint('debug', __name__)
+    if query_config.get('enabled', True):
+        debug_bp.add_url_rule('/debug/queries', view_func=debug_queries)
+    if profiler_config.get('enabled', False):
+        debug_bp.add_url_rule('/debug/profiles', view_func=debug_profiles)
+        debug_bp.add_url_rule('/debug/profiles/<string:filename>', view_func=debug_profile)
+    app.register_blueprint(debug_bp)
+    return app
+
+# 记录每个请求的处理耗时（流式响应只统计到开始输出为止）
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if query_config.get('enabled', True) and request.endpoint != 'static':
+        query_stats.begin(f'{request.method} {request.endpoint}', query_config.get('request_max_queries', 50),
+                          query_config.get('request_max_repeats', 10))
+
+@bp.after_app_request
+def record_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=request.endpoint or 'none',
+                                             method=request.method, status=response.status_code)
+    scope = query_stats.end()
+    if scope is not None and query_config.get('header', config['app'].get('debug', False)):
+        response.headers['X-DB-Queries'] = scope.header()
+    return response
+
+@bp.teardown_app_request
+def end_query_stats(exc):
+    # 请求异常时不会执行 after_request，在这里结束统计
+    query_stats.end()
+
+def profile_requested():
+    """请求头 X-Profile 或参数 profile 与配置的剖析口令一致"""
+    token = profiler_config.get('token')
+    return bool(token) and token in (request.headers.get('X-Profile'), request.args.get('profile'))
+
+def start_request_profile():
+    # 同步接口带口令时剖析的是同步本身，不剖析提交同步的请求
+    if request.endpoint in ('static', 'debug.debug_profiles', 'debug.debug_profile', 'meta.sync_tables'):
+        return
+    if profile_requested() or random.random() < profiler_config.get('sample_rate', 0):
+        g.profile = profiler.start()
+        g.profile_started = time.perf_counter()
+
+def stop_request_profile(response):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        filename = profiler.stop(profile, 'request', f'{request.method} {request.endpoint}',
+                                 time.perf_counter() - g.pop('profile_started'))
+        if response is not None:
+            response.headers['X-Profile-Id'] = filename
+    return response
 
 # 生成6位随机token
 def generate_token():
     import random, string
     return ''.join(random.choices(string.ascii_letters + string.digits, k=6))
 
+# 表列表分页游标：(表名, 表ID) 的 JSON 经 URL 安全的 base64 编码
+def encode_cursor(table):
+    value = json.dumps([table.table_name, table.id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(value.encode('utf-8')).decode('ascii').rstrip('=')
+
+# 解析游标，游标无效时返回 None（从第一页开始）
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        name, table_id = json.loads(value)
+        return str(name), int(table_id)
+    except (ValueError, TypeError):
+        return None
+
+# 各数据库的表数量缓存：{db_id: (表数量, 缓存时间)}，过期或同步完成后重新统计
+_table_counts = {}
+TABLE_COUNT_TTL = 300
+
+def count_tables(db_id):
+    cached = _table_counts.get(db_id)
+    if cached and time.monotonic() - cached[1] < TABLE_COUNT_TTL:
+        return cached[0]
+    total = db.session.query(func.count(Table.id)).filter(Table.db_id == db_id).scalar()
+    _table_counts[db_id] = (total, time.monotonic())
+    return total
+
+# 数据库的页面缓存版本，数据库不存在时返回 None
+def get_cache_version(db_id):
+    return db.session.query(func.coalesce(Database.cache_version, 0)).filter(Database.id == db_id).scalar()
+
+# 元数据变化后页面缓存版本加1，由调用方提交；updated_at 保持不变
+def bump_cache_version(db_id):
+    db.session.execute(
+        update(Database)
+        .where(Database.id == db_id)
+        .values(cache_version=func.coalesce(Database.cache_version, 0) + 1, updated_at=Database.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
 # 路由定义
-@app.route('/')
+@bp.route('/')
 def index():
     # 首页直接跳转到数据库列表页
     return render_template('index.html')
 
-@app.route('/index')
+@bp.route('/index')
 def index_redirect():
     # 首页直接跳转到数据库列表页
     return render_template('index.html')
 
-@app.route('/databases')
+@bp.route('/databases')
 def databases():
     # 获取所有数据库
     databases = Database.query.all()
+    # 连接检查结果，有数据库未检查或结果已过期时在后台重新检查，本次显示已有结果
+    health_rows = health.load_health(db, DatabaseHealth)
+    if any(health.is_stale(health_rows.get(database.id), health_ttl()) for database in databases):
+        refresh_health_async(current_app._get_current_object())
     # 移除密码信息
-    for db in databases:
-        db.db_password = ''
-    return render_template('databases.html', databases=databases)
+    for database in databases:
+        database.db_password = ''
+    return render_template('databases.html', databases=databases, health=health_rows,
+                           schedules=scheduler.load_schedules(db, SyncSchedule))
 
 # 新增数据库路由
-@app.route('/databases/add', methods=['POST'])
+@bp.route('/databases/add', methods=['POST'])
 def add_database():
     if request.method == 'POST':
         # 获取表单数据
@@ -59,7 +239,7 @@ def add_database():
         # 验证数据
         if not all([db_type, db_alias, db_host, db_port, db_name, db_user, db_password]):
             # 如果有字段为空，重定向回数据库列表页
-            return redirect(url_for('databases'))
+            return redirect(url_for('meta.databases'))
         
         # 创建新的数据库记录
         new_database = Database(
@@ -78,10 +258,10 @@ def add_database():
         db.session.commit()
         
         # 重定向回数据库列表页
-        return redirect(url_for('databases'))
+        return redirect(url_for('meta.databases'))
 
 # 编辑数据库路由
-@app.route('/databases/edit', methods=['POST'])
+@bp.route('/databases/edit', methods=['POST'])
 def edit_database():
     if request.method == 'POST':
         # 获取表单数据
@@ -94,11 +274,25 @@ def edit_database():
         db_password = request.form.get('db_password')
         remark = request.form.get('remark')
         update_password = request.form.get('update_password')  # 检查是否需要更新密码
+        # 定时同步设置：间隔（分钟）和允许同步的时间段，时间段为空时不限制
+        schedule_enabled = bool(request.form.get('schedule_enabled'))
+        schedule_interval = request.form.get('schedule_interval', type=int)
+        window_start = request.form.get('schedule_window_start') or None
+        window_end = request.form.get('schedule_window_end') or None
         
         # 验证基本数据（不包括密码）
         if not all([id, db_alias, db_host, db_port, db_name, db_user]):
             # 如果有字段为空，重定向回数据库列表页
-            return redirect(url_for('databases'))
+            return redirect(url_for('meta.databases'))
+        if schedule_enabled and (not schedule_interval or schedule_interval < scheduler_config.get('min_interval_minutes', 10)):
+            return redirect(url_for('meta.databases'))
+        try:
+            scheduler.parse_window(window_start)
+            scheduler.parse_window(window_end)
+        except ValueError:
+            return redirect(url_for('meta.databases'))
+        if not (window_start and window_end):
+            window_start = window_end = None
         
         # 根据ID查找数据库记录
         database = Database.query.get_or_404(id)
@@ -115,14 +309,25 @@ def edit_database():
         if update_password and db_password:
             database.db_password = db_password
         
-        # 保存到数据库
+        # 未开启定时同步时保留原有的间隔设置
+        if schedule_enabled or schedule_interval:
+            scheduler.save_schedule(db, SyncSchedule, id, schedule_enabled, schedule_interval or 1440,
+                                    window_start, window_end)
+        
+        # 保存到数据库，页面上显示的数据库信息已变化
+        bump_cache_version(id)
+        db.session.commit()
+        
+        # 连接信息可能已变化，释放缓存的连接池，连接检查结果作废
+        engines.invalidate_engines(id)
+        DatabaseHealth.query.filter_by(db_id=id).delete()
         db.session.commit()
         
         # 重定向到本数据库的详情页
-        return redirect(url_for('database_tables', db_id=id))
+        return redirect(url_for('meta.database_tables', db_id=id))
 
 # 删除数据库路由
-@app.route('/databases/delete', methods=['POST'])
+@bp.route('/databases/delete', methods=['POST'])
 def delete_database():
     if request.method == 'POST':
         # 获取要删除的数据库ID
@@ -130,20 +335,27 @@ def delete_database():
         
         # 验证ID
         if not id:
-            return redirect(url_for('databases'))
+            return redirect(url_for('meta.databases'))
         
         # 根据ID查找数据库记录
         database = Database.query.get_or_404(id)
         
-        # 删除记录
+        # 删除记录及其同步任务记录、连接检查结果和定时同步设置
         db.session.delete(database)
+        SyncJob.query.filter_by(db_id=id).delete()
+        DatabaseHealth.query.filter_by(db_id=id).delete()
+        SyncSchedule.query.filter_by(db_id=id).delete()
         db.session.commit()
         
+        # 释放该数据库缓存的连接池和表数量缓存
+        engines.invalidate_engines(id)
+        _table_counts.pop(id, None)
+        
         # 重定向回数据库列表页
-        return redirect(url_for('databases'))
+        return redirect(url_for('meta.databases'))
 
 # 测试数据库连接路由
-@app.route('/databases/test-connection', methods=['POST'])
+@bp.route('/databases/test-connection', methods=['POST'])
 def test_database_connection():
     from meta_sync import test_database_connection as meta_test_conn
     
@@ -170,36 +382,73 @@ def test_database_connection():
     except Exception as e:
         return jsonify({'success': False, 'message': f'连接失败：{str(e)}'})
 
-@app.route('/database/<int:db_id>/tables')
+@bp.route('/database/<int:db_id>/tables')
+@page_cache.cached(get_cache_version)
 def database_tables(db_id):
+    """
+    表列表按 (table_name, id) 游标分页：after/before 为当前页最后/第一张表的游标，
+    使用 (db_id, table_name) 索引定位，翻到任意深度的页都只读取一页数据，不再 COUNT(*) + OFFSET
+    搜索结果按相关度排序，没有稳定的排序键，仍按页码分页，多取一条判断是否有下一页
+    """
     # 获取数据库
     database = Database.query.get_or_404(db_id)
     # 移除密码信息
     database.db_password = ''
     
-    # 获取分页参数和搜索关键字
-    page = request.args.get('page', 1, type=int)
-    keyword = request.args.get('keyword', '')
+    # 获取搜索关键字
+    keyword = request.args.get('keyword', '').strip()
     per_page = 20
     
     # 构建查询
     query = Table.query.filter_by(db_id=db_id)
     
-    # 如果有搜索关键字，添加搜索条件
+    # 上一页/下一页链接的参数，没有时为 None
+    prev_args = next_args = None
+    page = None
     if keyword:
-        query = query.filter(
-            (Table.table_name.ilike(f'%{keyword}%')) | 
-            (Table.schema_name == keyword) |  # 模式名使用完全匹配查询
-            (Table.table_comment.ilike(f'%{keyword}%'))
-        )
+        # 通过搜索索引查询并按相关度排序
+        page = max(request.args.get('page', 1, type=int), 1)
+        rows = table_search.filter_tables(query, Table, keyword) \
+            .offset((page - 1) * per_page).limit(per_page + 1).all()
+        tables = rows[:per_page]
+        if page > 1:
+            prev_args = {'keyword': keyword, 'page': page - 1}
+        if len(rows) > per_page:
+            next_args = {'keyword': keyword, 'page': page + 1}
+    else:
+        after = decode_cursor(request.args.get('after'))
+        before = decode_cursor(request.args.get('before'))
+        if before:
+            # 向前翻页：倒序取游标之前的一页再反转
+            name, table_id = before
+            rows = query.filter(Table.table_name <= name, or_(Table.table_name < name, Table.id < table_id)) \
+                .order_by(Table.table_name.desc(), Table.id.desc()).limit(per_page + 1).all()
+            tables = rows[:per_page][::-1]
+            has_prev, has_next = len(rows) > per_page, True
+        else:
+            if after:
+                name, table_id = after
+                query = query.filter(Table.table_name >= name, or_(Table.table_name > name, Table.id > table_id))
+            rows = query.order_by(Table.table_name.asc(), Table.id.asc()).limit(per_page + 1).all()
+            tables = rows[:per_page]
+            has_prev, has_next = after is not None, len(rows) > per_page
+        if tables and has_prev:
+            prev_args = {'before': encode_cursor(tables[0])}
+        if tables and has_next:
+            next_args = {'after': encode_cursor(tables[-1])}
     
-    # 分页获取表列表，按表名升序排序
-    tables = query.order_by(Table.table_name.asc()).paginate(page=page, per_page=per_page, error_out=False)
+    # 表总数使用缓存，不在每次翻页时 COUNT(*)
+    total = count_tables(db_id)
     
-    return render_template('tables.html', database=database, tables=tables, keyword=keyword)
+    schedule = SyncSchedule.query.filter_by(db_id=db_id).first()
+    
+    return render_template('tables.html', database=database, tables=tables, keyword=keyword, total=total,
+                           page=page, prev_args=prev_args, next_args=next_args, schedule=schedule,
+                           min_interval=scheduler_config.get('min_interval_minutes', 10))
 
 
-@app.route('/database/<int:db_id>/table/<string:schema_name>/<string:table_name>/info')
+@bp.route('/database/<int:db_id>/table/<string:schema_name>/<string:table_name>/info')
+@page_cache.cached(get_cache_version)
 def table_info(db_id, schema_name, table_name):
     # 获取数据库和表
     database = Database.query.get_or_404(db_id)
@@ -210,10 +459,77 @@ def table_info(db_id, schema_name, table_name):
     # 获取表的字段
     columns = Column.query.filter_by(table_id=table.id).order_by(Column.ordinal_position).all()
     
-    return render_template('table_info.html', database=database, table=table, columns=columns)
+    # 最近的结构变更记录
+    changes = history.list_changes(db, SchemaChange, db_id, table.schema_name, table.table_name, limit=50)
+    
+    return render_template('table_info.html', database=database, table=table, columns=columns,
+                           changes=[history.change_to_dict(change) for change in changes])
+
+# 全局搜索路由：跨所有数据库搜索表和字段
+@bp.route('/search')
+def global_search():
+    """
+    scope=table 搜索表名/表注释，scope=column 搜索字段名/字段注释，均通过搜索索引查询并按相关度排序
+    可按数据库类型、数据库、模式、字段类型（前缀匹配，如 varchar）筛选
+    不统计总数：字段表数据量大时 COUNT 比查询本身更慢，多取一条判断是否还有下一页
+    """
+    keyword = request.args.get('q', '').strip()
+    scope = request.args.get('scope', 'table')
+    if scope not in ('table', 'column'):
+        scope = 'table'
+    filters = {
+        'db_type': request.args.get('db_type', '').strip(),
+        'db_id': request.args.get('db_id', type=int),
+        'schema': request.args.get('schema', '').strip(),
+        'column_type': request.args.get('column_type', '').strip(),
+    }
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = 50
+
+    results = []
+    has_next = False
+    if keyword:
+        if scope == 'column':
+            query = db.session.query(Column, Table, Database) \
+                .join(Table, Table.id == Column.table_id) \
+                .join(Database, Database.id == Table.db_id)
+            if filters['column_type']:
+                query = query.filter(Column.column_type.ilike(like_pattern(filters['column_type'])[1:], escape='\\'))
+            query = table_search.filter_columns(query, Column, keyword)
+        else:
+            query = db.session.query(Table, Database).join(Database, Database.id == Table.db_id)
+            query = table_search.filter_tables(query, Table, keyword)
+        if filters['db_type']:
+            query = query.filter(Database.db_type == filters['db_type'])
+        if filters['db_id']:
+            query = query.filter(Table.db_id == filters['db_id'])
+        if filters['schema']:
+            query = query.filter(Table.schema_name == filters['schema'])
+
+        rows = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        for row in rows[:per_page]:
+            column = row[0] if scope == 'column' else None
+            table, database = row[-2], row[-1]
+            results.append({
+                'database': database,
+                'table': table,
+                'column': column,
+                'url': url_for('meta.table_info', db_id=database.id, schema_name=table.schema_name or '', table_name=table.table_name),
+            })
+
+    # 筛选下拉框的选项
+    databases = Database.query.order_by(Database.db_alias).all()
+    db_types = sorted({database.db_type for database in databases})
+
+    # 翻页链接保留当前的搜索条件
+    page_args = {key: value for key, value in request.args.items() if key != 'page' and value}
+
+    return render_template('search.html', keyword=keyword, scope=scope, filters=filters, results=results,
+                           page=page, has_next=has_next, page_args=page_args, databases=databases, db_types=db_types)
 
 # 更新表备注路由
-@app.route('/database/<int:db_id>/table/<int:table_id>/update-remark', methods=['POST'])
+@bp.route('/database/<int:db_id>/table/<int:table_id>/update-remark', methods=['POST'])
 def update_table_remark(db_id, table_id):
     # 获取数据库和表
     database = Database.query.get_or_404(db_id)
@@ -224,181 +540,532 @@ def update_table_remark(db_id, table_id):
     
     # 更新备注
     table.remark = new_remark
+    table.updated_at = datetime.now()
+    bump_cache_version(table.db_id)
     db.session.commit()
     
     # 返回成功响应
     return jsonify({'success': True, 'message': '备注更新成功'})
 
-# 实际执行同步的函数
-def do_sync_tables(db_id, token):
+# 实际执行同步的函数，在同步线程池中执行，app 为提交任务的应用；full为True时强制全量同步，profile为True时剖析本次同步
+def do_sync_tables(app, db_id, token, full=False, profile=False):
+    sync_profile = None
+    if profiler_config.get('enabled', False) and (profile or db_id in (profiler_config.get('sync_db_ids') or [])):
+        sync_profile = profiler.start()
+        if sync_profile is None:
+            print(f"[SYNC LOG] 数据库 {db_id} 已有剖析进行中，本次同步不剖析")
+    sync_started = time.perf_counter()
     try:
         # 导入meta_sync模块的同步函数
         from meta_sync import mysql_sync_tables, postgres_sync_tables, hive_sync_tables
         
         # 创建应用上下文
         with app.app_context():
+            # 任务从排队进入执行状态，任务已被其他进程重新抢占时放弃执行
+            if not jobs.start_job(db, SyncJob, db_id, token):
+                print(f"[SYNC LOG] 数据库 {db_id} 同步任务已被重新抢占，放弃执行")
+                return
+            
             # 获取数据库
             database = Database.query.get_or_404(db_id)
+            # 同步中会提交并清空会话，提前取出数据库类型
+            db_type = database.db_type
+            if query_config.get('enabled', True):
+                query_stats.begin(f'同步 {db_type} 数据库 {db_id}', query_config.get('sync_max_queries', 20000),
+                                  query_config.get('sync_max_repeats', 2000))
             
             # 初始化结果
             success = False
             message = ''
+            stats = None
+            error = None
+            
+            # 同步进度写入tb_sync_job，由进度推送接口读取
+            progress = jobs.JobProgress(db, SyncJob, db_id, token, sync_config.get('progress_interval', 1))
+            # PostgreSQL和Hive按模式并行拉取、分批提交，失败后从未完成的模式继续
+            checkpoint = jobs.JobCheckpoint(db, SyncJob, db_id, token, sync_config.get('checkpoint_max_age_seconds', 21600))
+            batch_size = sync_config.get('batch_tables', 1000)
+            # 表和字段的新增、删除、修改记入tb_schema_change
+            change_log = history.ChangeLog(db, SchemaChange, db_id, token)
+            timer = None
             
             # 根据数据库类型选择不同的同步函数
             try:
+                # 统计各阶段耗时、源库查询和写入行数，包装进度回调传给同步函数
+                timer = SyncTimer(progress, db.engine, engines.get_sync_engine(database), db.session)
+                progress = timer
                 if database.db_type == 'MySQL':
-                    result = mysql_sync_tables(database, db, Table, Column)
+                    result = mysql_sync_tables(database, db, Table, Column, full=full, progress=progress, change_log=change_log)
                 elif database.db_type == 'PostgreSQL':
-                    result = postgres_sync_tables(database, db, Table, Column)
+                    postgres_config = sync_config.get('postgres') or {}
+                    result = postgres_sync_tables(database, db, Table, Column, full=full, progress=progress,
+                                                  checkpoint=checkpoint, batch_size=batch_size,
+                                                  include_schemas=postgres_config.get('include_schemas'),
+                                                  exclude_schemas=postgres_config.get('exclude_schemas'),
+                                                  change_log=change_log)
                 elif database.db_type == 'Hive':
-                    result = hive_sync_tables(database, db, Table, Column)
+                    result = hive_sync_tables(database, db, Table, Column, full=full, progress=progress,
+                                              checkpoint=checkpoint, batch_size=batch_size, change_log=change_log)
                 else:
                     raise Exception(f'不支持的数据库类型：{database.db_type}')
                 
                 # 解析结果
                 success = result['success']
                 message = result['message']
+                stats = result.get('stats')
             except Exception as e:
                 # 捕获同步过程中的异常
                 success = False
                 message = f'同步失败：{str(e)}'
                 import traceback
+                error = traceback.format_exc()
                 traceback.print_exc()  # 输出详细堆栈信息
             
             # 输出通用日志
             print(f"[SYNC LOG] 数据库 {db_id} 同步{'成功' if success else '失败'}: {message}")
+            if timer is not None:
+                timer.finish()
+                metrics.record_sync(db_type, db_id, success, timer)
+                print(f"[SYNC LOG] 数据库 {db_id} {timer.summary()}")
             
-            # 更新同步状态，添加last_completed_at字段记录完成时间
-            with sync_lock:
-                sync_tasks[db_id] = {
-                    'status': 'success' if success else 'error',
-                    'msg': message,
-                    'timestamp': datetime.now().isoformat(),
-                    'last_completed_at': datetime.now().timestamp(),  # 添加完成时间戳
-                    'token': token
-                }
+            # 记录同步结果，完成时间用于冷却期判断；定时触发的同步记录到定时设置，失败后推迟下次同步
+            jobs.finish_job(db, SyncJob, db_id, token, success, message, stats, error)
+            scheduler.finish_run(db, SyncSchedule, db_id, token, scheduler.SUCCESS if success else scheduler.ERROR,
+                                 message, **schedule_options())
+            # 表和字段可能已变化（失败时已提交的批次也已写入），页面缓存和表数量缓存失效
+            bump_cache_version(db_id)
+            db.session.commit()
+            _table_counts.pop(db_id, None)
     except Exception as e:
         # 处理全局异常
         error_msg = f'同步失败：{str(e)}'
-        with sync_lock:
-            sync_tasks[db_id] = {
-                'status': 'error',
-                'msg': error_msg,
-                'timestamp': datetime.now().isoformat(),
-                'last_completed_at': datetime.now().timestamp(),  # 添加完成时间戳
-                'token': token
-            }
+        import traceback
+        try:
+            with app.app_context():
+                db.session.rollback()
+                jobs.finish_job(db, SyncJob, db_id, token, False, error_msg, error=traceback.format_exc())
+                scheduler.finish_run(db, SyncSchedule, db_id, token, scheduler.ERROR, error_msg, **schedule_options())
+                bump_cache_version(db_id)
+                db.session.commit()
+        except Exception:
+            traceback.print_exc()
         # 输出日志
         print(f"[SYNC LOG] 数据库 {db_id} 同步失败 (全局异常): {error_msg}")
-        import traceback
         traceback.print_exc()  # 输出详细堆栈信息
+    finally:
+        query_stats.end()
+        if sync_profile is not None:
+            filename = profiler.stop(sync_profile, 'sync', f'db{db_id}', time.perf_counter() - sync_started)
+            print(f"[SYNC LOG] 数据库 {db_id} 剖析结果：{filename}")
 
-# 同步表信息路由
-@app.route('/database/<int:db_id>/sync-tables', methods=['POST'])
-def sync_tables(db_id):
-    current_time = datetime.now().timestamp()
-    cooldown_seconds = 30  # 30秒冷却期
+# 提交数据库同步任务
+def enqueue_sync(database, full=False, profile=False, token=None):
+    """
+    通过条件更新tb_sync_job抢占任务，多个进程中只有一个能抢占成功
+    任务正在排队/执行中，或处于冷却期内时直接返回已有任务的信息，否则加入本进程的同步线程池排队
+    profile为True时剖析本次同步（需开启性能剖析）；token 为空时生成新的任务token
+    返回接口响应内容，新提交的任务带有排队位置position
+    """
+    db_id = database.id
+    cooldown_seconds = sync_config.get('cooldown_seconds', 30)  # 默认30秒冷却期
+    stale_seconds = sync_config.get('stale_job_seconds', 21600)  # 默认6小时无更新视为遗留任务
+    queued_stale_seconds = sync_config.get('stale_queued_seconds', 3600)  # 默认排队1小时视为遗留任务
     
-    with sync_lock:
-        # 检查是否已有同步任务正在执行
-        if db_id in sync_tasks and sync_tasks[db_id]['status'] == 'loading':
-            print(f"[SYNC LOG] 数据库 {db_id} 同步任务正在执行中，返回loading状态")
-            return jsonify({
-                'success': True,  # 表示请求成功，只是状态是loading
+    # 本进程的同步线程池中已有该数据库的任务时不再抢占，避免把仍在排队的有效任务当作遗留任务替换掉
+    if sync_executor.is_pending(db_id):
+        job = jobs.get_job(db, SyncJob, db_id)
+        print(f"[SYNC LOG] 数据库 {db_id} 同步任务已在本进程排队或执行中")
+        return {'success': True, 'message': '同步任务正在执行中', 'token': job.token if job else None}
+    
+    token = token or generate_token()
+    claimed, job = jobs.claim_job(db, SyncJob, db_id, token, full, cooldown_seconds, stale_seconds,
+                                  queued_stale_seconds)
+    
+    if not claimed:
+        # 检查是否已有同步任务正在排队或执行
+        if job.status in jobs.ACTIVE_STATUSES:
+            print(f"[SYNC LOG] 数据库 {db_id} 同步任务正在{'排队' if job.status == 'queued' else '执行'}中，返回{job.status}状态")
+            return {
+                'success': True,  # 表示请求成功，只是状态是queued/loading
                 'message': '同步任务正在执行中',
-                'token': sync_tasks[db_id]['token']
-            })
+                'token': job.token
+            }
         
-        # 检查是否已有同步任务记录
-        if db_id in sync_tasks:
-            task = sync_tasks[db_id]
-            
-            # 检查冷却期
-            if 'last_completed_at' in task and task['last_completed_at'] > 0:
-                last_completed = task['last_completed_at']
-                time_diff = current_time - last_completed
-                
-                # 如果时间差小于30秒，直接返回上次结果
-                if time_diff < cooldown_seconds:
-                    print(f"[SYNC LOG] 数据库 {db_id} 同步冷却期内，返回上次结果")
-                    return jsonify({
-                        'success': task['status'] == 'success',
-                        'message': task['msg'],
-                        'token': task['token']
-                    })
+        # 冷却期内，直接返回上次结果
+        print(f"[SYNC LOG] 数据库 {db_id} 同步冷却期内，返回上次结果")
+        return {
+            'success': job.status == 'success',
+            'message': job.message,
+            'token': job.token
+        }
     
-    # 生成token
-    token = generate_token()
+    # 放入同步线程池排队，同一源库主机的并发数受限
+    position = sync_executor.submit(db_id, database.db_host, do_sync_tables, current_app._get_current_object(), db_id,
+                                    token, full, profile)
+    if position is None:
+        # 本进程中该数据库已有被重新抢占前的任务在排队，新任务不会执行，记为失败，避免任务一直处于排队状态
+        message = '同步任务未能加入队列：本进程中该数据库已有任务在排队，请稍后重试'
+        print(f"[SYNC LOG] 数据库 {db_id} {message}")
+        jobs.finish_job(db, SyncJob, db_id, token, False, message)
+        return {'success': False, 'message': message, 'token': token}
     
-    # 初始化同步状态，添加last_completed_at字段（初始为0）
-    with sync_lock:
-        sync_tasks[db_id] = {
-            'status': 'loading',
-            'msg': '同步中...',
-            'timestamp': datetime.now().isoformat(),
-            'last_completed_at': 0,  # 初始化为0
-            'token': token
-        }
+    # 返回token和排队位置
+    return {'success': True, 'token': token, 'message': '同步任务已加入队列', 'position': jobs.queue_position(db, SyncJob, job)}
+
+# 同步表信息路由
+@bp.route('/database/<int:db_id>/sync-tables', methods=['POST'])
+def sync_tables(db_id):
+    # 默认增量同步，full=1 时强制全量同步
+    full = request.form.get('full') == '1'
+    database = Database.query.get_or_404(db_id)
+    # 带剖析口令时剖析本次同步
+    return jsonify(enqueue_sync(database, full, profiler_config.get('enabled', False) and profile_requested()))
+
+# 同步全部数据库路由
+@bp.route('/databases/sync-all', methods=['POST'])
+def sync_all_databases():
+    full = request.form.get('full') == '1'
+    queued = 0
+    skipped = 0
+    unreachable = 0
+    health_rows = health.load_health(db, DatabaseHealth)
     
-    # 启动异步线程执行同步
-    import threading
-    thread = threading.Thread(target=do_sync_tables, args=(db_id, token))
-    thread.daemon = True
-    thread.start()
+    # 按ID顺序全部加入队列，由同步线程池控制并发
+    for database in Database.query.order_by(Database.id).all():
+        if database.db_type not in engines.SYNC_DRIVERS:
+            skipped += 1
+            continue
+        # 有效期内连接检查失败的数据库不加入队列，避免占用同步线程等待连接超时
+        if health.is_unreachable(health_rows.get(database.id), health_ttl()):
+            unreachable += 1
+            continue
+        result = enqueue_sync(database, full)
+        if result.get('position'):
+            queued += 1
+        else:
+            skipped += 1
     
-    # 返回token和初始状态
-    return jsonify({'success': True, 'token': token, 'message': '同步任务已启动'})
+    message = f'已将{queued}个数据库加入同步队列'
+    if skipped:
+        message += f'，跳过{skipped}个（同步中、冷却期内或不支持同步）'
+    if unreachable:
+        message += f'，跳过{unreachable}个连接不可用的数据库'
+    return jsonify({'success': True, 'message': message, 'queued': queued, 'skipped': skipped, 'unreachable': unreachable})
+
+# 连接检查结果的有效期（秒）
+def health_ttl():
+    return health_config.get('ttl_seconds', 300)
+
+# 并发检查全部数据库的连接并保存结果
+def run_health_check():
+    databases = Database.query.order_by(Database.id).all()
+    results = health.check_databases(databases, health_config.get('max_workers', 16), health_config.get('timeout', 5))
+    health.save_results(db, DatabaseHealth, results)
+    return results
+
+# 本进程同一时间只有一个后台检查
+_health_refreshing = threading.Lock()
+
+def refresh_health_async(app):
+    if not _health_refreshing.acquire(blocking=False):
+        return
+
+    def refresh():
+        try:
+            with app.app_context():
+                run_health_check()
+        except Exception:
+            import traceback
+            traceback.print_exc()
+        finally:
+            _health_refreshing.release()
+
+    threading.Thread(target=refresh, name='health-refresh', daemon=True).start()
+
+# 立即检查全部数据库的连接
+@bp.route('/databases/health-check', methods=['POST'])
+def check_databases_health():
+    started = time.perf_counter()
+    results = run_health_check()
+    ok = sum(1 for result in results.values() if result['status'] == health.OK)
+    failed = sum(1 for result in results.values() if result['status'] == health.ERROR)
+    rows = health.load_health(db, DatabaseHealth)
+    return jsonify({
+        'success': True,
+        'message': f'检查完成：可用{ok}个，不可用{failed}个，耗时{time.perf_counter() - started:.1f}秒',
+        'health': [health.health_to_dict(rows[db_id]) for db_id in results if db_id in rows],
+    })
+
+# 全部数据库的连接检查结果，结果已过期时在后台重新检查
+@bp.route('/databases/health', methods=['GET'])
+def databases_health():
+    rows = health.load_health(db, DatabaseHealth)
+    stale = any(health.is_stale(row, health_ttl()) for row in rows.values())
+    if stale or not rows:
+        refresh_health_async(current_app._get_current_object())
+    return jsonify({
+        'health': [health.health_to_dict(row) for row in rows.values()],
+        'ttl_seconds': health_ttl(),
+        'stale': stale,
+    })
+
+# 定时同步的抖动比例和失败后的最长推迟时间
+def schedule_options():
+    return {
+        'jitter': scheduler_config.get('jitter', 0.1),
+        'max_backoff_seconds': scheduler_config.get('max_backoff_hours', 24) * 3600,
+    }
+
+# 检查到期的定时同步并加入同步队列，由定时同步线程调用
+def run_scheduled_syncs():
+    """
+    全部进程中排队/执行的同步任务数不超过 scheduler.max_concurrent，只抢占剩余名额数的到期同步
+    有效期内连接检查失败的数据库不提交同步，按失败推迟下次同步
+    """
+    options = schedule_options()
+    active = jobs.active_count(db, SyncJob, sync_config.get('stale_job_seconds', 21600))
+    limit = scheduler_config.get('max_concurrent', 2) - active
+    claimed = scheduler.claim_due(db, SyncSchedule, generate_token, limit, **options)
+    if not claimed:
+        return
+    health_rows = health.load_health(db, DatabaseHealth)
+
+    def skip(db_id, token, status, message):
+        # 未提交同步时不会经过 do_sync_tables，在这里使页面缓存失效，页面显示新的下次同步时间和结果
+        scheduler.finish_run(db, SyncSchedule, db_id, token, status, message, **options)
+        bump_cache_version(db_id)
+        db.session.commit()
+
+    for db_id, token in claimed:
+        database = db.session.get(Database, db_id)
+        if database is None or database.db_type not in engines.SYNC_DRIVERS:
+            skip(db_id, token, scheduler.SKIPPED, '数据库不存在或不支持同步')
+            continue
+        if health.is_unreachable(health_rows.get(db_id), health_ttl()):
+            print(f"[SYNC LOG] 数据库 {db_id} 连接不可用，跳过本次定时同步")
+            skip(db_id, token, scheduler.UNREACHABLE, health_rows[db_id].last_error)
+            continue
+        result = enqueue_sync(database, token=token)
+        if result['token'] != token or not result['success']:
+            # 已有同步在排队/执行中或在冷却期内，本次不再同步
+            skip(db_id, token, scheduler.SKIPPED, result['message'])
+        else:
+            print(f"[SYNC LOG] 数据库 {db_id} 定时同步已加入队列")
+
+# 开启定时同步时启动本进程的定时同步线程，由 server.run 在服务开始处理请求前调用（gunicorn 为每个工作进程）
+def start_scheduler(app):
+    if not scheduler_config.get('enabled', False):
+        return
+
+    def tick():
+        with app.app_context():
+            try:
+                run_scheduled_syncs()
+            finally:
+                db.session.remove()
+
+    sync_scheduler.start(tick, scheduler_config.get('poll_seconds', 30))
+    print(f"定时同步已启动，每{scheduler_config.get('poll_seconds', 30)}秒检查一次")
+
+# 同步任务的状态和进度，供状态查询和进度推送共用
+def sync_job_state(job):
+    state = {
+        'status': job.status,
+        'msg': job.message,
+        'phase': job.phase,
+        'tables_total': job.tables_total or 0,
+        'tables_done': job.tables_done or 0,
+        'columns_done': job.columns_done or 0,
+        'timestamp': (job.finished_at or job.started_at or job.queued_at).isoformat()
+    }
+    # 排队中的任务返回排队位置
+    if job.status == 'queued':
+        state['position'] = jobs.queue_position(db, SyncJob, job)
+    return state
 
 # 查询同步状态路由
-@app.route('/database/<int:db_id>/sync-status', methods=['GET'])
+@bp.route('/database/<int:db_id>/sync-status', methods=['GET'])
 def sync_status(db_id):
     token = request.args.get('token')
     
-    with sync_lock:
-        if db_id not in sync_tasks:
-            return jsonify({'status': 'none'})
-        
-        task = sync_tasks[db_id]
-        
-        # 如果token一致，返回完整结果并删除记录
-        if token and token == task['token']:
-            result = {
-                'status': task['status'],
-                'msg': task['msg'],
-                'timestamp': task['timestamp']
-            }
-            # 只有完成状态才删除记录
-            if task['status'] != 'loading':
-                del sync_tasks[db_id]
-            return jsonify(result)
-        else:
-            # token不一致或没有，仅返回状态
-            return jsonify({'status': task['status']})
+    # 从tb_sync_job读取，任意进程都能查询到其他进程执行的任务状态
+    job = jobs.get_job(db, SyncJob, db_id)
+    if job is None or job.status == 'none':
+        return jsonify({'status': 'none'})
+    
+    # 如果token一致，返回完整结果
+    if token and token == job.token:
+        return jsonify(sync_job_state(job))
+    else:
+        # token不一致或没有，仅返回状态
+        return jsonify({'status': job.status})
+
+# 同步进度推送路由（Server-Sent Events）
+@bp.route('/database/<int:db_id>/sync-events', methods=['GET'])
+def sync_events(db_id):
+    """
+    按token推送同步任务的进度，状态或计数变化时发送 progress 事件，任务结束时发送 result 事件并关闭连接
+    服务端每隔 events_poll_seconds 秒读取一次tb_sync_job，同一时刻多个页面订阅时只产生轻量查询，不再有HTTP轮询请求
+    连接最长保持 events_max_seconds 秒，之后由浏览器自动重连，避免长时间占用服务线程
+    """
+    token = request.args.get('token')
+    poll_seconds = sync_config.get('events_poll_seconds', 1)
+    max_seconds = sync_config.get('events_max_seconds', 300)
+    heartbeat_seconds = 15
+    
+    def event(name, data):
+        return f'event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+    
+    def generate():
+        started = last_sent = time.monotonic()
+        last_state = None
+        # 断线后浏览器3秒后重连
+        yield 'retry: 3000\n\n'
+        while True:
+            job = jobs.get_job(db, SyncJob, db_id)
+            if job is None or job.token != token:
+                yield event('result', {'status': 'error', 'msg': '同步任务不存在或已被重新提交'})
+                return
+            state = sync_job_state(job)
+            # 读取完成后释放连接，等待期间不占用连接池
+            db.session.remove()
+            
+            if state['status'] not in jobs.ACTIVE_STATUSES:
+                yield event('result', state)
+                return
+            
+            now = time.monotonic()
+            # timestamp 不参与比较，只在状态或计数变化时推送
+            compare = dict(state, timestamp=None)
+            if compare != last_state:
+                last_state = compare
+                last_sent = now
+                yield event('progress', state)
+            elif now - last_sent >= heartbeat_seconds:
+                # 心跳事件，页面据此判断推送连接仍然可用
+                last_sent = now
+                yield event('ping', {})
+            
+            if now - started >= max_seconds:
+                return
+            time.sleep(poll_seconds)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # 关闭nginx代理缓冲，保证事件实时到达
+    })
+
+
+# 数据库完整表结构的流式导出接口
+@bp.route('/api/database/<int:db_id>/schema', methods=['GET'])
+def export_schema(db_id):
+    """
+    返回数据库全部表及其字段，默认每行一张表的 NDJSON（format=json 时为 JSON 数组），边查询边输出
+    - fields：只返回指定字段，如 table_name,table_comment,columns.column_name；不含 columns 时不返回字段
+    - schema：按模式名筛选，多个用逗号分隔
+    - updated_since：只返回该时间之后新增或变化的表（ISO 8601），用于增量拉取
+    请求头 Accept-Encoding 包含 gzip 时压缩输出
+    """
+    if db.session.get(Database, db_id) is None:
+        return jsonify({'error': '数据库不存在'}), 404
+    try:
+        table_fields, column_fields = schema_export.parse_fields(request.args.get('fields'))
+        updated_since = schema_export.parse_datetime(request.args.get('updated_since'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    schemas = [s.strip() for s in request.args.get('schema', '').split(',') if s.strip()]
+    fmt = 'json' if request.args.get('format') == 'json' else 'ndjson'
+    # 查询使用独立连接，校验完成后释放请求会话的连接
+    db.session.remove()
+
+    records = schema_export.iter_schema(db.engine, Table, Column, db_id, table_fields, column_fields,
+                                        schemas=schemas, updated_since=updated_since)
+    body = schema_export.encode(records, fmt)
+    headers = {'Vary': 'Accept-Encoding', 'X-Accel-Buffering': 'no'}
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        body = schema_export.gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+    mimetype = 'application/json' if fmt == 'json' else 'application/x-ndjson'
+    return Response(body, mimetype=mimetype, headers=headers)
+
+# 表结构变更历史接口
+@bp.route('/api/database/<int:db_id>/changes', methods=['GET'])
+def schema_changes(db_id):
+    """
+    按时间倒序返回数据库的表结构变更记录（同步时记录的表/字段新增、删除、修改）
+    - schema、table：只返回指定模式或指定表的变更
+    - before：上一页返回的 next_before，继续向前翻页；limit 每页条数，最多1000
+    """
+    if db.session.get(Database, db_id) is None:
+        return jsonify({'error': '数据库不存在'}), 404
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    table_name = request.args.get('table') or None
+    schema_name = request.args.get('schema') or None
+    changes = history.list_changes(db, SchemaChange, db_id, schema_name, table_name,
+                                   before_id=request.args.get('before', type=int), limit=limit)
+    return jsonify({
+        'changes': [history.change_to_dict(change) for change in changes],
+        'next_before': changes[-1].id if len(changes) == limit else None,
+    })
+
 
+# Prometheus 指标
+@bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 
+# 语句数最多的请求和同步（调试页面只在对应功能开启时由 create_app 注册）
+def debug_queries():
+    return render_template('debug_queries.html', records=query_stats.worst(), keep=query_stats.keep)
 
 
+# 性能剖析结果列表
+def debug_profiles():
+    return render_template('debug_profiles.html', profiles=profiler.list(), keep=profiler.keep)
+
+# 性能剖析结果：默认显示文本摘要，download=1 时下载 pstats 文件
+def debug_profile(filename):
+    path = profiler.path(filename)
+    if path is None:
+        abort(404)
+    if request.args.get('download') == '1':
+        return send_file(path, as_attachment=True, download_name=filename)
+    return Response(profiler.report(filename), mimetype='text/plain; charset=utf-8')
+
+
+# gunicorn 工作进程创建后释放从主进程继承的元数据库连接，各进程使用自己的连接
+def after_fork(app):
+    with app.app_context():
+        db.engine.dispose(close=False)
 
 
 import sys
 import argparse
 
 if __name__ == '__main__':
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='Run the Flask application')
+    parser.add_argument('--port', type=int, help='Port to run the application on')
+    parser.add_argument('--host', type=str, help='Host to run the application on')
+    parser.add_argument('--mode', choices=['dev', 'gunicorn', 'waitress'], help='Server mode, defaults to server.mode in config.yml')
+    args = parser.parse_args()
+
     try:
-        # 创建数据库表（如果不存在）
+        app = create_app()
+        # 启动服务前在主进程执行一次未执行的迁移（新建的库由迁移创建全部表），工作进程启动时不再检查表结构
         with app.app_context():
-            db.create_all()
-            print("数据库表创建/检查完成！")
-        
-        # 解析命令行参数
-        parser = argparse.ArgumentParser(description='Run the Flask application')
-        parser.add_argument('--port', type=int, default=config['app']['port'], help='Port to run the application on')
-        parser.add_argument('--host', type=str, default=config['app']['host'], help='Host to run the application on')
-        args = parser.parse_args()
-        
-        # 启动应用
-        app.run(debug=config['app']['debug'], host=args.host, port=args.port)
+            migrations.upgrade(db.engine)
+            print("数据库表结构检查完成！")
+            # 检查表搜索索引
+            table_search.ensure_index()
+            print(f"表搜索方式：{table_search.name if table_search.available else 'like'}")
+            # 主进程不再使用元数据库连接，创建工作进程前释放
+            db.engine.dispose()
     except Exception as e:
         print(f"数据库连接失败: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+
+    # 启动应用
+    server.run(app, create_app, config, args.host or config['app']['host'], args.port or config['app']['port'],
+               mode=args.mode, post_fork=after_fork, on_start=start_scheduler)
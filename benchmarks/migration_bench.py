@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+迁移前后元数据库查询耗时对比
+在临时 SQLite 库中按迁移前的表结构（只有主键）生成测试数据，分别在执行迁移前后测量页面和同步使用的查询：
+- 按数据库加载全部表（同步比对）
+- 按数据库+模式名+表名查询表（表信息页）
+- 按表加载字段（表信息页、同步比对）
+- 按表+字段名查询字段
+
+用法：python benchmarks/migration_bench.py [--tables 20000] [--columns 20] [--lookups 500]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import migrations  # noqa: E402
+
+# 迁移前的表结构
+BASELINE_DDL = [
+    """
+    CREATE TABLE tb_database (
+      id INTEGER PRIMARY KEY AUTOINCREMENT, db_type TEXT NOT NULL, db_alias TEXT NOT NULL, db_host TEXT NOT NULL,
+      db_port INTEGER NOT NULL, db_name TEXT NOT NULL, db_user TEXT NOT NULL, db_password TEXT NOT NULL,
+      remark TEXT DEFAULT NULL, created_at TEXT DEFAULT CURRENT_TIMESTAMP, updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE tb_table (
+      id INTEGER PRIMARY KEY AUTOINCREMENT, db_id INTEGER NOT NULL, schema_name TEXT DEFAULT NULL,
+      table_name TEXT NOT NULL, table_comment TEXT DEFAULT NULL, remark TEXT DEFAULT NULL,
+      create_time TEXT DEFAULT NULL, update_time TEXT DEFAULT NULL
+    )
+    """,
+    """
+    CREATE TABLE tb_column (
+      id INTEGER PRIMARY KEY AUTOINCREMENT, table_id INTEGER NOT NULL, column_name TEXT NOT NULL,
+      column_type TEXT NOT NULL, is_primary INTEGER DEFAULT 0, is_unique INTEGER DEFAULT 0,
+      column_comment TEXT DEFAULT NULL, ordinal_position INTEGER DEFAULT NULL
+    )
+    """,
+]
+
+DATABASES = 50
+SCHEMAS = 10
+
+
+def populate(engine, ntables, ncolumns):
+    with engine.begin() as conn:
+        for ddl in BASELINE_DDL:
+            conn.execute(text(ddl))
+        conn.execute(text("""
+        INSERT INTO tb_database (db_type, db_alias, db_host, db_port, db_name, db_user, db_password)
+        VALUES ('MySQL', :alias, '127.0.0.1', 3306, 'db', 'u', 'p')
+        """), [{'alias': f'db{i}'} for i in range(DATABASES)])
+        conn.execute(text("""
+        INSERT INTO tb_table (id, db_id, schema_name, table_name, table_comment) VALUES (:id, :db_id, :schema_name, :table_name, '测试表')
+        """), [
+            {'id': i + 1, 'db_id': i % DATABASES + 1, 'schema_name': f's{i % SCHEMAS}', 'table_name': f't{i:07d}'}
+            for i in range(ntables)
+        ])
+        conn.execute(text("""
+        INSERT INTO tb_column (table_id, column_name, column_type, column_comment, ordinal_position)
+        VALUES (:table_id, :column_name, 'varchar(64)', '测试字段', :position)
+        """), [
+            {'table_id': t + 1, 'column_name': f'c{c}', 'position': c + 1}
+            for t in range(ntables) for c in range(ncolumns)
+        ])
+
+
+def measure(engine, ntables, ncolumns, lookups):
+    """各查询的平均耗时（毫秒）"""
+    rng = random.Random(42)
+    table_ids = [rng.randint(0, ntables - 1) for _ in range(lookups)]
+    queries = [
+        ('按数据库加载表', "SELECT id, schema_name, table_name FROM tb_table WHERE db_id = :db_id",
+         [{'db_id': i % DATABASES + 1} for i in range(min(lookups, 20))]),
+        ('按模式名+表名查询表', "SELECT * FROM tb_table WHERE db_id = :db_id AND schema_name = :schema_name AND table_name = :table_name",
+         [{'db_id': i % DATABASES + 1, 'schema_name': f's{i % SCHEMAS}', 'table_name': f't{i:07d}'} for i in table_ids]),
+        ('按表加载字段', "SELECT * FROM tb_column WHERE table_id = :table_id ORDER BY ordinal_position",
+         [{'table_id': i + 1} for i in table_ids]),
+        ('按表+字段名查询字段', "SELECT * FROM tb_column WHERE table_id = :table_id AND column_name = :column_name",
+         [{'table_id': i + 1, 'column_name': f'c{rng.randint(0, ncolumns - 1)}'} for i in table_ids]),
+    ]
+    results = {}
+    with engine.connect() as conn:
+        for name, sql, params_list in queries:
+            started = time.perf_counter()
+            for params in params_list:
+                conn.execute(text(sql), params).fetchall()
+            results[name] = (time.perf_counter() - started) * 1000 / len(params_list)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='迁移前后元数据库查询耗时对比')
+    parser.add_argument('--tables', type=int, default=20000, help='表数量')
+    parser.add_argument('--columns', type=int, default=20, help='每张表的字段数')
+    parser.add_argument('--lookups', type=int, default=500, help='每种查询执行的次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"生成测试数据：{args.tables} 张表，{args.tables * args.columns} 个字段")
+        populate(engine, args.tables, args.columns)
+
+        before = measure(engine, args.tables, args.columns, args.lookups)
+        started = time.perf_counter()
+        migrations.upgrade(engine, log=lambda message: None)
+        print(f"迁移耗时 {time.perf_counter() - started:.1f}s")
+        after = measure(engine, args.tables, args.columns, args.lookups)
+        engine.dispose()
+
+    print(f"{'查询':<16}{'迁移前(ms)':>12}{'迁移后(ms)':>12}{'倍数':>10}")
+    for name in before:
+        print(f"{name:<16}{before[name]:>12.3f}{after[name]:>12.3f}{before[name] / max(after[name], 1e-6):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
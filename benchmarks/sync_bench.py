@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+同步性能测试
+在本地 SQLite 中生成模拟源库（MySQL 的 information_schema.TABLES/COLUMNS，Hive 元数据库的 DBS/TBLS/SDS/COLUMNS_V2/PARTITION_KEYS/TABLE_PARAMS），
+对 mysql_sync_tables / hive_sync_tables 依次执行以下同步，元数据库为临时 SQLite 库：
+- first：元数据库为空时的首次同步
+- noop：源库未变化时的增量同步
+- full：源库未变化时的全量同步
+- delta：约1%的表发生变化（修改/新增字段、新增/删除表）后的增量同步
+每次同步在独立子进程中执行，统计耗时、源库和元数据库的查询次数、写入行数和进程内存峰值（RSS），
+结果保存为 JSON，可用 --compare 与上一次的结果对比
+
+用法：python benchmarks/sync_bench.py [--sources mysql,hive] [--sizes 1000,10000,100000] [--columns 10]
+                                    [--output 结果文件] [--compare 上次的结果文件]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+PHASES = ('first', 'noop', 'full', 'delta')
+
+# Hive 模拟源库的库数量，表平均分布在各库中
+HIVE_SCHEMAS = 10
+
+# 模拟 MySQL 源库的库名
+MYSQL_SCHEMA = 'benchdb'
+
+
+# ---- 模拟源库 ----
+
+def build_mysql_source(path, ntables, ncolumns):
+    """生成 information_schema.TABLES/COLUMNS 结构的模拟库"""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+    CREATE TABLE TABLES (TABLE_SCHEMA TEXT, TABLE_NAME TEXT, TABLE_COMMENT TEXT, CREATE_TIME TIMESTAMP, UPDATE_TIME TIMESTAMP, TABLE_TYPE TEXT);
+    CREATE TABLE COLUMNS (TABLE_SCHEMA TEXT, TABLE_NAME TEXT, COLUMN_NAME TEXT, COLUMN_TYPE TEXT, COLUMN_KEY TEXT, COLUMN_COMMENT TEXT, ORDINAL_POSITION INTEGER);
+    CREATE INDEX idx_tables ON TABLES (TABLE_SCHEMA, TABLE_NAME);
+    CREATE INDEX idx_columns ON COLUMNS (TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION);
+    """)
+    conn.executemany("INSERT INTO TABLES VALUES (?, ?, ?, '2024-01-01 00:00:00', NULL, 'BASE TABLE')",
+                     ((MYSQL_SCHEMA, f't{t:07d}', f'测试表{t}') for t in range(ntables)))
+    conn.executemany("INSERT INTO COLUMNS VALUES (?, ?, ?, ?, ?, ?, ?)", (
+        (MYSQL_SCHEMA, f't{t:07d}', f'c{c}', 'bigint(20)' if c == 0 else 'varchar(64)', 'PRI' if c == 0 else '', f'测试字段{c}', c + 1)
+        for t in range(ntables) for c in range(ncolumns)
+    ))
+    conn.commit()
+    conn.close()
+
+
+def mysql_source_delta(path, ntables, ncolumns):
+    """约1%的表发生变化：修改字段注释、新增字段、删除表、新增表各占四分之一"""
+    n = max(1, ntables // 400)
+    conn = sqlite3.connect(path)
+    for t in range(0, n):
+        conn.execute("UPDATE COLUMNS SET COLUMN_COMMENT = '已修改' WHERE TABLE_NAME = ? AND COLUMN_NAME = 'c1'", (f't{t:07d}',))
+    for t in range(n, 2 * n):
+        conn.execute("INSERT INTO COLUMNS VALUES (?, ?, 'c_new', 'int(11)', '', '新增字段', ?)", (MYSQL_SCHEMA, f't{t:07d}', ncolumns + 1))
+    for t in range(2 * n, 3 * n):
+        conn.execute("DELETE FROM TABLES WHERE TABLE_NAME = ?", (f't{t:07d}',))
+        conn.execute("DELETE FROM COLUMNS WHERE TABLE_NAME = ?", (f't{t:07d}',))
+    for t in range(ntables, ntables + n):
+        conn.execute("INSERT INTO TABLES VALUES (?, ?, '新增表', '2024-06-01 00:00:00', NULL, 'BASE TABLE')", (MYSQL_SCHEMA, f't{t:07d}'))
+        conn.executemany("INSERT INTO COLUMNS VALUES (?, ?, ?, 'varchar(64)', '', NULL, ?)",
+                         ((MYSQL_SCHEMA, f't{t:07d}', f'c{c}', c + 1) for c in range(ncolumns)))
+    conn.commit()
+    conn.close()
+
+
+def mysql_source_engine(path):
+    """把模拟库挂载为 information_schema，并注册 MySQL 同步查询用到的函数"""
+    from sqlalchemy import create_engine, event
+
+    engine = create_engine('sqlite://', connect_args={'detect_types': sqlite3.PARSE_DECLTYPES, 'check_same_thread': False})
+
+    @event.listens_for(engine, 'connect')
+    def connect(dbapi_conn, record):
+        dbapi_conn.create_function('CRC32', 1, lambda s: zlib.crc32(str(s).encode('utf-8')) if s is not None else None)
+        dbapi_conn.create_function('CONCAT_WS', -1, lambda sep, *args: sep.join(str(a) for a in args if a is not None))
+        dbapi_conn.execute(f"ATTACH DATABASE '{path}' AS information_schema")
+
+    return engine
+
+
+def build_hive_source(path, ntables, ncolumns):
+    """生成 Hive 元数据库结构的模拟库，每张表一个字段描述符和一个分区字段"""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+    CREATE TABLE DBS (DB_ID INTEGER PRIMARY KEY, NAME TEXT);
+    CREATE TABLE TBLS (TBL_ID INTEGER PRIMARY KEY, DB_ID INTEGER, SD_ID INTEGER, TBL_NAME TEXT, CREATE_TIME INTEGER);
+    CREATE TABLE SDS (SD_ID INTEGER PRIMARY KEY, CD_ID INTEGER);
+    CREATE TABLE COLUMNS_V2 (CD_ID INTEGER, COLUMN_NAME TEXT, TYPE_NAME TEXT, COMMENT TEXT, INTEGER_IDX INTEGER, PRIMARY KEY (CD_ID, COLUMN_NAME));
+    CREATE TABLE PARTITION_KEYS (TBL_ID INTEGER, PKEY_NAME TEXT, PKEY_TYPE TEXT, PKEY_COMMENT TEXT, INTEGER_IDX INTEGER, PRIMARY KEY (TBL_ID, PKEY_NAME));
+    CREATE TABLE TABLE_PARAMS (TBL_ID INTEGER, PARAM_KEY TEXT, PARAM_VALUE TEXT, PRIMARY KEY (TBL_ID, PARAM_KEY));
+    CREATE INDEX idx_tbls_db ON TBLS (DB_ID, TBL_ID);
+    """)
+    conn.executemany("INSERT INTO DBS VALUES (?, ?)", ((d + 1, f'db{d:03d}') for d in range(HIVE_SCHEMAS)))
+    _insert_hive_tables(conn, range(1, ntables + 1), ncolumns)
+    conn.commit()
+    conn.close()
+
+
+def _insert_hive_tables(conn, table_ids, ncolumns, comment='测试表'):
+    table_ids = list(table_ids)
+    conn.executemany("INSERT INTO TBLS VALUES (?, ?, ?, ?, ?)",
+                     ((t, t % HIVE_SCHEMAS + 1, t, f't{t:07d}', 1700000000 + t) for t in table_ids))
+    conn.executemany("INSERT INTO SDS VALUES (?, ?)", ((t, t) for t in table_ids))
+    conn.executemany("INSERT INTO TABLE_PARAMS VALUES (?, ?, ?)", (
+        row for t in table_ids for row in ((t, 'comment', f'{comment}{t}'), (t, 'transient_lastDdlTime', str(1700000000 + t)))
+    ))
+    conn.executemany("INSERT INTO COLUMNS_V2 VALUES (?, ?, 'string', ?, ?)",
+                     ((t, f'c{c}', f'测试字段{c}', c) for t in table_ids for c in range(ncolumns)))
+    conn.executemany("INSERT INTO PARTITION_KEYS VALUES (?, 'dt', 'string', '分区日期', 0)", ((t,) for t in table_ids))
+
+
+def hive_source_delta(path, ntables, ncolumns):
+    """约1%的表发生变化，修改字段的表同时更新 transient_lastDdlTime，与 Hive 执行 ALTER TABLE 一致"""
+    n = max(1, ntables // 400)
+    conn = sqlite3.connect(path)
+    for t in range(1, n + 1):
+        conn.execute("UPDATE COLUMNS_V2 SET COMMENT = '已修改' WHERE CD_ID = ? AND COLUMN_NAME = 'c1'", (t,))
+    for t in range(n + 1, 2 * n + 1):
+        conn.execute("INSERT INTO COLUMNS_V2 VALUES (?, 'c_new', 'int', '新增字段', ?)", (t, ncolumns))
+    conn.execute("UPDATE TABLE_PARAMS SET PARAM_VALUE = '1800000000' WHERE PARAM_KEY = 'transient_lastDdlTime' AND TBL_ID <= ?", (2 * n,))
+    conn.execute("DELETE FROM TBLS WHERE TBL_ID > ? AND TBL_ID <= ?", (2 * n, 3 * n))
+    _insert_hive_tables(conn, range(ntables + 1, ntables + n + 1), ncolumns, comment='新增表')
+    conn.commit()
+    conn.close()
+
+
+def hive_source_engine(path):
+    from sqlalchemy import create_engine
+    return create_engine(f'sqlite:///{path}', connect_args={'check_same_thread': False})
+
+
+SOURCES = {
+    'mysql': {'db_type': 'MySQL', 'db_name': MYSQL_SCHEMA, 'build': build_mysql_source, 'delta': mysql_source_delta,
+              'engine': mysql_source_engine},
+    'hive': {'db_type': 'Hive', 'db_name': 'metastore', 'build': build_hive_source, 'delta': hive_source_delta,
+             'engine': hive_source_engine},
+}
+
+
+# ---- 单次同步（在子进程中执行） ----
+
+def peak_rss_mb():
+    """进程内存峰值（MB），不支持的平台返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_phase(source, workdir, ntables, ncolumns, phase):
+    """执行一次同步并返回统计结果"""
+    from flask import Flask
+    from sqlalchemy import event
+
+    import migrations
+    import meta_sync
+    from meta_sync import engines, history
+    from models import db, Database, Table, Column, SchemaChange
+
+    spec = SOURCES[source]
+    source_path = os.path.join(workdir, 'source.db')
+    if phase == 'delta':
+        spec['delta'](source_path, ntables, ncolumns)
+
+    # 同步时连接到模拟源库
+    source_engine = spec['engine'](source_path)
+    engines._new_engine = lambda url, **kwargs: source_engine
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'meta.db')}"
+    db.init_app(app)
+
+    counters = {'source_queries': 0, 'meta_queries': 0, 'rows_written': 0}
+
+    def count_source(conn, cursor, statement, parameters, context, executemany):
+        counters['source_queries'] += 1
+
+    def count_meta(conn, cursor, statement, parameters, context, executemany):
+        counters['meta_queries'] += 1
+        if statement.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE') and cursor.rowcount > 0:
+            counters['rows_written'] += cursor.rowcount
+
+    with app.app_context():
+        if phase == 'first':
+            db.create_all()
+            migrations.upgrade(db.engine, log=lambda message: None)
+            db.session.add(Database(db_type=spec['db_type'], db_alias=f'bench-{source}', db_host='127.0.0.1', db_port=3306,
+                                    db_name=spec['db_name'], db_user='bench', db_password='bench'))
+            db.session.commit()
+        database = Database.query.first()
+        change_log = history.ChangeLog(db, SchemaChange, database.id, phase)
+
+        event.listen(source_engine, 'before_cursor_execute', count_source)
+        event.listen(db.engine, 'after_cursor_execute', count_meta)
+        sync = meta_sync.mysql_sync_tables if source == 'mysql' else meta_sync.hive_sync_tables
+        started = time.perf_counter()
+        result = sync(database, db, Table, Column, full=phase == 'full', change_log=change_log)
+        seconds = time.perf_counter() - started
+        event.remove(db.engine, 'after_cursor_execute', count_meta)
+        event.remove(source_engine, 'before_cursor_execute', count_source)
+
+    if not result['success']:
+        raise RuntimeError(result['message'])
+    return dict(seconds=round(seconds, 3), peak_rss_mb=peak_rss_mb(), message=result['message'], **counters)
+
+
+# ---- 汇总 ----
+
+def run_suite(sources, sizes, ncolumns):
+    results = []
+    for source in sources:
+        for ntables in sizes:
+            with tempfile.TemporaryDirectory() as workdir:
+                started = time.perf_counter()
+                SOURCES[source]['build'](os.path.join(workdir, 'source.db'), ntables, ncolumns)
+                print(f"[{source} {ntables}表 x {ncolumns}字段] 生成模拟源库 {time.perf_counter() - started:.1f}s")
+                for phase in PHASES:
+                    # 每次同步在独立子进程中执行，内存峰值互不影响
+                    output = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), '--run-phase', phase, '--sources', source,
+                         '--sizes', str(ntables), '--columns', str(ncolumns), '--workdir', workdir],
+                        check=True, stdout=subprocess.PIPE, text=True,
+                    ).stdout
+                    result = json.loads(output.strip().splitlines()[-1])
+                    result.update(source=source, tables=ntables, columns=ncolumns, phase=phase)
+                    results.append(result)
+                    print(f"  {phase:<6}{result['seconds']:>9.2f}s  源库查询{result['source_queries']:>6}  "
+                          f"元数据库查询{result['meta_queries']:>7}  写入行{result['rows_written']:>9}  "
+                          f"内存峰值{result['peak_rss_mb']}MB  {result['message']}")
+    return results
+
+
+def compare(results, baseline_path):
+    """与上一次的结果对比耗时、查询次数和写入行数"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['source'], r['tables'], r['columns'], r['phase']): r for r in json.load(f)['results']}
+    print(f"\n与 {baseline_path} 对比：")
+    print(f"{'场景':<22}{'耗时(s)':>24}{'查询次数':>16}{'写入行数':>22}{'内存峰值(MB)':>18}")
+    for r in results:
+        old = baseline.get((r['source'], r['tables'], r['columns'], r['phase']))
+        if old is None:
+            continue
+        change = (r['seconds'] - old['seconds']) / max(old['seconds'], 1e-6) * 100
+        name = f"{r['source']} {r['tables']} {r['phase']}"
+        seconds = f"{old['seconds']:.2f} -> {r['seconds']:.2f} ({change:+.0f}%)"
+        queries = f"{old['source_queries'] + old['meta_queries']} -> {r['source_queries'] + r['meta_queries']}"
+        rows = f"{old['rows_written']} -> {r['rows_written']}"
+        rss = f"{old['peak_rss_mb']} -> {r['peak_rss_mb']}"
+        print(f"{name:<24}{seconds:>28}{queries:>20}{rows:>26}{rss:>22}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='同步性能测试（本地模拟源库）')
+    parser.add_argument('--sources', default='mysql,hive', help='源库类型，逗号分隔：mysql、hive')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='表数量，逗号分隔')
+    parser.add_argument('--columns', type=int, default=10, help='每张表的字段数')
+    parser.add_argument('--output', help='结果文件，默认 benchmarks/results/sync_bench_时间.json')
+    parser.add_argument('--compare', help='与上一次的结果文件对比')
+    parser.add_argument('--run-phase', choices=PHASES, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sources = [s.strip() for s in args.sources.split(',') if s.strip()]
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    for source in sources:
+        if source not in SOURCES:
+            parser.error(f'不支持的源库类型: {source}')
+
+    if args.run_phase:
+        # 子进程：执行一次同步，最后一行输出 JSON 结果
+        print(json.dumps(run_phase(sources[0], args.workdir, sizes[0], args.columns, args.run_phase), ensure_ascii=False))
+        return
+
+    results = run_suite(sources, sizes, args.columns)
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"sync_bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'created_at': datetime.now().isoformat(timespec='seconds'), 'columns': args.columns, 'results': results},
+                  f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
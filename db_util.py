@@ -1,5 +1,6 @@
 import yaml
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 import pymysql
 
 # 读取配置文件
@@ -27,3 +28,21 @@ def init_db(app, config, db):
     app.config['SQLALCHEMY_DATABASE_URI'] = generate_db_uri(config)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     db.init_app(app)
+    
+    # SQLite 默认不检查外键，每个连接需要单独开启，删除表时才会级联删除字段
+    if config['database']['type'] == 'sqlite':
+        with app.app_context():
+            event.listen(db.engine, 'connect', _enable_sqlite_foreign_keys)
+
+def _enable_sqlite_foreign_keys(dbapi_conn, connection_record):
+    cursor = dbapi_conn.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+# 根据配置选择表搜索方式：默认按元数据库类型使用对应的全文/模糊索引，search.backend 为 like 时只使用LIKE查询
+def get_search_backend(config, db):
+    import search
+    backend = (config.get('search') or {}).get('backend', 'auto')
+    if backend == 'like':
+        return search.LikeSearch(db)
+    return search.SEARCH_BACKENDS.get(config['database']['type'], search.LikeSearch)(db)
@@ -1,12 +1,20 @@
 import traceback
-from sqlalchemy import create_engine
-from sqlalchemy import text
-from sqlalchemy.engine import URL
+from datetime import datetime
+from fnmatch import fnmatchcase
+
+from sqlalchemy import select, text, bindparam
+
+from .engines import ENGINE_OPTIONS, get_engine, get_sync_engine, get_temporary_engine
+from .parallel import DONE, iter_parallel
+from .reconcile import (IN_CHUNK_SIZE, reconcile_tables, delete_missing_tables, load_existing_tables, load_sync_markers,
+                        unchanged_table_keys, make_sync_marker, merge_stats, new_stats)
 
 
 def test_database_connection(db_type, db_host, db_port, db_name, db_user, db_password):
     """
     测试数据库连接
+    始终使用用完即释放的临时engine（连接超时5秒），不占用同步使用的连接池缓存：
+    测试的是表单中的连接信息，可能与已保存的不同，也不应等待同步的连接超时
     """
     try:
         # 验证基本数据
@@ -26,11 +34,14 @@ def test_database_connection(db_type, db_host, db_port, db_name, db_user, db_pas
             return {'success': False, 'message': f'连接失败：不支持的数据库类型 {db_type}'}
         
         # 尝试连接数据库
-        engine = create_engine(connection_string, connect_args={'connect_timeout': 5})
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))  # 使用text函数转换SQL字符串
-            # 如果连接成功，返回成功消息
-            return {'success': True, 'message': '连接成功。'}
+        engine = get_temporary_engine(connection_string, connect_timeout=5)
+        try:
+            with engine.connect() as conn:
+                result = conn.execute(text("SELECT 1"))  # 使用text函数转换SQL字符串
+                # 如果连接成功，返回成功消息
+                return {'success': True, 'message': '连接成功。'}
+        finally:
+            engine.dispose()
             
     except Exception as e:
         # 如果连接失败，返回错误消息
@@ -54,117 +65,131 @@ def test_database_connection(db_type, db_host, db_port, db_name, db_user, db_pas
         return {'success': False, 'message': friendly_msg}
 
 
-def mysql_sync_tables(dbCfg, db, Table, Column):
+# 增量同步时，变化的表少于该比例才按表名分批拉取字段，否则整库拉取一次更划算
+PARTIAL_FETCH_RATIO = 0.5
+
+
+def _no_progress(phase, **counters):
+    """未传入进度回调时使用的空回调"""
+
+
+def _sync_message(stats):
+    """根据同步统计生成返回消息"""
+    message = f"同步完成！新增表{stats['new_tables']}张，更新表{stats['updated_tables']}张，处理字段{stats['total_columns']}个"
+    if stats.get('deleted_tables'):
+        message += f"，删除表{stats['deleted_tables']}张"
+    if stats['skipped_tables']:
+        message += f"，跳过未变化表{stats['skipped_tables']}张"
+    if stats.get('resumed'):
+        message += "（从上次中断处继续）"
+    return message
+
+
+def fetch_mysql_columns(conn, db_name, table_names=None):
+    """
+    一次查询获取MySQL库中所有表的字段信息，流式读取并按表名分组
+    指定 table_names 时只按表名分批获取这些表的字段
+    返回 {table_name: [{'column_name': .., 'column_type': .., ...}, ...]}
+    """
+    columns_sql = "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, CASE WHEN COLUMN_KEY = 'PRI' THEN 1 ELSE 0 END AS IS_PRIMARY, CASE WHEN COLUMN_KEY = 'UNI' THEN 1 ELSE 0 END AS IS_UNIQUE, COLUMN_COMMENT, ORDINAL_POSITION FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = :db_name {table_filter} ORDER BY TABLE_NAME, ORDINAL_POSITION"
+
+    if table_names is None:
+        batches = [(text(columns_sql.format(table_filter='')), {'db_name': db_name})]
+    else:
+        columns_query = text(columns_sql.format(table_filter='AND TABLE_NAME IN :table_names')).bindparams(bindparam('table_names', expanding=True))
+        table_names = list(table_names)
+        batches = [
+            (columns_query, {'db_name': db_name, 'table_names': table_names[i:i + IN_CHUNK_SIZE]})
+            for i in range(0, len(table_names), IN_CHUNK_SIZE)
+        ]
+
+    columns_by_table = {}
+    for columns_query, params in batches:
+        # 使用服务端游标流式读取，避免一次性把整个结果集加载到客户端
+        columns_result = conn.execution_options(stream_results=True).execute(columns_query, params)
+        for table_name, column_name, column_type, is_primary, is_unique, column_comment, ordinal_position in columns_result:
+            columns_by_table.setdefault(table_name, []).append({
+                'column_name': column_name,
+                'column_type': column_type,
+                'is_primary': bool(is_primary),
+                'is_unique': bool(is_unique),
+                'column_comment': column_comment,
+                'ordinal_position': ordinal_position,
+            })
+    return columns_by_table
+
+
+def mysql_sync_tables(dbCfg, db, Table, Column, full=False, progress=None, change_log=None):
     """
     同步MySQL数据库的元数据
+    full 为 False 时增量同步：建表时间和字段校验和都未变化的表跳过字段的获取和写入
+    progress 为进度回调 progress(phase, **counters)，用于上报执行阶段和已处理的表数/字段数
+    change_log 为 history.ChangeLog，记录表和字段的新增、删除和修改；源库已不存在的表同步后删除
     """
+    progress = progress or _no_progress
     try:
-        # 创建连接字符串
-        connection_url = URL.create(
-            drivername= "mysql+pymysql",
-            username=dbCfg.db_user, password=dbCfg.db_password,
-            host=dbCfg.db_host, port=dbCfg.db_port,
-            database=dbCfg.db_name
-        )
-        
-        # 连接到information_schema
-        engine = create_engine(connection_url, connect_args={'connect_timeout': 10})
+        # 从连接池注册表获取engine，复用已建立的连接
+        engine = get_sync_engine(dbCfg)
         
         # 查询该数据库的所有表信息
         with engine.connect() as conn:
             # 获取表信息
-            tables_query = text("SELECT TABLE_NAME, TABLE_COMMENT, CREATE_TIME, UPDATE_TIME FROM information_schema.TABLES WHERE TABLE_SCHEMA = :db_name ORDER BY TABLE_NAME")
+            progress('fetch_tables')
+            # 同时按表汇总字段数和字段校验和，作为增量同步的变更标记（不使用UPDATE_TIME，数据写入也会改变它）
+            tables_query = text("""
+            SELECT t.TABLE_NAME, t.TABLE_COMMENT, t.CREATE_TIME, t.UPDATE_TIME, c.COLUMN_COUNT, c.COLUMN_CHECKSUM
+            FROM information_schema.TABLES t
+            LEFT JOIN (
+                SELECT TABLE_NAME, COUNT(*) AS COLUMN_COUNT, SUM(CRC32(CONCAT_WS('|', COLUMN_NAME, COLUMN_TYPE, COLUMN_KEY, COLUMN_COMMENT, ORDINAL_POSITION))) AS COLUMN_CHECKSUM
+                FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = :db_name
+                GROUP BY TABLE_NAME
+            ) c ON c.TABLE_NAME = t.TABLE_NAME
+            WHERE t.TABLE_SCHEMA = :db_name
+            ORDER BY t.TABLE_NAME
+            """)
             tables_result = conn.execute(tables_query, {'db_name': dbCfg.db_name})
-            tables_data = tables_result.fetchall()
-            
-            # 统计同步结果
-            new_tables = 0
-            updated_tables = 0
-            total_columns = 0
-            
-            # 处理每张表
-            for table_row in tables_data:
-                table_name, table_comment, create_time, update_time = table_row # 提取表信息
-                
-                # 查找或创建表记录
-                existing_table = Table.query.filter_by(db_id=dbCfg.id, table_name=table_name).first()
-                
-                if existing_table:
-                    # 更新现有表
-                    existing_table.schema_name = dbCfg.db_name
-                    existing_table.table_comment = table_comment
-                    existing_table.create_time = create_time
-                    existing_table.update_time = update_time
-                    updated_tables += 1
-                    current_table = existing_table
-                else:
-                    # 创建新表
-                    new_table = Table(
-                        db_id=dbCfg.id,
-                        schema_name = dbCfg.db_name, # MySQL不细分schema
-                        table_name=table_name,
-                        table_comment=table_comment,
-                        create_time=create_time,
-                        update_time=update_time
-                    )
-                    db.session.add(new_table)
-                    db.session.flush()  # 获取新表的ID
-                    new_tables += 1
-                    current_table = new_table
-                
-                # 查询表的字段信息
-                columns_query = text("SELECT COLUMN_NAME, COLUMN_TYPE, CASE WHEN COLUMN_KEY = 'PRI' THEN 1 ELSE 0 END AS IS_PRIMARY, CASE WHEN COLUMN_KEY = 'UNI' THEN 1 ELSE 0 END AS IS_UNIQUE, COLUMN_COMMENT, ORDINAL_POSITION FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = :db_name AND TABLE_NAME = :table_name ORDER BY ORDINAL_POSITION")
-                columns_result = conn.execute(columns_query, {'db_name': dbCfg.db_name, 'table_name': table_name})
-                columns_data = columns_result.fetchall()
-                
-                # 获取现有字段列表
-                existing_columns = Column.query.filter_by(table_id=current_table.id).all()
-                existing_column_names = {col.column_name for col in existing_columns}
-                
-                # 处理每个字段
-                for col_row in columns_data:
-                    column_name, column_type, is_primary, is_unique, column_comment, ordinal_position = col_row # 提取列信息
-                    
-                    # 查找或创建字段记录
-                    existing_column = Column.query.filter_by(table_id=current_table.id, column_name=column_name).first()
-                    
-                    if existing_column:
-                        # 更新现有字段
-                        existing_column.column_type = column_type
-                        existing_column.is_primary = bool(is_primary)
-                        existing_column.is_unique = bool(is_unique)
-                        existing_column.column_comment = column_comment
-                        existing_column.ordinal_position = ordinal_position
-                    else:
-                        # 创建新字段
-                        new_column = Column(
-                            table_id=current_table.id,
-                            column_name=column_name,
-                            column_type=column_type,
-                            is_primary=bool(is_primary),
-                            is_unique=bool(is_unique),
-                            column_comment=column_comment,
-                            ordinal_position=ordinal_position
-                        )
-                        db.session.add(new_column)
-                    
-                    # 从现有字段集合中移除已处理的字段
-                    if column_name in existing_column_names:
-                        existing_column_names.remove(column_name)
-                    
-                    total_columns += 1
-                
-                # 删除不再存在的字段
-                for col_name in existing_column_names:
-                    column_to_delete = Column.query.filter_by(table_id=current_table.id, column_name=col_name).first()
-                    if column_to_delete:
-                        db.session.delete(column_to_delete)
-            
-            # 提交所有更改
-            db.session.commit()
-            
-            # 返回成功消息
-            return {'success': True, 'message': f'同步完成！新增表{new_tables}张，更新表{updated_tables}张，处理字段{total_columns}个'}
+            tables = [
+                {
+                    'schema_name': dbCfg.db_name, # MySQL不细分schema
+                    'table_name': table_name,
+                    'table_comment': table_comment,
+                    'create_time': create_time,
+                    'update_time': update_time,
+                    'sync_marker': make_sync_marker(create_time, column_count, column_checksum),
+                }
+                for table_name, table_comment, create_time, update_time, column_count, column_checksum in tables_result
+            ]
+
+            # 增量同步时找出变更标记未变化的表
+            existing_tables = load_existing_tables(db, Table, dbCfg.id)
+            skip_keys = set() if full else unchanged_table_keys(existing_tables, tables)
+            changed_names = [t['table_name'] for t in tables if (t['schema_name'], t['table_name']) not in skip_keys]
+            progress('fetch_columns', tables_total=len(tables), tables_done=len(tables) - len(changed_names))
+
+            # 一次性获取整个库的字段信息，按表名分组，避免每张表单独查询一次information_schema.COLUMNS
+            # 增量同步且变化的表较少时，只按表名分批获取变化表的字段
+            if not changed_names:
+                columns_by_table = {}
+            elif len(changed_names) < len(tables) * PARTIAL_FETCH_RATIO:
+                columns_by_table = fetch_mysql_columns(conn, dbCfg.db_name, changed_names)
+            else:
+                columns_by_table = fetch_mysql_columns(conn, dbCfg.db_name)
+            columns_by_key = {(dbCfg.db_name, name): cols for name, cols in columns_by_table.items()}
+
+        # 与已存储的元数据比对后批量写入
+        progress('write', tables_done=len(tables), columns_done=sum(len(cols) for cols in columns_by_key.values()))
+        stats = reconcile_tables(db, Table, Column, dbCfg.id, tables, columns_by_key, existing_tables, skip_keys,
+                                 change_log=change_log)
+        stats['deleted_tables'] = delete_missing_tables(db, Table, Column, dbCfg.id,
+                                                        {(t['schema_name'], t['table_name']) for t in tables},
+                                                        change_log=change_log)
+
+        # 提交所有更改
+        db.session.commit()
+
+        # 返回成功消息
+        return {'success': True, 'message': _sync_message(stats), 'stats': stats}
             
     except Exception as e:
         # 回滚事务
@@ -179,162 +204,228 @@ def mysql_sync_tables(dbCfg, db, Table, Column):
         return {'success': False, 'message': f'同步失败：{error_msg}'}
 
 
-def postgres_sync_tables(dbCfg, db, Table, Column):
+def _sync_schemas(db, Table, Column, db_id, engine, schemas, fetch_schemas, full=False, progress=_no_progress,
+                  checkpoint=None, parallelism=None, tables_total=0, group_size=1, change_log=None, source_schemas=None):
+    """
+    按模式并行拉取、单线程写入
+    - 模式按 group_size 个一组，每组在线程池中使用连接池里的独立连接拉取：fetch_schemas(conn, schema_names, markers, emit)
+      markers 为这些模式下已存储表的变更标记（全量同步时为空），按批 emit((tables, columns_by_key, skip_keys))
+    - 主线程逐批比对、写入并提交，数据库会话只在主线程中使用
+    - 每组模式全部写入后删除这些模式下源库已不存在的表，并记入断点，同步中途失败时，下次同一模式的同步跳过已完成的模式
+    - source_schemas 为源库现有的全部模式（含未同步的），全部完成后删除已不在源库中的模式下的表
+    返回同步统计信息
+    """
+    mode = 'full' if full else 'incremental'
+    parallelism = parallelism or ENGINE_OPTIONS['schema_parallelism']
+    resume = checkpoint.load() if checkpoint else None
+    if resume and (resume.get('mode') != mode or 'schemas_done' not in resume):
+        # 上次中断的同步模式不同，不能衔接，重新开始
+        resume = None
+    schemas_done = list(resume['schemas_done']) if resume else []
+    stats = dict(resume['stats']) if resume else new_stats()
+    pending = [schema for schema in schemas if schema not in set(schemas_done)]
+    groups = [tuple(pending[i:i + group_size]) for i in range(0, len(pending), max(1, group_size))]
+    if resume:
+        print(f"[SYNC LOG] 数据库 {db_id} 从断点继续同步，跳过已完成的 {len(schemas_done)} 个模式")
+
+    # 拉取线程不能使用会话，通过独立连接读取变更标记
+    store_engine = db.engine
+
+    def fetch(schema_names, emit):
+        markers = {}
+        if not full:
+            with store_engine.connect() as store_conn:
+                markers = load_sync_markers(store_conn, Table, db_id, schema_names)
+        with engine.connect() as conn:
+            fetch_schemas(conn, schema_names, markers, emit)
+
+    schema_stats = {}
+    schema_seen = {}
+    tables_done = stats['total_tables']
+    columns_done = 0
+    progress('fetch_columns', tables_total=tables_total, tables_done=tables_done)
+    for group, item in iter_parallel(groups, fetch, parallelism, queue_size=parallelism * 2):
+        if item is DONE:
+            # 一组模式全部写入后删除已不存在的表，计入统计并记录断点
+            group_stats = schema_stats.pop(group, new_stats())
+            group_stats['deleted_tables'] = delete_missing_tables(db, Table, Column, db_id, schema_seen.pop(group, set()),
+                                                                  list(group), change_log)
+            stats = merge_stats(stats, group_stats)
+            schemas_done.extend(group)
+            if checkpoint:
+                checkpoint.save({'mode': mode, 'schemas_done': schemas_done, 'stats': stats})
+            db.session.commit()
+            continue
+
+        # 与已存储的元数据比对后批量写入（按模式名+表名匹配，避免不同库的同名表互相覆盖）
+        tables, columns_by_key, skip_keys = item
+        progress('write', tables_done=tables_done, columns_done=columns_done)
+        existing_tables = load_existing_tables(db, Table, db_id, [(t['schema_name'], t['table_name']) for t in tables])
+        batch_stats = reconcile_tables(db, Table, Column, db_id, tables, columns_by_key, existing_tables, skip_keys, partial=True,
+                                       change_log=change_log)
+        schema_stats[group] = merge_stats(schema_stats.get(group), batch_stats)
+        schema_seen.setdefault(group, set()).update((t['schema_name'], t['table_name']) for t in tables)
+
+        # 逐批提交后清空会话，释放本批数据占用的内存
+        db.session.commit()
+        db.session.expunge_all()
+        tables_done += len(tables)
+        columns_done += sum(len(columns) for columns in columns_by_key.values())
+        progress('fetch_columns', tables_done=tables_done, columns_done=columns_done)
+
+    if source_schemas is not None:
+        # 源库中已删除的模式，其下的表全部删除
+        stored_schemas = db.session.execute(select(Table.schema_name).where(Table.db_id == db_id).distinct()).scalars().all()
+        dropped_schemas = [name for name in stored_schemas if name not in set(source_schemas)]
+        if dropped_schemas:
+            stats['deleted_tables'] = stats.get('deleted_tables', 0) + delete_missing_tables(
+                db, Table, Column, db_id, set(), dropped_schemas, change_log)
+            db.session.commit()
+
+    if resume:
+        stats['resumed'] = 1
+    return stats
+
+
+# PostgreSQL 系统模式，不参与同步
+POSTGRES_SYSTEM_SCHEMAS = ('pg_catalog', 'information_schema', 'pg_toast')
+
+# 变更标记版本，字段信息的获取方式或格式变化时递增，使已同步的表在下次增量同步时重新获取字段
+# 2: 字段类型改为 format_type 格式（如 character varying(255)）
+POSTGRES_MARKER_VERSION = 2
+
+
+def _match_schemas(schema_names, include=None, exclude=None):
+    """按通配符（如 'ods_*'）筛选模式：匹配 include 中任一规则且不匹配 exclude 中任何规则"""
+    include = include or ['*']
+    exclude = exclude or []
+    return [
+        name for name in schema_names
+        if any(fnmatchcase(name, pattern) for pattern in include)
+        and not any(fnmatchcase(name, pattern) for pattern in exclude)
+    ]
+
+
+def postgres_sync_tables(dbCfg, db, Table, Column, full=False, progress=None, checkpoint=None, batch_size=1000,
+                         parallelism=None, include_schemas=None, exclude_schemas=None, change_log=None):
     """
     同步 PostgreSQL 数据库的元数据
+    同步除系统模式外的全部模式，include_schemas / exclude_schemas 为模式名通配符规则
+    full 为 False 时增量同步：由系统表计算的字段/索引校验和未变化的表跳过字段的获取和写入
+    progress 为进度回调 progress(phase, **counters)，用于上报执行阶段和已处理的表数/字段数
+    模式分组后在线程池中并行拉取（并行度 parallelism），每组一次查询获取表信息，每 batch_size 张表一次查询获取字段，
+    均直接查询 pg_catalog；每批写入并提交一次，checkpoint 记录已完成的模式
+    change_log 为 history.ChangeLog，记录表结构变更；源库已不存在的表（含已删除的模式下的表）同步后删除
     """
+    progress = progress or _no_progress
+    # 每批提交后会清空会话，dbCfg 随之脱离会话，提前取出需要的属性
+    db_id = dbCfg.id
     try:
-        # 创建连接字符串
-        connection_url = URL.create(
-            drivername= "postgresql",
-            username=dbCfg.db_user, password=dbCfg.db_password,
-            host=dbCfg.db_host, port=dbCfg.db_port,
-            database=dbCfg.db_name
+        # 从连接池注册表获取engine，复用已建立的连接
+        engine = get_sync_engine(dbCfg)
+        
+        # 获取表信息（普通表和分区表）.PG不记录表创建时间
+        # 按表汇总 pg_attribute 和 pg_index 计算字段/索引校验和，作为增量同步的变更标记
+        tables_query = text("""
+        WITH tbl AS (
+            SELECT c.oid, n.nspname, c.relname
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = ANY(CAST(:schemas AS name[])) AND c.relkind IN ('r', 'p')
+        ), col AS (
+            SELECT a.attrelid, md5(string_agg(a.attname || ':' || format_type(a.atttypid, a.atttypmod) || ':' || coalesce(col_description(a.attrelid, a.attnum), ''), ',' ORDER BY a.attnum)) AS column_checksum
+            FROM pg_attribute a
+            JOIN tbl ON tbl.oid = a.attrelid
+            WHERE a.attnum > 0 AND NOT a.attisdropped
+            GROUP BY a.attrelid
+        ), idx AS (
+            SELECT i.indrelid, md5(string_agg(i.indkey::text || ':' || i.indisprimary::text || ':' || i.indisunique::text, ',' ORDER BY i.indkey::text)) AS index_checksum
+            FROM pg_index i
+            JOIN tbl ON tbl.oid = i.indrelid
+            GROUP BY i.indrelid
         )
+        SELECT tbl.oid, tbl.nspname AS schema_name, tbl.relname AS table_name, obj_description(tbl.oid, 'pg_class') AS table_comment
+            , col.column_checksum, idx.index_checksum
+        FROM tbl
+        LEFT JOIN col ON col.attrelid = tbl.oid
+        LEFT JOIN idx ON idx.indrelid = tbl.oid
+        ORDER BY tbl.nspname, tbl.relname
+        """)
         
-        # 连接到information_schema
-        engine = create_engine(connection_url, connect_args={'connect_timeout': 10})
+        # 按表OID批量获取字段信息，主键/唯一索引标识由 pg_index 按 attrelid 关联汇总
+        columns_query = text("""
+        SELECT a.attrelid
+            , a.attname AS column_name
+            , format_type(a.atttypid, a.atttypmod) AS column_type
+            , coalesce(bool_or(i.indisprimary), false) AS is_primary
+            , coalesce(bool_or(i.indisunique AND NOT i.indisprimary AND i.indnatts = 1), false) AS is_unique
+            , col_description(a.attrelid, a.attnum) AS column_comment
+            , a.attnum AS ordinal_position
+        FROM pg_attribute a
+        LEFT JOIN pg_index i ON i.indrelid = a.attrelid AND a.attnum = ANY(i.indkey)
+        WHERE a.attrelid = ANY(CAST(:oids AS oid[])) AND a.attnum > 0 AND NOT a.attisdropped
+        GROUP BY a.attrelid, a.attname, a.atttypid, a.atttypmod, a.attnum
+        ORDER BY a.attrelid, a.attnum
+        """)
         
-        # 查询该数据库的所有表信息.PG不记录表创建时间
+        def fetch_schemas(conn, schema_names, markers, emit):
+            rows = conn.execute(tables_query, {'schemas': list(schema_names)}).fetchall()
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                tables = [
+                    {
+                        'schema_name': schema_name,
+                        'table_name': table_name,
+                        'table_comment': table_comment,
+                        'sync_marker': make_sync_marker(POSTGRES_MARKER_VERSION, column_checksum, index_checksum),
+                    }
+                    for oid, schema_name, table_name, table_comment, column_checksum, index_checksum in batch
+                ]
+                # 增量同步时找出变更标记未变化的表，只获取其余表的字段
+                skip_keys = unchanged_table_keys(markers, tables)
+                keys_by_oid = {
+                    oid: (schema_name, table_name)
+                    for oid, schema_name, table_name, table_comment, column_checksum, index_checksum in batch
+                    if (schema_name, table_name) not in skip_keys
+                }
+                columns_by_key = {key: [] for key in keys_by_oid.values()}
+                if keys_by_oid:
+                    columns_result = conn.execute(columns_query, {'oids': list(keys_by_oid)})
+                    for oid, column_name, column_type, is_primary, is_unique, column_comment, ordinal_position in columns_result:
+                        columns_by_key[keys_by_oid[oid]].append({
+                            'column_name': column_name,
+                            'column_type': column_type,
+                            'is_primary': bool(is_primary),
+                            'is_unique': bool(is_unique),
+                            'column_comment': column_comment,
+                            'ordinal_position': ordinal_position,
+                        })
+                emit((tables, columns_by_key, skip_keys))
+        
+        # 获取需要同步的模式和表总数
+        progress('fetch_tables')
         with engine.connect() as conn:
-            # 获取表信息
-            tables_query = text("""
-            SELECT t.table_schema as schema_name, t.table_name, obj_description(c.oid, 'pg_class') AS table_comment, null as create_time, null as update_time
-            FROM information_schema.tables t
-            JOIN pg_class c ON c.relname = t.table_name
-            JOIN pg_namespace n ON n.oid = c.relnamespace
-            WHERE t.table_schema = :db_name
-                AND t.table_type = 'BASE TABLE'
-                AND n.nspname = t.table_schema
-            ORDER BY t.table_name
-            """)
-            tables_result = conn.execute(tables_query, {'db_name': 'public'}) # pg 的schema都设置成 public
-            tables_data = tables_result.fetchall()
-            
-            # 统计同步结果
-            new_tables = 0
-            updated_tables = 0
-            total_columns = 0
-            
-            # 处理每张表
-            for table_row in tables_data:
-                schema_name, table_name, table_comment, create_time, update_time = table_row # 提取表信息
-                
-                # 查找或创建表记录
-                existing_table = Table.query.filter_by(db_id=dbCfg.id, table_name=table_name).first()
-                
-                if existing_table:
-                    # 更新现有表
-                    existing_table.schema_name = schema_name
-                    existing_table.table_comment = table_comment
-                    existing_table.update_time = update_time
-                    updated_tables += 1
-                    current_table = existing_table
-                else:
-                    # 创建新表
-                    new_table = Table(
-                        db_id=dbCfg.id,
-                        schema_name=schema_name,
-                        table_name=table_name,
-                        table_comment=table_comment,
-                        create_time=create_time,
-                        update_time=update_time
-                    )
-                    db.session.add(new_table)
-                    db.session.flush()  # 获取新表的ID
-                    new_tables += 1
-                    current_table = new_table
-                
-                # 查询表的字段信息
-                columns_query = text("""
-                SELECT c.column_name,
-                    c.udt_name ||
-                        CASE
-                            WHEN c.character_maximum_length IS NOT NULL THEN '(' || c.character_maximum_length || ')'
-                            WHEN c.numeric_precision IS NOT NULL AND c.numeric_scale IS NOT NULL THEN '(' || c.numeric_precision || ',' || c.numeric_scale || ')'
-                            WHEN c.datetime_precision IS NOT NULL THEN '(' || c.datetime_precision || ')'
-                            ELSE ''
-                        END AS column_type,
-                    CASE WHEN pk_columns.column_name IS NOT NULL THEN 1 ELSE 0 END AS is_primary,
-                    CASE WHEN uq_columns.column_name IS NOT NULL THEN 1 ELSE 0 END AS is_unique,
-                    col_description(cls.oid, c.ordinal_position::int) AS column_comment,
-                    c.ordinal_position
-                FROM information_schema.columns c
-                JOIN pg_class cls ON cls.relname = c.table_name
-                JOIN pg_namespace ns ON ns.oid = cls.relnamespace AND ns.nspname = c.table_schema
-                LEFT JOIN (
-                    SELECT a.attname AS column_name
-                    FROM pg_index i
-                    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-                    JOIN pg_class tbl ON tbl.oid = i.indrelid
-                    JOIN pg_namespace nsp ON nsp.oid = tbl.relnamespace
-                    WHERE i.indisprimary AND nsp.nspname = :schema_name AND tbl.relname = :table_name
-                ) pk_columns ON pk_columns.column_name = c.column_name
-                LEFT JOIN (
-                    SELECT a.attname AS column_name
-                    FROM pg_index i
-                    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
-                    JOIN pg_class tbl ON tbl.oid = i.indrelid
-                    JOIN pg_namespace nsp ON nsp.oid = tbl.relnamespace
-                    WHERE i.indisunique AND NOT i.indisprimary AND array_length(i.indkey, 1) = 1 AND nsp.nspname = :schema_name AND tbl.relname = :table_name
-                ) uq_columns ON uq_columns.column_name = c.column_name
-                WHERE c.table_schema = :schema_name AND c.table_name = :table_name
-                ORDER BY c.ordinal_position
-                """)
-                columns_result = conn.execute(columns_query, {'schema_name': schema_name, 'table_name': table_name})
-                columns_data = columns_result.fetchall()
-                
-                # 获取现有字段列表
-                existing_columns = Column.query.filter_by(table_id=current_table.id).all()
-                existing_column_names = {col.column_name for col in existing_columns}
-                
-                # 处理每个字段
-                for col_row in columns_data:
-                    column_name, column_type, is_primary, is_unique, column_comment, ordinal_position = col_row # 提取列信息
-                    
-                    # 查找或创建字段记录
-                    existing_column = Column.query.filter_by(table_id=current_table.id, column_name=column_name).first()
-                    
-                    if existing_column:
-                        # 更新现有字段
-                        existing_column.column_type = column_type
-                        existing_column.is_primary = bool(is_primary)
-                        existing_column.is_unique = bool(is_unique)
-                        existing_column.column_comment = column_comment
-                        existing_column.ordinal_position = ordinal_position
-                    else:
-                        # 创建新字段
-                        new_column = Column(
-                            table_id=current_table.id,
-                            column_name=column_name,
-                            column_type=column_type,
-                            is_primary=bool(is_primary),
-                            is_unique=bool(is_unique),
-                            column_comment=column_comment,
-                            ordinal_position=ordinal_position
-                        )
-                        db.session.add(new_column)
-                    
-                    # 从现有字段集合中移除已处理的字段
-                    if column_name in existing_column_names:
-                        existing_column_names.remove(column_name)
-                    
-                    total_columns += 1
-                
-                # 删除不再存在的字段
-                for col_name in existing_column_names:
-                    column_to_delete = Column.query.filter_by(table_id=current_table.id, column_name=col_name).first()
-                    if column_to_delete:
-                        db.session.delete(column_to_delete)
-            
-            # 提交所有更改
-            db.session.commit()
-            
-            # 返回成功消息
-            return {'success': True, 'message': f'同步完成！新增表{new_tables}张，更新表{updated_tables}张，处理字段{total_columns}个'}
+            schema_names = [name for name, in conn.execute(text("""
+            SELECT nspname FROM pg_namespace
+            WHERE NOT (nspname = ANY(CAST(:system_schemas AS name[]))) AND nspname NOT LIKE 'pg\\_temp\\_%' AND nspname NOT LIKE 'pg\\_toast\\_temp\\_%'
+            ORDER BY nspname
+            """), {'system_schemas': list(POSTGRES_SYSTEM_SCHEMAS)})]
+            schemas = _match_schemas(schema_names, include_schemas, exclude_schemas)
+            tables_total = conn.execute(text("""
+            SELECT count(*) FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = ANY(CAST(:schemas AS name[])) AND c.relkind IN ('r', 'p')
+            """), {'schemas': schemas}).scalar()
+        
+        # 模式较多时分组拉取，减少查询次数，同时保证每个线程有多组可以领取，避免个别大模式拖慢整体
+        group_size = max(1, len(schemas) // (max(1, parallelism or ENGINE_OPTIONS['schema_parallelism']) * 4))
+        stats = _sync_schemas(db, Table, Column, db_id, engine, schemas, fetch_schemas, full, progress, checkpoint,
+                              parallelism, tables_total, group_size, change_log, source_schemas=schema_names)
+
+        # 返回成功消息
+        return {'success': True, 'message': _sync_message(stats), 'stats': stats}
             
     except Exception as e:
-        # 回滚事务
+        # 回滚事务，已提交的批次保留，下次同步从未完成的模式继续
         db.session.rollback()
         
         # 记录错误信息
@@ -346,149 +437,152 @@ def postgres_sync_tables(dbCfg, db, Table, Column):
         return {'success': False, 'message': f'同步失败：{error_msg}'}
 
 
-def hive_sync_tables(dbCfg, db, Table, Column):
+# 变更标记版本，字段信息的获取方式或格式变化时递增，使已同步的表在下次增量同步时重新获取字段
+# 2: 记录分区字段标识和分区字段注释
+HIVE_MARKER_VERSION = 2
+
+# 分区字段排在普通字段之后
+HIVE_PARTITION_POSITION_BASE = 990
+
+
+def _fetch_hive_columns(conn, columns_query, partition_keys_query, schema_name, rows):
+    """
+    批量获取一页表的字段：普通字段按去重后的CD_ID分批查询，分区字段按TBL_ID范围查询，再在内存中按表组装
+    rows 为表信息查询结果 (table_id, table_name, ..., cd_id)
+    返回 {(schema_name, table_name): [{'column_name': .., 'is_partition': .., ...}, ...]}
+    """
+    columns_by_cd = {}
+    cd_ids = sorted({row[-1] for row in rows if row[-1] is not None})
+    for start in range(0, len(cd_ids), IN_CHUNK_SIZE):
+        result = conn.execute(columns_query, {'cd_ids': cd_ids[start:start + IN_CHUNK_SIZE]})
+        for cd_id, column_name, type_name, comment, integer_idx in result:
+            columns_by_cd.setdefault(cd_id, []).append({
+                'column_name': column_name,
+                'column_type': type_name,
+                'is_partition': False,
+                'column_comment': comment,
+                'ordinal_position': integer_idx,
+            })
+
+    table_ids = {row[0] for row in rows}
+    partition_keys = {}
+    result = conn.execute(partition_keys_query, {
+        'min_id': min(table_ids), 'max_id': max(table_ids), 'schema_name': schema_name
+    })
+    for tbl_id, pkey_name, pkey_type, pkey_comment, integer_idx in result:
+        if tbl_id in table_ids:
+            partition_keys.setdefault(tbl_id, []).append({
+                'column_name': pkey_name,
+                'column_type': pkey_type,
+                'is_partition': True,
+                'column_comment': pkey_comment,
+                'ordinal_position': HIVE_PARTITION_POSITION_BASE + integer_idx,
+            })
+
+    columns_by_key = {}
+    for row in rows:
+        table_id, table_name, cd_id = row[0], row[1], row[-1]
+        # 共用CD_ID的表各自复制一份字段，避免后续处理时互相影响
+        columns = [dict(column) for column in columns_by_cd.get(cd_id, [])] + partition_keys.get(table_id, [])
+        columns.sort(key=lambda column: column['ordinal_position'])
+        columns_by_key[(schema_name, table_name)] = columns
+    return columns_by_key
+
+
+def hive_sync_tables(dbCfg, db, Table, Column, full=False, progress=None, checkpoint=None, batch_size=1000, parallelism=None,
+                     change_log=None):
     """
     同步 数仓hivemetastore 的元数据
+    full 为 False 时增量同步：CREATE_TIME 和 transient_lastDdlTime 都未变化的表跳过字段的获取和写入
+    progress 为进度回调 progress(phase, **counters)，用于上报执行阶段和已处理的表数/字段数
+    按库（DBS.NAME）在线程池中并行拉取（并行度 parallelism），库内按TBL_ID分页读取，每页的字段和分区字段各用批量查询获取，
+    每 batch_size 张表写入并提交一次，
+    内存占用不随元数据库的表数增长；checkpoint 记录已完成的库，同步中途失败时下次从未完成的库继续
+    change_log 为 history.ChangeLog，记录表结构变更；源库已不存在的表（含已删除的库下的表）同步后删除
     """
+    progress = progress or _no_progress
+    # 每批提交后会清空会话，dbCfg 随之脱离会话，提前取出需要的属性
+    db_id = dbCfg.id
     try:
-        # 创建连接字符串
-        connection_url = URL.create(
-            drivername= "mysql+pymysql",
-            username=dbCfg.db_user, password=dbCfg.db_password,
-            host=dbCfg.db_host, port=dbCfg.db_port,
-            database=dbCfg.db_name
-        )
+        # 从连接池注册表获取engine，复用已建立的连接
+        engine = get_sync_engine(dbCfg)
         
-        # 连接到information_schema
-        engine = create_engine(connection_url, connect_args={'connect_timeout': 10})
+        # 获取表信息，按TBL_ID分页读取（TBLS的DB_ID索引按TBL_ID有序），每页一个短查询，不长时间占用服务端游标
+        tables_query = text("""
+        SELECT t.TBL_ID table_id
+            , t.TBL_NAME AS table_name
+            , c.param_value as table_comment
+            , t.create_time as create_ts
+            , p.param_value as last_ddl_time
+            , s.CD_ID as cd_id
+        FROM TBLS t
+        JOIN  DBS d ON t.DB_ID = d.DB_ID
+        left join SDS s on t.SD_ID = s.SD_ID
+        left join table_params c on t.tbl_id=c.tbl_id and c.param_key='comment'
+        left join table_params p on t.tbl_id=p.tbl_id and p.param_key='transient_lastDdlTime'
+        WHERE d.NAME = :schema_name AND t.TBL_ID > :after_id
+        ORDER BY t.TBL_ID
+        LIMIT :batch_size
+        """)
         
-        # 查询该数据库的所有表信息
+        # 普通字段按字段描述符（CD_ID）批量获取，多张表共用同一个CD_ID时只查询一次
+        columns_query = text("""
+        SELECT c.CD_ID, c.COLUMN_NAME, c.TYPE_NAME, c.COMMENT, c.INTEGER_IDX
+        FROM COLUMNS_V2 c
+        WHERE c.CD_ID IN :cd_ids
+        """).bindparams(bindparam('cd_ids', expanding=True))
+        
+        # 分区字段按本页的TBL_ID范围批量获取（PARTITION_KEYS主键以TBL_ID开头）
+        partition_keys_query = text("""
+        SELECT pk.TBL_ID, pk.PKEY_NAME, pk.PKEY_TYPE, pk.PKEY_COMMENT, pk.INTEGER_IDX
+        FROM PARTITION_KEYS pk
+        JOIN TBLS t ON t.TBL_ID = pk.TBL_ID
+        JOIN DBS d ON t.DB_ID = d.DB_ID
+        WHERE pk.TBL_ID BETWEEN :min_id AND :max_id AND d.NAME = :schema_name
+        """)
+        
+        def fetch_schemas(conn, schema_names, markers, emit):
+            for schema_name in schema_names:
+                after_id = 0
+                while True:
+                    rows = conn.execute(tables_query, {'schema_name': schema_name, 'after_id': after_id, 'batch_size': batch_size}).fetchall()
+                    if not rows:
+                        break
+                    tables = [
+                        {
+                            'schema_name': schema_name,
+                            'table_name': table_name,
+                            'table_comment': table_comment,
+                            # CREATE_TIME 为Unix时间戳，在Python中转换，不依赖源库的from_unixtime
+                            'create_time': datetime.fromtimestamp(create_ts) if create_ts else None,
+                            'sync_marker': make_sync_marker(HIVE_MARKER_VERSION, create_ts, last_ddl_time),
+                        }
+                        for table_id, table_name, table_comment, create_ts, last_ddl_time, cd_id in rows
+                    ]
+                    # 增量同步时找出变更标记未变化的表，只获取其余表的字段
+                    skip_keys = unchanged_table_keys(markers, tables)
+                    fetch_rows = [row for row in rows if (schema_name, row[1]) not in skip_keys]
+                    columns_by_key = {}
+                    if fetch_rows:
+                        columns_by_key = _fetch_hive_columns(conn, columns_query, partition_keys_query, schema_name, fetch_rows)
+                    emit((tables, columns_by_key, skip_keys))
+                    if len(rows) < batch_size:
+                        break
+                    after_id = rows[-1][0]
+        
+        # 获取库列表和表总数
+        progress('fetch_tables')
         with engine.connect() as conn:
-            # 获取表信息
-            tables_query = text("""
-            SELECT t.tbl_id table_id
-                , d.NAME AS schema_name
-                , t.TBL_NAME AS table_name
-                , c.param_value as table_comment
-                , from_unixtime(t.create_time) as create_time
-                , null as update_time
-            FROM TBLS t
-            JOIN  DBS d ON t.DB_ID = d.DB_ID
-            left join table_params c on t.tbl_id=c.tbl_id and c.param_key='comment'
-            ORDER BY d.NAME, t.TBL_NAME
-            """)
-            tables_result = conn.execute(tables_query)
-            tables_data = tables_result.fetchall()
-            
-            # 统计同步结果
-            new_tables = 0
-            updated_tables = 0
-            total_columns = 0
-            
-            # 处理每张表
-            for table_row in tables_data:
-                table_id, schema_name, table_name, table_comment, create_time, update_time = table_row # 提取表信息
-                
-                # 查找或创建表记录
-                existing_table = Table.query.filter_by(db_id=dbCfg.id, table_name=table_name).first()
-                
-                if existing_table:
-                    # 更新现有表
-                    existing_table.table_comment = table_comment
-                    updated_tables += 1
-                    current_table = existing_table
-                else:
-                    # 创建新表
-                    new_table = Table(
-                        db_id=dbCfg.id,
-                        schema_name=schema_name,
-                        table_name=table_name,
-                        table_comment=table_comment,
-                        create_time=create_time,
-                        update_time=update_time
-                    )
-                    db.session.add(new_table)
-                    db.session.flush()  # 获取新表的ID
-                    new_tables += 1
-                    current_table = new_table
-                
-                # 查询表的字段信息
-                columns_query = text("""
-                SELECT
-                    c.COLUMN_NAME,
-                    c.TYPE_NAME AS column_type,
-                    0 AS is_partition,
-                    c.COMMENT AS column_comment,
-                    c.INTEGER_IDX AS ordinal_position
-                FROM TBLS t
-                JOIN DBS d ON t.DB_ID = d.DB_ID
-                JOIN SDS s ON t.SD_ID = s.SD_ID
-                JOIN COLUMNS_V2 c ON s.CD_ID = c.CD_ID
-                WHERE t.TBL_ID = :tbl_id
-                UNION ALL
-                SELECT
-                    pk.PKEY_NAME AS COLUMN_NAME,
-                    pk.PKEY_TYPE AS column_type,
-                    1 AS is_partition,
-                    NULL AS column_comment,  -- 分区列注释通常不存（或需另查）
-                    990 + pk.INTEGER_IDX AS ordinal_position  -- 放在普通列之后
-                FROM TBLS t
-                JOIN PARTITION_KEYS pk ON pk.TBL_ID = t.TBL_ID
-                WHERE t.TBL_ID = :tbl_id
-                ORDER BY ordinal_position
-                """)
-                columns_result = conn.execute(columns_query, {'tbl_id': table_id})
-                columns_data = columns_result.fetchall()
-                
-                # 获取现有字段列表
-                existing_columns = Column.query.filter_by(table_id=current_table.id).all()
-                existing_column_names = {col.column_name for col in existing_columns}
-                
-                # 处理每个字段
-                for col_row in columns_data:
-                    column_name, column_type, is_partition, column_comment, ordinal_position = col_row # 提取列信息
-                    
-                    # 查找或创建字段记录
-                    existing_column = Column.query.filter_by(table_id=current_table.id, column_name=column_name).first()
-                    
-                    if existing_column:
-                        # 更新现有字段
-                        existing_column.column_type = column_type
-                        existing_column.is_partition = bool(is_partition)
-                        existing_column.column_comment = column_comment
-                        existing_column.ordinal_position = ordinal_position
-                    else:
-                        # 创建新字段
-                        new_column = Column(
-                            table_id=current_table.id,
-                            column_name=column_name,
-                            column_type=column_type,
-                            is_partition=bool(is_partition),
-                            column_comment=column_comment,
-                            ordinal_position=ordinal_position
-                        )
-                        db.session.add(new_column)
-                    
-                    # 从现有字段集合中移除已处理的字段
-                    if column_name in existing_column_names:
-                        existing_column_names.remove(column_name)
-                    
-                    total_columns += 1
-                
-                # 删除不再存在的字段
-                for col_name in existing_column_names:
-                    column_to_delete = Column.query.filter_by(table_id=current_table.id, column_name=col_name).first()
-                    if column_to_delete:
-                        db.session.delete(column_to_delete)
-            
-            # 提交所有更改
-            db.session.commit()
-            
-            # 返回成功消息
-            return {'success': True, 'message': f'同步完成！新增表{new_tables}张，更新表{updated_tables}张，处理字段{total_columns}个'}
+            schemas = [name for name, in conn.execute(text("SELECT NAME FROM DBS ORDER BY NAME"))]
+            tables_total = conn.execute(text("SELECT COUNT(*) FROM TBLS")).scalar()
+        stats = _sync_schemas(db, Table, Column, db_id, engine, schemas, fetch_schemas, full, progress, checkpoint, parallelism, tables_total,
+                              change_log=change_log, source_schemas=schemas)
+
+        # 返回成功消息
+        return {'success': True, 'message': _sync_message(stats), 'stats': stats}
             
     except Exception as e:
-        # 回滚事务
+        # 回滚事务，已提交的批次保留，下次同步从未完成的库继续
         db.session.rollback()
         
         # 记录错误信息
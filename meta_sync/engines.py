@@ -0,0 +1,134 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+from sqlalchemy.pool import NullPool
+
+
+# 同步时各数据库类型使用的驱动（Hive同步读取的是其元数据库，元数据库为MySQL）
+SYNC_DRIVERS = {
+    'MySQL': 'mysql+pymysql',
+    'PostgreSQL': 'postgresql',
+    'Hive': 'mysql+pymysql',
+}
+
+# 连接池默认配置，可通过 config.yml 的 sync 节点覆盖
+ENGINE_OPTIONS = {
+    'max_engines': 32,            # 最多缓存的engine数量，超出后淘汰最久未使用的
+    'engine_idle_seconds': 1800,  # engine空闲超过该时间后释放
+    'pool_size': 2,               # 每个engine常驻连接数
+    'max_overflow': 2,            # 每个engine允许的临时连接数
+    'pool_recycle': 1800,         # 连接最大存活时间，避免被服务端超时断开
+    'pool_timeout': 30,           # 从连接池获取连接的最长等待时间
+    'connect_timeout': 10,        # 建立连接的超时时间
+    'schema_parallelism': 4,      # 同步单个数据库时并行拉取的模式数，每个模式占用一个连接
+}
+
+# (db_id, 凭据指纹) -> [engine, 最近使用时间]，按最近使用顺序排列
+_engines = OrderedDict()
+_lock = threading.Lock()
+
+
+def configure(options=None):
+    """用配置文件中的 sync 节点覆盖连接池默认配置"""
+    for key, value in (options or {}).items():
+        if key in ENGINE_OPTIONS:
+            ENGINE_OPTIONS[key] = value
+
+
+def build_sync_url(dbCfg):
+    """根据数据库记录生成同步使用的连接URL"""
+    drivername = SYNC_DRIVERS.get(dbCfg.db_type)
+    if drivername is None:
+        raise Exception(f'不支持的数据库类型：{dbCfg.db_type}')
+    return URL.create(
+        drivername=drivername,
+        username=dbCfg.db_user, password=dbCfg.db_password,
+        host=dbCfg.db_host, port=dbCfg.db_port,
+        database=dbCfg.db_name
+    )
+
+
+def credentials_fingerprint(url):
+    """连接URL（含密码）的指纹，连接信息或密码变化后指纹随之变化"""
+    if isinstance(url, URL):
+        url = url.render_as_string(hide_password=False)
+    return hashlib.sha256(str(url).encode('utf-8')).hexdigest()[:16]
+
+
+def _new_engine(url, **kwargs):
+    """创建带连接池的engine"""
+    return create_engine(
+        url,
+        pool_size=ENGINE_OPTIONS['pool_size'],
+        # 按模式并行拉取时每个线程各占一个连接，临时连接数不少于并行度
+        max_overflow=max(ENGINE_OPTIONS['max_overflow'], ENGINE_OPTIONS['schema_parallelism'] - ENGINE_OPTIONS['pool_size']),
+        pool_recycle=ENGINE_OPTIONS['pool_recycle'],
+        pool_timeout=ENGINE_OPTIONS['pool_timeout'],
+        pool_pre_ping=True,
+        connect_args={'connect_timeout': ENGINE_OPTIONS['connect_timeout']},
+        **kwargs
+    )
+
+
+def _evict_locked(now):
+    """释放空闲过久的engine，并按LRU淘汰超出数量上限的engine（需持有锁）"""
+    evicted = []
+    for key, (engine, last_used) in list(_engines.items()):
+        if now - last_used > ENGINE_OPTIONS['engine_idle_seconds']:
+            evicted.append(_engines.pop(key)[0])
+    while len(_engines) > ENGINE_OPTIONS['max_engines']:
+        evicted.append(_engines.popitem(last=False)[1][0])
+    return evicted
+
+
+def get_engine(db_id, url):
+    """
+    获取某个已登记数据库的engine，同一数据库、同一凭据复用同一个连接池
+    """
+    key = (db_id, credentials_fingerprint(url))
+    now = time.time()
+    with _lock:
+        entry = _engines.get(key)
+        if entry is None:
+            entry = [_new_engine(url), now]
+            _engines[key] = entry
+        entry[1] = now
+        _engines.move_to_end(key)
+        evicted = _evict_locked(now)
+
+    # 在锁外释放连接，避免阻塞其他线程
+    for engine in evicted:
+        engine.dispose()
+    return entry[0]
+
+
+def get_sync_engine(dbCfg):
+    """获取同步数据库元数据使用的engine"""
+    return get_engine(dbCfg.id, build_sync_url(dbCfg))
+
+
+def get_temporary_engine(url, connect_timeout):
+    """创建不缓存、不保留连接的engine，用于尚未保存的数据库连接测试"""
+    return create_engine(url, poolclass=NullPool, connect_args={'connect_timeout': connect_timeout})
+
+
+def invalidate_engines(db_id):
+    """数据库连接信息修改或删除后，释放该数据库缓存的全部engine"""
+    with _lock:
+        keys = [key for key in _engines if key[0] == db_id]
+        evicted = [_engines.pop(key)[0] for key in keys]
+    for engine in evicted:
+        engine.dispose()
+
+
+def dispose_all():
+    """释放全部缓存的engine"""
+    with _lock:
+        evicted = [engine for engine, _ in _engines.values()]
+        _engines.clear()
+    for engine in evicted:
+        engine.dispose()
@@ -0,0 +1,103 @@
+import threading
+import traceback
+from collections import Counter, deque
+
+
+class SyncExecutor:
+    """
+    有界同步线程池
+    - 最多 max_workers 个同步任务同时执行，其余任务按提交顺序（FIFO）排队
+    - 同一源库主机最多 per_host_limit 个任务同时执行，主机已满时跳过其任务，先执行后面其他主机的任务
+    - 同一个 key（数据库ID）同一时间只会排队或执行一次
+    """
+
+    def __init__(self, max_workers=4, per_host_limit=2):
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self._queue = deque()          # 排队中的任务 (key, host, fn, args)
+        self._running = {}             # 执行中的任务 key -> host
+        self._host_running = Counter() # 每个主机执行中的任务数
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def configure(self, max_workers=4, per_host_limit=2):
+        """按配置文件修改并发上限，在提交任务前调用"""
+        with self._cond:
+            self.max_workers = max(1, int(max_workers))
+            self.per_host_limit = max(1, int(per_host_limit))
+
+    def _ensure_workers(self):
+        """首次提交任务时才启动工作线程，避免在多进程服务fork前创建线程（需持有锁）"""
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(target=self._work, name=f'sync-worker-{len(self._threads) + 1}')
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key, host, fn, *args):
+        """
+        提交同步任务，返回排队位置（从1开始）
+        任务已在排队或执行中时不重复提交，返回 None
+        """
+        with self._cond:
+            if self.is_pending(key):
+                return None
+            self._ensure_workers()
+            self._queue.append((key, host, fn, args))
+            position = len(self._queue)
+            self._cond.notify_all()
+            return position
+
+    def is_pending(self, key):
+        """任务是否在排队或执行中"""
+        with self._cond:
+            return key in self._running or any(job[0] == key for job in self._queue)
+
+    def position(self, key):
+        """返回任务的排队位置（从1开始），不在队列中返回 None"""
+        with self._cond:
+            for index, job in enumerate(self._queue):
+                if job[0] == key:
+                    return index + 1
+            return None
+
+    def queue_depth(self):
+        """排队中的任务数"""
+        with self._cond:
+            return len(self._queue)
+
+    def running_count(self):
+        """执行中的任务数"""
+        with self._cond:
+            return len(self._running)
+
+    def _take_next(self):
+        """取出队列中第一个所在主机仍有空闲名额的任务（需持有锁）"""
+        for index, job in enumerate(self._queue):
+            if self._host_running[job[1]] < self.per_host_limit:
+                del self._queue[index]
+                return job
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._take_next()
+                while job is None:
+                    self._cond.wait()
+                    job = self._take_next()
+                key, host, fn, args = job
+                self._running[key] = host
+                self._host_running[host] += 1
+
+            try:
+                fn(*args)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                with self._cond:
+                    del self._running[key]
+                    self._host_running[host] -= 1
+                    # 主机名额释放后，之前被跳过的任务可能可以执行了
+                    self._cond.notify_all()
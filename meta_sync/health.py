@@ -0,0 +1,160 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.exc import IntegrityError
+
+from meta_sync import engines
+
+
+# 健康状态
+OK = 'ok'
+ERROR = 'error'
+UNSUPPORTED = 'unsupported'
+
+
+def probe(url, timeout):
+    """新建一个连接并执行 SELECT 1，返回连接耗时（毫秒）；不使用连接池，测得的是实际建立连接的耗时"""
+    engine = engines.get_temporary_engine(url, connect_timeout=timeout)
+    try:
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        return int((time.perf_counter() - started) * 1000)
+    finally:
+        engine.dispose()
+
+
+def _error_message(e):
+    message = str(e)
+    # 过滤掉SQLAlchemy的背景链接信息
+    if 'Background on this error at:' in message:
+        message = message.split('Background on this error at:')[0].strip()
+    return message[:1024]
+
+
+def check_databases(databases, max_workers=16, timeout=5):
+    """
+    并发检查数据库连接，databases 为 Database 记录
+    使用有界线程池，每个检查的建立连接超时为 timeout 秒；每个检查从开始执行起最多等待 timeout * 2 秒，未完成的记为超时
+    线程池全部被超时未返回的检查占满时不再等待，未执行到的数据库不返回结果（不记为失败）
+    返回 {db_id: {'status', 'latency_ms', 'error', 'checked_at'}}
+    """
+    results = {}
+    targets = []
+    # 在调用线程中取出连接信息，线程池中不访问会话
+    for database in databases:
+        if database.db_type not in engines.SYNC_DRIVERS:
+            results[database.id] = {'status': UNSUPPORTED, 'latency_ms': None, 'error': None, 'checked_at': datetime.now()}
+        else:
+            targets.append((database.id, engines.build_sync_url(database)))
+    if not targets:
+        return results
+
+    deadline = timeout * 2
+    started = {}  # db_id -> 检查开始执行的时间
+
+    def run(db_id, url):
+        started[db_id] = time.monotonic()
+        return probe(url, timeout)
+
+    workers = min(max_workers, len(targets))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='health-check')
+    futures = {executor.submit(run, db_id, url): db_id for db_id, url in targets}
+    pending = set(futures)
+    while pending:
+        now = time.monotonic()
+        running = [started[futures[f]] for f in pending if futures[f] in started]
+        expired = sum(1 for at in running if now - at >= deadline)
+        # 已开始的检查都已超时，且没有空闲线程执行剩余的检查时结束等待
+        if (len(running) == len(pending) and expired == len(running)) or expired >= workers:
+            break
+        wait_seconds = min((at + deadline - now for at in running if now - at < deadline), default=deadline)
+        _, pending = wait(pending, timeout=max(wait_seconds, 0.05), return_when=FIRST_COMPLETED)
+    # 不等待卡住的检查线程，未开始的检查直接取消
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    now = time.monotonic()
+    for future, db_id in futures.items():
+        # 取消或刚开始执行、还未超时的检查没有结果
+        if future.cancelled() or db_id not in started or (not future.done() and now - started[db_id] < deadline):
+            continue
+        result = {'status': ERROR, 'latency_ms': None, 'error': None, 'checked_at': datetime.now()}
+        if not future.done():
+            result['error'] = f'连接超时（{deadline}秒内未完成）'
+        elif future.exception() is not None:
+            result['error'] = _error_message(future.exception())
+        else:
+            result.update(status=OK, latency_ms=future.result())
+        results[db_id] = result
+    return results
+
+
+def save_results(db, DatabaseHealth, results, retry=True):
+    """保存检查结果：记录连接耗时、最近一次成功时间和最近一次错误，连续失败次数；新增和更新各批量执行一次"""
+    rows = {row.db_id: row for row in db.session.execute(
+        select(DatabaseHealth).where(DatabaseHealth.db_id.in_(list(results)))
+    ).scalars()}
+    inserts, updates = [], []
+    for db_id, result in results.items():
+        row = rows.get(db_id)
+        values = {'status': result['status'], 'checked_at': result['checked_at']}
+        if result['status'] == OK:
+            values.update(latency_ms=result['latency_ms'], last_success_at=result['checked_at'], failures=0)
+        elif result['status'] == ERROR:
+            values.update(last_error=result['error'], last_error_at=result['checked_at'],
+                          failures=(row.failures or 0) + 1 if row is not None else 1)
+        if row is None:
+            inserts.append(dict(values, db_id=db_id))
+        else:
+            updates.append(dict(values, id=row.id))
+    try:
+        # 按字段分组后批量写入，同一批的字段需一致
+        for group in _group_by_keys(inserts):
+            db.session.execute(insert(DatabaseHealth), group)
+        for group in _group_by_keys(updates):
+            db.session.execute(update(DatabaseHealth), group)
+        db.session.commit()
+    except IntegrityError:
+        # 其他进程同时插入了同一数据库的记录，重新读取后再更新一次
+        db.session.rollback()
+        if not retry:
+            raise
+        save_results(db, DatabaseHealth, results, retry=False)
+
+
+def _group_by_keys(records):
+    groups = {}
+    for record in records:
+        groups.setdefault(tuple(sorted(record)), []).append(record)
+    return list(groups.values())
+
+
+def load_health(db, DatabaseHealth):
+    """全部数据库的检查结果 {db_id: 记录}"""
+    return {row.db_id: row for row in db.session.execute(select(DatabaseHealth)).scalars()}
+
+
+def is_stale(row, ttl_seconds):
+    """没有检查结果或结果已超过有效期"""
+    return row is None or row.checked_at is None or row.checked_at < datetime.now() - timedelta(seconds=ttl_seconds)
+
+
+def is_unreachable(row, ttl_seconds):
+    """有效期内的检查结果为连接失败，同步时跳过，避免占用同步线程等待连接超时"""
+    return row is not None and row.status == ERROR and not is_stale(row, ttl_seconds)
+
+
+def health_to_dict(row):
+    """检查结果转换为接口返回的字典"""
+    return {
+        'db_id': row.db_id,
+        'status': row.status,
+        'latency_ms': row.latency_ms,
+        'checked_at': row.checked_at.isoformat() if row.checked_at else None,
+        'last_success_at': row.last_success_at.isoformat() if row.last_success_at else None,
+        'last_error': row.last_error,
+        'last_error_at': row.last_error_at.isoformat() if row.last_error_at else None,
+        'failures': row.failures or 0,
+    }
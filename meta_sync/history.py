@@ -0,0 +1,78 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import select, insert
+
+
+# 变更类型
+ADD_TABLE = 'add_table'
+DROP_TABLE = 'drop_table'
+ALTER_TABLE = 'alter_table'
+ADD_COLUMN = 'add_column'
+DROP_COLUMN = 'drop_column'
+ALTER_COLUMN = 'alter_column'
+
+
+class ChangeLog:
+    """
+    同步过程中的表结构变更记录，只追加写入tb_schema_change
+    record 先暂存在内存中，flush 只写入会话不提交，由调用方与该批数据在同一事务中提交，保证历史与已写入的数据一致
+    """
+
+    def __init__(self, db, SchemaChange, db_id, token=None):
+        self.db = db
+        self.SchemaChange = SchemaChange
+        self.db_id = db_id
+        self.token = token
+        self._pending = []
+
+    def record(self, change_type, schema_name, table_name, table_id=None, column_name=None, detail=None):
+        self._pending.append({
+            'db_id': self.db_id,
+            'table_id': table_id,
+            'schema_name': schema_name,
+            'table_name': table_name,
+            'column_name': column_name,
+            'change_type': change_type,
+            'detail': json.dumps(detail, ensure_ascii=False, default=str) if detail is not None else None,
+            'sync_token': self.token,
+            'changed_at': datetime.now(),
+        })
+
+    def flush(self):
+        """把暂存的变更写入会话，返回写入的条数"""
+        count = len(self._pending)
+        if self._pending:
+            self.db.session.execute(insert(self.SchemaChange), self._pending)
+            self._pending = []
+        return count
+
+
+def list_changes(db, SchemaChange, db_id, schema_name=None, table_name=None, before_id=None, limit=100):
+    """
+    按时间倒序查询数据库的变更历史，指定 table_name 时只查询该表（含已删除的同名表）
+    before_id 为上一页最后一条的ID，按ID向前翻页
+    """
+    query = select(SchemaChange).where(SchemaChange.db_id == db_id)
+    if table_name is not None:
+        query = query.where(SchemaChange.schema_name == schema_name, SchemaChange.table_name == table_name)
+    elif schema_name is not None:
+        query = query.where(SchemaChange.schema_name == schema_name)
+    if before_id:
+        query = query.where(SchemaChange.id < before_id)
+    return db.session.execute(query.order_by(SchemaChange.id.desc()).limit(limit)).scalars().all()
+
+
+def change_to_dict(change):
+    """变更记录转换为接口返回的字典"""
+    return {
+        'id': change.id,
+        'table_id': change.table_id,
+        'schema_name': change.schema_name,
+        'table_name': change.table_name,
+        'column_name': change.column_name,
+        'change_type': change.change_type,
+        'detail': json.loads(change.detail) if change.detail else None,
+        'sync_token': change.sync_token,
+        'changed_at': change.changed_at.isoformat() if change.changed_at else None,
+    }
@@ -0,0 +1,152 @@
+import contextvars
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from sqlalchemy import event
+
+
+# 写入语句的目标表，如 INSERT INTO tb_column、UPDATE tb_table、DELETE FROM tb_column
+_WRITE_PATTERN = re.compile(r'^\s*(INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+[`"]?(\w+)', re.IGNORECASE)
+_OPERATIONS = {'INSERT': 'insert', 'UPDATE': 'update', 'DELETE': 'delete'}
+
+# 同步任务自身的状态记录，不计入写入
+_IGNORED_TABLES = {'tb_sync_job'}
+
+# 当前线程所属同步的统计，并行拉取的线程通过 contextvars.copy_context() 继承
+_active_timer = contextvars.ContextVar('sync_timer', default=None)
+
+
+class SyncTimer:
+    """
+    同步耗时统计，包装进度回调后传给同步函数，同步结束后调用 finish
+    - 按进度回调上报的阶段累计耗时：开始到第一次上报为 connect，之后为 fetch_tables、fetch_columns，
+      write 阶段中写入语句的耗时记为 write、提交耗时记为 commit，其余（内存比对）记为 reconcile
+    - 源库查询的次数和每次的耗时（含并行拉取线程中的查询）
+    - 写入元数据库的行数，按 (表名, insert/update/delete) 统计
+    只统计本次同步的线程（及继承其上下文的并行拉取线程）中的语句，多个同步共用同一个engine、
+    同时处理的页面请求和连接检查都不会计入；语句的开始时间按执行上下文记录在本对象中，finish 时随监听一起清除
+    """
+
+    def __init__(self, progress, store_engine, source_engine, session=None):
+        self.progress = progress
+        self.store_engine = store_engine
+        self.source_engine = source_engine
+        self.session = session
+        self.phase = 'connect'
+        self.phases = defaultdict(float)
+        self.source_queries = []
+        self.rows = Counter()
+        self.elapsed = 0.0
+        self._started = self._phase_started = time.perf_counter()
+        self._lock = threading.Lock()
+        # 执行中语句的开始时间 {id(执行上下文): 开始时间}，语句出错时由 handle_error 移除
+        self._statement_started = {}
+        self._listeners = [
+            (source_engine, 'before_cursor_execute', self._before_statement),
+            (source_engine, 'after_cursor_execute', self._after_source),
+            (source_engine, 'handle_error', self._statement_error),
+            (store_engine, 'before_cursor_execute', self._before_statement),
+            (store_engine, 'after_cursor_execute', self._after_store),
+            (store_engine, 'handle_error', self._statement_error),
+        ]
+        if session is not None:
+            self._listeners += [
+                (session, 'before_commit', self._before_commit),
+                (session, 'after_commit', self._after_commit),
+            ]
+        self._commit_started = None
+        self._context_token = _active_timer.set(self)
+        for target, name, fn in self._listeners:
+            event.listen(target, name, fn)
+
+    def __call__(self, phase, **counters):
+        self._switch(phase)
+        if self.progress is not None:
+            self.progress(phase, **counters)
+
+    def _switch(self, phase):
+        now = time.perf_counter()
+        self.phases[self._phase_name(self.phase)] += now - self._phase_started
+        self.phase, self._phase_started = phase, now
+
+    @staticmethod
+    def _phase_name(phase):
+        # write 阶段中除写入和提交外的时间为内存比对
+        return 'reconcile' if phase == 'write' else phase
+
+    def _move(self, seconds, to_phase):
+        """把当前阶段中的一段耗时转记到 write/commit"""
+        self.phases[to_phase] += seconds
+        self.phases[self._phase_name(self.phase)] -= seconds
+
+    def _owned(self):
+        return _active_timer.get() is self
+
+    def _before_statement(self, conn, cursor, statement, parameters, context, executemany):
+        if self._owned():
+            with self._lock:
+                self._statement_started[id(context)] = time.perf_counter()
+
+    def _pop_started(self, context):
+        with self._lock:
+            return self._statement_started.pop(id(context), None)
+
+    def _statement_error(self, exception_context):
+        if exception_context.execution_context is not None:
+            self._pop_started(exception_context.execution_context)
+
+    def _after_source(self, conn, cursor, statement, parameters, context, executemany):
+        started = self._pop_started(context) if self._owned() else None
+        if started is None:
+            return
+        with self._lock:
+            self.source_queries.append(time.perf_counter() - started)
+
+    def _after_store(self, conn, cursor, statement, parameters, context, executemany):
+        started = self._pop_started(context) if self._owned() else None
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        match = _WRITE_PATTERN.match(statement)
+        if match is None or match.group(2).lower() in _IGNORED_TABLES:
+            return
+        # 提交时刷新的写入计入 commit
+        if self._commit_started is None:
+            self._move(seconds, 'write')
+        operation = _OPERATIONS[match.group(1).split()[0].upper()]
+        if cursor.rowcount and cursor.rowcount > 0:
+            self.rows[(match.group(2).lower(), operation)] += cursor.rowcount
+
+    def _before_commit(self, session):
+        if self._owned():
+            self._commit_started = time.perf_counter()
+
+    def _after_commit(self, session):
+        if self._owned() and self._commit_started is not None:
+            self._move(time.perf_counter() - self._commit_started, 'commit')
+            self._commit_started = None
+
+    def finish(self):
+        """结束统计并移除监听，返回 {阶段: 秒}"""
+        self._switch(self.phase)
+        self.elapsed = time.perf_counter() - self._started
+        for target, name, fn in self._listeners:
+            if event.contains(target, name, fn):
+                event.remove(target, name, fn)
+        with self._lock:
+            self._statement_started.clear()
+        try:
+            _active_timer.reset(self._context_token)
+        except ValueError:
+            # 不在创建时的上下文中结束
+            _active_timer.set(None)
+        self.phases = {phase: max(seconds, 0.0) for phase, seconds in self.phases.items()}
+        return self.phases
+
+    def summary(self):
+        """日志中输出的耗时摘要"""
+        phases = '，'.join(f'{phase} {seconds:.1f}s' for phase, seconds in self.phases.items())
+        rows = sum(self.rows.values())
+        return f"总耗时 {self.elapsed:.1f}s（{phases}），源库查询 {len(self.source_queries)} 次，写入 {rows} 行"
@@ -0,0 +1,248 @@
+import json
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.exc import IntegrityError
+
+
+# 正在排队或执行中的任务状态
+ACTIVE_STATUSES = ('queued', 'loading')
+
+# 当前进程标识，记录任务由哪个进程执行
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _ensure_job_row(db, SyncJob, db_id):
+    """保证该数据库存在任务记录，多个进程同时插入时由唯一索引保证只有一条"""
+    if db.session.execute(select(SyncJob.id).where(SyncJob.db_id == db_id)).first():
+        return
+    try:
+        db.session.add(SyncJob(db_id=db_id, status='none'))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+
+
+def get_job(db, SyncJob, db_id):
+    """读取数据库的任务记录，不使用会话缓存，保证读到其他进程写入的最新状态"""
+    return db.session.execute(
+        select(SyncJob).where(SyncJob.db_id == db_id).execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+
+
+def worker_alive(worker):
+    """
+    执行任务的进程是否仍在运行，worker 为 主机名:进程号
+    只能判断本机的进程（如 gunicorn 重启或异常退出的工作进程），其他主机的进程视为运行中
+    """
+    host, _, pid = (worker or '').rpartition(':')
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (ValueError, OSError):
+        return True
+    return True
+
+
+def claim_job(db, SyncJob, db_id, token, full=False, cooldown_seconds=30, stale_seconds=21600, queued_stale_seconds=3600):
+    """
+    以条件更新的方式抢占同步任务：只有当前没有排队/执行中的任务（或任务已超时遗留）、且不在冷却期内时才能抢占成功
+    排队中的任务只保存在所在进程的同步线程池中，进程退出后不会再执行：本机进程已退出的任务直接重新抢占；
+    无法判断进程是否存在的其他主机上的任务，排队超过 queued_stale_seconds 秒视为遗留（本机任务排队多久都不按时间判断）
+    多个进程同时抢占同一数据库时只有一个能更新成功
+    返回 (是否抢占成功, 任务记录)
+    """
+    _ensure_job_row(db, SyncJob, db_id)
+
+    now = datetime.now()
+    idle = and_(
+        SyncJob.status.notin_(ACTIVE_STATUSES),
+        or_(SyncJob.finished_at.is_(None), SyncJob.finished_at < now - timedelta(seconds=cooldown_seconds)),
+    )
+    # 进程异常退出时遗留的排队/执行中任务，超时后允许重新抢占
+    stale = or_(
+        and_(
+            SyncJob.status.in_(ACTIVE_STATUSES),
+            or_(SyncJob.heartbeat_at.is_(None), SyncJob.heartbeat_at < now - timedelta(seconds=stale_seconds)),
+        ),
+        and_(
+            SyncJob.status == 'queued',
+            SyncJob.queued_at < now - timedelta(seconds=queued_stale_seconds),
+            or_(SyncJob.worker.is_(None), ~SyncJob.worker.startswith(f'{socket.gethostname()}:', autoescape=True)),
+        ),
+    )
+    values = dict(
+        status='queued', phase=None, token=token, full_sync=full, worker=WORKER_ID,
+        queued_at=now, started_at=None, finished_at=None, heartbeat_at=now,
+        tables_total=0, tables_done=0, columns_done=0, new_tables=0, updated_tables=0,
+        message='排队中...', error=None,
+    )
+    result = db.session.execute(
+        update(SyncJob)
+        .where(SyncJob.db_id == db_id, or_(idle, stale))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result.rowcount == 1:
+        return True, get_job(db, SyncJob, db_id)
+
+    job = get_job(db, SyncJob, db_id)
+    if job.status in ACTIVE_STATUSES and not worker_alive(job.worker):
+        # 执行任务的本机进程已退出，按原任务token条件更新，与其他进程同时抢占时只有一个成功
+        print(f"[SYNC LOG] 数据库 {db_id} 的任务所在进程 {job.worker} 已退出，重新抢占")
+        result = db.session.execute(
+            update(SyncJob)
+            .where(SyncJob.db_id == db_id, SyncJob.token == job.token, SyncJob.status == job.status)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        job = get_job(db, SyncJob, db_id)
+    return result.rowcount == 1, job
+
+
+def start_job(db, SyncJob, db_id, token):
+    """任务从排队进入执行状态，任务已被其他进程重新抢占时返回 False"""
+    now = datetime.now()
+    result = db.session.execute(
+        update(SyncJob)
+        .where(SyncJob.db_id == db_id, SyncJob.token == token, SyncJob.status == 'queued')
+        .values(status='loading', phase='connect', worker=WORKER_ID, started_at=now, heartbeat_at=now, message='同步中...')
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def finish_job(db, SyncJob, db_id, token, success, message, stats=None, error=None):
+    """记录任务结果和计数"""
+    stats = stats or {}
+    now = datetime.now()
+    db.session.execute(
+        update(SyncJob)
+        .where(SyncJob.db_id == db_id, SyncJob.token == token)
+        .values(
+            status='success' if success else 'error', phase=None,
+            message=message[:1024], error=error,
+            finished_at=now, heartbeat_at=now,
+            tables_total=stats.get('total_tables', 0),
+            tables_done=stats.get('total_tables', 0),
+            columns_done=stats.get('total_columns', 0),
+            new_tables=stats.get('new_tables', 0),
+            updated_tables=stats.get('updated_tables', 0),
+            # 同步成功后清空断点，失败时保留，下次同步从断点继续
+            **({'checkpoint': None} if success else {}),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+class JobProgress:
+    """
+    同步进度回调，把执行阶段和已处理的表数/字段数写入tb_sync_job，供进度推送和状态查询读取
+    - 使用独立连接写入并立即提交，不会提前提交同步本身的事务
+    - 阶段变化时立即写入，同一阶段内的计数更新至少间隔 min_interval 秒，避免频繁写库
+    - 写入失败只打印日志，不影响同步
+    """
+
+    def __init__(self, db, SyncJob, db_id, token, min_interval=1.0):
+        self.db = db
+        self.SyncJob = SyncJob
+        self.db_id = db_id
+        self.token = token
+        self.min_interval = min_interval
+        self.phase = None
+        self.counters = {}
+        self._last_write = 0
+
+    def __call__(self, phase, **counters):
+        """phase: 执行阶段；counters: tables_total、tables_done、columns_done 中需要更新的计数"""
+        now = time.monotonic()
+        phase_changed = phase != self.phase
+        self.phase = phase
+        self.counters.update(counters)
+        if not phase_changed and now - self._last_write < self.min_interval:
+            return
+        self._last_write = now
+        try:
+            with self.db.engine.begin() as conn:
+                conn.execute(
+                    update(self.SyncJob.__table__)
+                    .where(self.SyncJob.db_id == self.db_id, self.SyncJob.token == self.token)
+                    .values(phase=phase, heartbeat_at=datetime.now(), **self.counters)
+                )
+        except Exception as e:
+            print(f"[SYNC LOG] 数据库 {self.db_id} 同步进度写入失败: {e}")
+
+
+class JobCheckpoint:
+    """
+    分批同步的断点，保存在tb_sync_job.checkpoint（JSON）
+    save 只写入会话不提交，由调用方与该批数据在同一事务中提交，保证断点与已写入的数据一致
+    断点记录产生它的那次同步的开始时间（从断点继续的同步沿用最初的时间），超过 max_age_seconds 的断点不再使用，
+    避免很久以前失败的同步使后来的同步跳过这些模式、漏掉期间源库的变化
+    """
+
+    def __init__(self, db, SyncJob, db_id, token, max_age_seconds=21600):
+        self.db = db
+        self.SyncJob = SyncJob
+        self.db_id = db_id
+        self.token = token
+        self.max_age_seconds = max_age_seconds
+        self.started_at = datetime.now()
+
+    def load(self):
+        """读取上次未完成同步留下的断点，没有或已过期时返回 None"""
+        value = self.db.session.execute(
+            select(self.SyncJob.checkpoint).where(self.SyncJob.db_id == self.db_id)
+        ).scalar()
+        if not value:
+            return None
+        state = json.loads(value)
+        try:
+            started_at = datetime.fromisoformat(state.get('started_at') or '')
+        except ValueError:
+            started_at = None
+        if started_at is None or started_at < datetime.now() - timedelta(seconds=self.max_age_seconds):
+            print(f"[SYNC LOG] 数据库 {self.db_id} 的断点产生于 {started_at or '未知时间'}，已过期，重新开始同步")
+            return None
+        self.started_at = started_at
+        return state
+
+    def save(self, state):
+        """记录断点"""
+        state = dict(state, started_at=self.started_at.isoformat())
+        self.db.session.execute(
+            update(self.SyncJob)
+            .where(self.SyncJob.db_id == self.db_id, self.SyncJob.token == self.token)
+            .values(checkpoint=json.dumps(state, ensure_ascii=False, default=str), heartbeat_at=datetime.now())
+            .execution_options(synchronize_session=False)
+        )
+
+
+def queue_position(db, SyncJob, job):
+    """任务在全局排队队列中的位置（从1开始），按排队时间先后计算"""
+    if job is None or job.status != 'queued':
+        return None
+    ahead = db.session.execute(
+        select(func.count(SyncJob.id))
+        .where(SyncJob.status == 'queued', SyncJob.queued_at < job.queued_at)
+    ).scalar()
+    return ahead + 1
+
+
+def active_count(db, SyncJob, stale_seconds=21600):
+    """全部进程中正在排队或执行的任务数，不计超时遗留的任务"""
+    since = datetime.now() - timedelta(seconds=stale_seconds)
+    return db.session.execute(
+        select(func.count(SyncJob.id))
+        .where(SyncJob.status.in_(ACTIVE_STATUSES), SyncJob.heartbeat_at >= since)
+    ).scalar()
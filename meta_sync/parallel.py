@@ -0,0 +1,68 @@
+import contextvars
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# 某个任务的结果已全部产出
+DONE = object()
+
+
+class _Stopped(Exception):
+    """其他任务出错或调用方停止迭代后，通知仍在执行的任务退出"""
+
+
+def iter_parallel(tasks, worker, parallelism=4, queue_size=8):
+    """
+    在线程池中并行执行 worker(task, emit)，worker 通过 emit(item) 把结果逐个放入有界队列
+    调用方在当前线程按到达顺序迭代 (task, item)，某个任务的结果全部产出后迭代到 (task, DONE)
+    - 队列满时 worker 阻塞等待，调用方处理跟不上时自动限流，内存中最多只有 queue_size 个结果
+    - 任一 worker 出错时在调用方线程抛出该异常，并通知其余 worker 尽快停止
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return
+    results = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    errors = []
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                results.put(entry, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise _Stopped()
+
+    def run(task):
+        if stop.is_set():
+            return
+        try:
+            worker(task, lambda item: put((task, item)))
+            put((task, DONE))
+        except _Stopped:
+            pass
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    executor = ThreadPoolExecutor(max_workers=max(1, int(parallelism)), thread_name_prefix='schema-fetch')
+    try:
+        for task in tasks:
+            # 任务继承调用方的上下文（如同步耗时统计），各任务使用独立的副本
+            executor.submit(contextvars.copy_context().run, run, task)
+        remaining = len(tasks)
+        while remaining:
+            if errors:
+                raise errors[0]
+            try:
+                task, item = results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is DONE:
+                remaining -= 1
+            yield task, item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,331 @@
+import hashlib
+import json
+from datetime import datetime
+
+from sqlalchemy import select, insert, update, delete
+
+from . import history
+
+
+# 表记录中参与比对和更新的字段（schema_name + table_name 为业务主键）
+TABLE_FIELDS = ('table_comment', 'create_time', 'update_time', 'sync_marker')
+
+# 字段记录中参与比对和更新的字段（table_id + column_name 为业务主键）
+COLUMN_FIELDS = ('column_type', 'is_primary', 'is_unique', 'is_partition', 'column_comment', 'ordinal_position')
+
+# 变更历史中记录的表字段（update_time 等随数据写入变化，不记为结构变更）
+LOGGED_TABLE_FIELDS = ('table_comment',)
+
+# IN 条件单批最大参数个数，兼容SQLite等对绑定参数数量有限制的数据库
+IN_CHUNK_SIZE = 500
+
+
+def _chunks(items, size=IN_CHUNK_SIZE):
+    """按固定大小切分列表"""
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def load_existing_tables(db, Table, db_id, keys=None):
+    """
+    加载该数据库下已有的表记录
+    keys 为空时一次查询加载全部表，否则只按批加载指定的 (schema_name, table_name)
+    返回 {(schema_name, table_name): {'id': .., 'table_comment': .., ...}}
+    """
+    tables = select(Table.id, Table.schema_name, Table.table_name, Table.content_hash, *[getattr(Table, f) for f in TABLE_FIELDS]).where(Table.db_id == db_id)
+    if keys is None:
+        queries = [tables]
+    else:
+        keys = set(keys)
+        # 按表名和模式名分别过滤，再在内存中精确匹配，避免依赖各数据库对行值IN的支持
+        queries = [
+            tables.where(Table.table_name.in_({k[1] for k in chunk}), Table.schema_name.in_({k[0] for k in chunk}))
+            for chunk in _chunks(sorted(keys))
+        ]
+
+    existing = {}
+    for query in queries:
+        for row in db.session.execute(query):
+            data = row._asdict()
+            key = (data['schema_name'], data['table_name'])
+            if keys is None or key in keys:
+                existing[key] = data
+    return existing
+
+
+def load_existing_columns(db, Table, Column, db_id, table_ids=None):
+    """
+    加载该数据库下已有的字段记录
+    table_ids 为空时一次查询加载全部字段，否则只按批加载指定表的字段
+    返回 {(table_id, column_name): {'id': .., 'column_type': .., ...}}
+    """
+    columns = select(Column.id, Column.table_id, Column.column_name, *[getattr(Column, f) for f in COLUMN_FIELDS])
+    if table_ids is None:
+        queries = [columns.join(Table, Table.id == Column.table_id).where(Table.db_id == db_id)]
+    else:
+        queries = [columns.where(Column.table_id.in_(chunk)) for chunk in _chunks(table_ids)]
+
+    existing = {}
+    for query in queries:
+        for row in db.session.execute(query):
+            data = row._asdict()
+            existing[(data['table_id'], data['column_name'])] = data
+    return existing
+
+
+def load_sync_markers(conn, Table, db_id, schema_names):
+    """
+    读取指定模式下已存储表的变更标记，conn 为独立连接，供并行拉取线程判断增量同步时哪些表可以跳过
+    返回 {(schema_name, table_name): {'sync_marker': ..}}，可直接传给 unchanged_table_keys
+    """
+    markers = {}
+    for chunk in _chunks(schema_names):
+        rows = conn.execute(
+            select(Table.schema_name, Table.table_name, Table.sync_marker)
+            .where(Table.db_id == db_id, Table.schema_name.in_(chunk), Table.sync_marker.isnot(None))
+        )
+        for schema_name, table_name, marker in rows:
+            markers[(schema_name, table_name)] = {'sync_marker': marker}
+    return markers
+
+
+def make_sync_marker(*parts):
+    """根据源库的变更信息（创建时间、DDL时间、字段校验和等）生成表的变更标记"""
+    return hashlib.md5('|'.join('' if p is None else str(p) for p in parts).encode('utf-8')).hexdigest()
+
+
+def unchanged_table_keys(existing_tables, tables):
+    """返回变更标记与上次同步时一致的表，这些表在增量同步时可以跳过字段的获取和写入"""
+    unchanged = set()
+    for table in tables:
+        key = (table['schema_name'], table['table_name'])
+        old = existing_tables.get(key)
+        if old is not None and table.get('sync_marker') and old.get('sync_marker') == table['sync_marker']:
+            unchanged.add(key)
+    return unchanged
+
+
+def content_hash(table, columns):
+    """
+    表内容哈希：表注释和全部字段（按字段名排序）的名称、类型、主键/唯一/分区标识、注释、顺序
+    与字段的获取顺序无关，源库结构未变化时哈希不变
+    """
+    rows = sorted(
+        [
+            column['column_name'], column.get('column_type'), bool(column.get('is_primary')), bool(column.get('is_unique')),
+            bool(column.get('is_partition')), column.get('column_comment'), column.get('ordinal_position'),
+        ]
+        for column in columns
+    )
+    content = json.dumps([table.get('table_comment'), rows], ensure_ascii=False, default=str)
+    return hashlib.md5(content.encode('utf-8')).hexdigest()
+
+
+def new_stats():
+    """同步统计信息的初始值"""
+    return {
+        'total_tables': 0,
+        'new_tables': 0,
+        'updated_tables': 0,
+        'total_columns': 0,
+        'new_columns': 0,
+        'updated_columns': 0,
+        'deleted_columns': 0,
+        'deleted_tables': 0,
+        'skipped_tables': 0,
+    }
+
+
+def _changed_fields(new_values, old_values, fields):
+    """比较新旧记录，返回发生变化的字段 {field: new_value}"""
+    return {f: new_values[f] for f in fields if f in new_values and new_values[f] != old_values.get(f)}
+
+
+def reconcile_tables(db, Table, Column, db_id, tables, columns_by_key, existing_tables=None, skip_keys=frozenset(), partial=False,
+                     change_log=None):
+    """
+    对比源库元数据与已存储的元数据，在内存中计算新增/更新/删除，再批量写入
+    获取了字段的表先计算内容哈希，与已存储的哈希一致时不再加载、比对和写入其字段
+
+    tables: [{'schema_name': .., 'table_name': .., 'table_comment': .., 'create_time': .., 'update_time': ..}, ...]
+    columns_by_key: {(schema_name, table_name): [{'column_name': .., 'column_type': .., ...}, ...]}
+    existing_tables: 调用方已通过 load_existing_tables 加载的表记录，为空时自动加载
+    skip_keys: 增量同步时变更标记未变化的表，只更新表信息，不处理其字段
+    partial: tables 只是该数据库的一部分（分批同步），已有记录只按这些表加载
+    change_log: history.ChangeLog，记录新增/修改的表和字段
+
+    只负责写入会话，不提交事务，由调用方统一提交或回滚
+    返回同步统计信息
+    """
+    stats = new_stats()
+    # 新增或发生变化（含字段变化）的表记录本次同步时间，供按更新时间增量拉取
+    now = datetime.now()
+
+    if existing_tables is None:
+        existing_tables = load_existing_tables(db, Table, db_id, [(t['schema_name'], t['table_name']) for t in tables] if partial else None)
+
+    # 1. 计算表的新增和更新，内容哈希未变化的表与变更标记未变化的表一样跳过字段处理
+    table_inserts = []
+    table_updates = []
+    changed_keys = set()
+    seen_tables = set()
+    unchanged_keys = set()
+    for table in tables:
+        key = (table['schema_name'], table['table_name'])
+        if key in seen_tables:
+            continue
+        seen_tables.add(key)
+        values = dict(table)
+        if key not in skip_keys:
+            values['content_hash'] = content_hash(table, columns_by_key.get(key, []))
+        old = existing_tables.get(key)
+        if old is None:
+            table_inserts.append(dict(db_id=db_id, updated_at=now, **values))
+            continue
+        if key in skip_keys or (old.get('content_hash') and old['content_hash'] == values['content_hash']):
+            unchanged_keys.add(key)
+        changes = _changed_fields(values, old, TABLE_FIELDS + ('content_hash',))
+        if changes:
+            table_updates.append(dict(id=old['id'], **changes))
+        if set(changes) & set(TABLE_FIELDS):
+            changed_keys.add(key)
+        if change_log is not None:
+            logged = {f: [old.get(f), changes[f]] for f in LOGGED_TABLE_FIELDS if f in changes}
+            if logged:
+                change_log.record(history.ALTER_TABLE, key[0], key[1], old['id'], detail=logged)
+
+    # 只加载需要比对字段的已有表的字段
+    if unchanged_keys or partial:
+        table_ids = [t['id'] for k, t in existing_tables.items() if k in seen_tables and k not in unchanged_keys]
+        existing_columns = load_existing_columns(db, Table, Column, db_id, table_ids)
+    else:
+        existing_columns = load_existing_columns(db, Table, Column, db_id)
+
+    if table_inserts:
+        db.session.execute(insert(Table), table_inserts)
+        # 重新加载表ID，供新表的字段记录使用
+        inserted_keys = [(t['schema_name'], t['table_name']) for t in table_inserts] if partial else None
+        for key, data in load_existing_tables(db, Table, db_id, inserted_keys).items():
+            existing_tables.setdefault(key, data)
+        stats['new_tables'] = len(table_inserts)
+        if change_log is not None:
+            for table in table_inserts:
+                key = (table['schema_name'], table['table_name'])
+                change_log.record(history.ADD_TABLE, key[0], key[1], existing_tables[key]['id'],
+                                  detail={'columns': len(columns_by_key.get(key, []))})
+    if table_updates:
+        db.session.execute(update(Table), table_updates)
+
+    # 2. 计算字段的新增、更新和删除
+    column_inserts = []
+    column_updates = []
+    synced_table_ids = {}
+    seen_columns = set()
+    new_table_keys = {(t['schema_name'], t['table_name']) for t in table_inserts}
+    for table in tables:
+        key = (table['schema_name'], table['table_name'])
+        if key in unchanged_keys:
+            # 字段未处理，计入处理字段数
+            if key not in skip_keys:
+                stats['total_columns'] += len(columns_by_key.get(key, []))
+            continue
+        if key in skip_keys:
+            continue
+        table_id = existing_tables[key]['id']
+        synced_table_ids[table_id] = key
+        log_columns = change_log is not None and key not in new_table_keys
+        for column in columns_by_key.get(key, []):
+            column_key = (table_id, column['column_name'])
+            if column_key in seen_columns:
+                continue
+            seen_columns.add(column_key)
+            stats['total_columns'] += 1
+
+            values = {f: column[f] for f in COLUMN_FIELDS if f in column}
+            old = existing_columns.get(column_key)
+            if old is None:
+                column_inserts.append(dict(table_id=table_id, column_name=column['column_name'], **values))
+                changed_keys.add(key)
+                if log_columns:
+                    change_log.record(history.ADD_COLUMN, key[0], key[1], table_id, column['column_name'], values)
+                continue
+            changes = _changed_fields(values, old, COLUMN_FIELDS)
+            if changes:
+                column_updates.append(dict(id=old['id'], **changes))
+                changed_keys.add(key)
+                if log_columns:
+                    change_log.record(history.ALTER_COLUMN, key[0], key[1], table_id, column['column_name'],
+                                      {f: [old.get(f), v] for f, v in changes.items()})
+
+    # 已同步的表中，源库已不存在的字段需要删除
+    column_deletes = []
+    for (table_id, column_name), old in existing_columns.items():
+        if table_id in synced_table_ids and (table_id, column_name) not in seen_columns:
+            column_deletes.append(old['id'])
+            key = synced_table_ids[table_id]
+            changed_keys.add(key)
+            if change_log is not None:
+                change_log.record(history.DROP_COLUMN, key[0], key[1], table_id, column_name,
+                                  {f: old.get(f) for f in COLUMN_FIELDS})
+
+    if column_inserts:
+        db.session.execute(insert(Column), column_inserts)
+    if column_updates:
+        db.session.execute(update(Column), column_updates)
+    for chunk in _chunks(column_deletes):
+        db.session.execute(delete(Column).where(Column.id.in_(chunk)))
+
+    inserted_keys = new_table_keys
+    changed_ids = [existing_tables[key]['id'] for key in changed_keys - inserted_keys]
+    for chunk in _chunks(changed_ids):
+        db.session.execute(update(Table).where(Table.id.in_(chunk)).values(updated_at=now).execution_options(synchronize_session=False))
+
+    stats['new_columns'] = len(column_inserts)
+    stats['updated_columns'] = len(column_updates)
+    stats['deleted_columns'] = len(column_deletes)
+    stats['skipped_tables'] = len(seen_tables & set(skip_keys))
+    stats['total_tables'] = len(seen_tables)
+    # 更新表数只统计已有且确实发生变化的表
+    stats['updated_tables'] = len(changed_keys - inserted_keys)
+    if change_log is not None:
+        change_log.flush()
+    return stats
+
+
+def delete_missing_tables(db, Table, Column, db_id, seen_keys, schema_names=None, change_log=None):
+    """
+    删除源库中已不存在的表及其字段
+    schema_names 为已完整同步的模式，只删除这些模式下不在 seen_keys 中的表；为空时检查该数据库的全部表
+    只负责写入会话，不提交事务，返回删除的表数
+    """
+    tables = select(Table.id, Table.schema_name, Table.table_name).where(Table.db_id == db_id)
+    if schema_names is None:
+        queries = [tables]
+    else:
+        queries = [tables.where(Table.schema_name.in_(chunk)) for chunk in _chunks(schema_names)]
+
+    missing = []
+    for query in queries:
+        for table_id, schema_name, table_name in db.session.execute(query):
+            if (schema_name, table_name) not in seen_keys:
+                missing.append((table_id, schema_name, table_name))
+
+    # 不依赖外键级联，先删除字段再删除表
+    for chunk in _chunks([table_id for table_id, _, _ in missing]):
+        db.session.execute(delete(Column).where(Column.table_id.in_(chunk)))
+        db.session.execute(delete(Table).where(Table.id.in_(chunk)).execution_options(synchronize_session=False))
+    if change_log is not None:
+        for table_id, schema_name, table_name in missing:
+            change_log.record(history.DROP_TABLE, schema_name, table_name, table_id)
+        change_log.flush()
+    return len(missing)
+
+
+def merge_stats(total, stats):
+    """累加分批同步的统计信息"""
+    if total is None:
+        return dict(stats)
+    for key, value in stats.items():
+        total[key] = total.get(key, 0) + value
+    return total
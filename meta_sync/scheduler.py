@@ -0,0 +1,209 @@
+import os
+import random
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+
+# 定时同步的结果状态
+QUEUED = 'queued'
+SUCCESS = 'success'
+ERROR = 'error'
+SKIPPED = 'skipped'
+UNREACHABLE = 'unreachable'
+
+
+def parse_window(value):
+    """解析时间段的 HH:MM，为空返回 None，格式错误抛出 ValueError"""
+    if not value:
+        return None
+    return datetime.strptime(value.strip(), '%H:%M').time()
+
+
+def in_window(moment, window_start, window_end):
+    """moment 是否在允许同步的时间段内；结束早于开始时跨零点，如 22:00-06:00"""
+    start, end = parse_window(window_start), parse_window(window_end)
+    if start is None or end is None or start == end:
+        return True
+    if start < end:
+        return start <= moment.time() < end
+    return moment.time() >= start or moment.time() < end
+
+
+def _window_seconds(start, end):
+    seconds = (end.hour * 60 + end.minute - start.hour * 60 - start.minute) * 60
+    return seconds if seconds > 0 else seconds + 86400
+
+
+def fit_window(moment, schedule):
+    """
+    把计划时间调整到时间段内：不在时间段内时推迟到下一次时间段开始后的随机时刻，
+    随机范围为时间段长度和同步间隔中较小的一个，避免同一时间段的数据库都在开始时同时同步
+    """
+    if in_window(moment, schedule.window_start, schedule.window_end):
+        return moment
+    start, end = parse_window(schedule.window_start), parse_window(schedule.window_end)
+    opening = datetime.combine(moment.date(), start)
+    if opening <= moment:
+        opening += timedelta(days=1)
+    spread = min(_window_seconds(start, end), schedule.interval_minutes * 60)
+    return opening + timedelta(seconds=random.uniform(0, spread))
+
+
+def first_run_at(schedule, now):
+    """开启定时同步或修改间隔后的首次同步时间：在一个间隔内随机分布，避免所有数据库在同一时刻同步"""
+    return fit_window(now + timedelta(seconds=random.uniform(0, schedule.interval_minutes * 60)), schedule)
+
+
+def next_run_at(schedule, now, failures=0, jitter=0.1, max_backoff_seconds=86400):
+    """
+    下次同步时间：间隔上下浮动 jitter 比例；连续失败 n 次时推迟为间隔的 2^n 倍，最长 max_backoff_seconds 秒
+    """
+    delay = schedule.interval_minutes * 60
+    if failures:
+        delay = max(delay, min(delay * 2 ** failures, max_backoff_seconds))
+    delay *= 1 + random.uniform(-jitter, jitter)
+    return fit_window(now + timedelta(seconds=delay), schedule)
+
+
+def load_schedules(db, SyncSchedule):
+    """全部数据库的定时同步设置 {db_id: 记录}"""
+    return {row.db_id: row for row in db.session.execute(select(SyncSchedule)).scalars()}
+
+
+def save_schedule(db, SyncSchedule, db_id, enabled, interval_minutes, window_start=None, window_end=None):
+    """
+    保存数据库的定时同步设置，由调用方提交
+    开启定时同步或修改了间隔、时间段时重新计算首次同步时间，连续失败次数清零
+    """
+    row = db.session.execute(select(SyncSchedule).where(SyncSchedule.db_id == db_id)).scalar_one_or_none()
+    if row is None:
+        row = SyncSchedule(db_id=db_id, failures=0)
+        db.session.add(row)
+    changed = (not row.enabled or row.interval_minutes != interval_minutes
+               or row.window_start != window_start or row.window_end != window_end)
+    row.enabled = enabled
+    row.interval_minutes = interval_minutes
+    row.window_start = window_start
+    row.window_end = window_end
+    if not enabled:
+        row.next_run_at = None
+    elif changed or row.next_run_at is None:
+        row.next_run_at = first_run_at(row, datetime.now())
+        row.failures = 0
+    return row
+
+
+def claim_due(db, SyncSchedule, token_factory, limit, jitter=0.1, max_backoff_seconds=86400):
+    """
+    抢占到期的定时同步，最多 limit 个，按计划时间先后
+    以条件更新 next_run_at 的方式抢占：只有 next_run_at 仍未到期前的值时才能更新成功，多个进程同时抢占同一记录只有一个成功
+    抢占时即把 next_run_at 设为下一次的时间，进程在同步中途退出时按原间隔继续；同步失败后由 finish_run 推迟
+    返回 [(db_id, token)]
+    """
+    if limit <= 0:
+        return []
+    now = datetime.now()
+    due = db.session.execute(
+        select(SyncSchedule)
+        .where(SyncSchedule.enabled.is_(True), SyncSchedule.next_run_at <= now)
+        .order_by(SyncSchedule.next_run_at)
+        .limit(limit)
+    ).scalars().all()
+    # 每次抢占后提交会使会话中的记录过期，条件更新使用读取时的计划时间
+    due = [(schedule, schedule.next_run_at) for schedule in due]
+
+    claimed = []
+    for schedule, due_at in due:
+        # 不在时间段内（如修改了时间段）时只调整计划时间，不触发同步
+        if not in_window(now, schedule.window_start, schedule.window_end):
+            values = {'next_run_at': fit_window(now, schedule)}
+        else:
+            token = token_factory()
+            values = {
+                'next_run_at': next_run_at(schedule, now, schedule.failures or 0, jitter, max_backoff_seconds),
+                'last_run_at': now, 'last_status': QUEUED, 'last_message': None, 'token': token,
+            }
+        result = db.session.execute(
+            update(SyncSchedule)
+            .where(SyncSchedule.id == schedule.id, SyncSchedule.enabled.is_(True),
+                   SyncSchedule.next_run_at == due_at)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount == 1 and 'token' in values:
+            claimed.append((schedule.db_id, values['token']))
+    return claimed
+
+
+def finish_run(db, SyncSchedule, db_id, token, status, message=None, jitter=0.1, max_backoff_seconds=86400):
+    """
+    记录定时同步的结果，只更新由 token 触发的那一次（手动同步不影响定时设置）
+    失败（error、unreachable）时连续失败次数加1并推迟下次同步，成功时清零，skipped（同步中、冷却期内）不改变次数
+    """
+    schedule = db.session.execute(
+        select(SyncSchedule).where(SyncSchedule.db_id == db_id, SyncSchedule.token == token)
+        .execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+    if schedule is None:
+        return
+    values = {'last_status': status, 'last_message': (message or '')[:1024] or None}
+    if status == SUCCESS:
+        values['failures'] = 0
+    elif status in (ERROR, UNREACHABLE):
+        failures = (schedule.failures or 0) + 1
+        values['failures'] = failures
+        if schedule.enabled:
+            values['next_run_at'] = next_run_at(schedule, datetime.now(), failures, jitter, max_backoff_seconds)
+    db.session.execute(
+        update(SyncSchedule)
+        .where(SyncSchedule.id == schedule.id, SyncSchedule.token == token)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+class Scheduler:
+    """
+    定时同步线程：每隔约 poll_seconds 秒调用一次 tick
+    - 多进程服务的每个工作进程各启动一个线程，由 claim_due 的条件更新保证同一次同步只由一个进程触发
+    - 首次检查前随机等待，各进程的检查时间错开
+    - 线程不会随 fork 复制，按进程号判断当前进程是否已启动
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self, tick, poll_seconds=30):
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(tick, poll_seconds), name='sync-scheduler',
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def running(self):
+        return self._pid == os.getpid() and self._thread is not None and self._thread.is_alive()
+
+    def _run(self, tick, poll_seconds):
+        if self._stop.wait(random.uniform(0, poll_seconds)):
+            return
+        while True:
+            try:
+                tick()
+            except Exception:
+                traceback.print_exc()
+            if self._stop.wait(poll_seconds * random.uniform(0.8, 1.2)):
+                return
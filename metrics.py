@@ -0,0 +1,173 @@
+"""
+Prometheus 指标，由 /metrics 以文本格式输出，不依赖 prometheus_client
+- 指标保存在进程内，多进程部署时每个进程分别暴露自己的指标，由 Prometheus 按实例汇总
+- 同步相关指标按数据库类型和数据库ID区分，可据此定位较慢的源库和耗时增长的阶段
+"""
+import threading
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} 的标签应为 {self.labelnames}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """只增不减的计数"""
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in items]
+
+
+class Gauge(_Metric):
+    """当前值；set_function 设置后每次输出时调用函数取值"""
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            return [f'{self.name} {_format_value(self._function())}']
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in items]
+
+
+class Histogram(_Metric):
+    """按上界分桶统计的观测值分布，同时输出总和与次数"""
+    type = 'histogram'
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+REGISTRY = []
+
+
+def render():
+    """全部指标的 Prometheus 文本格式"""
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+# ---- 指标定义 ----
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'meta_http_request_duration_seconds', '请求处理耗时（秒）', ['endpoint', 'method', 'status'])
+
+SYNC_SECONDS = Histogram(
+    'meta_sync_duration_seconds', '同步总耗时（秒）', ['db_type', 'db_id', 'status'],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 900, 1800, 3600))
+
+SYNC_PHASE_SECONDS = Histogram(
+    'meta_sync_phase_duration_seconds', '同步各阶段耗时（秒）：connect、fetch_tables、fetch_columns、reconcile、write、commit',
+    ['db_type', 'db_id', 'phase'], buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800))
+
+SYNC_SOURCE_QUERY_SECONDS = Histogram(
+    'meta_sync_source_query_duration_seconds', '同步时源库查询耗时（秒），_count 为查询次数', ['db_type', 'db_id'],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60))
+
+SYNC_ROWS = Counter(
+    'meta_sync_rows_total', '同步写入元数据库的行数', ['db_type', 'db_id', 'table', 'operation'])
+
+SYNC_QUEUE_DEPTH = Gauge('meta_sync_queue_depth', '本进程排队中的同步任务数')
+
+SYNC_RUNNING = Gauge('meta_sync_running', '本进程执行中的同步任务数')
+
+
+def record_sync(db_type, db_id, success, timer):
+    """记录一次同步的耗时、各阶段耗时、源库查询和写入行数，timer 为 meta_sync.instrument.SyncTimer"""
+    labels = {'db_type': db_type, 'db_id': db_id}
+    SYNC_SECONDS.observe(timer.elapsed, status='success' if success else 'error', **labels)
+    for phase, seconds in timer.phases.items():
+        SYNC_PHASE_SECONDS.observe(seconds, phase=phase, **labels)
+    for seconds in timer.source_queries:
+        SYNC_SOURCE_QUERY_SECONDS.observe(seconds, **labels)
+    for (table, operation), rows in timer.rows.items():
+        SYNC_ROWS.inc(rows, table=table, operation=operation, **labels)
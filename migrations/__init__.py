@@ -0,0 +1,97 @@
+"""
+元数据库版本化迁移
+- 每个迁移是本目录下的 vNNN_xxx.py 模块，定义 VERSION、DESCRIPTION 和 upgrade(conn)
+- 已执行的版本记录在 tb_schema_version 中，upgrade 只执行未记录的版本，每个版本在一个事务中执行并记录
+- 迁移在执行前检查表/字段/索引是否已存在，在已是最新结构的库（如由 create_tables.*.sql 新建）上执行也不会出错；
+  MySQL 的 DDL 会隐式提交，迁移中途失败后重新执行即可从失败处继续
+支持 SQLite、MySQL、PostgreSQL，由 setup_db.py 执行
+"""
+import importlib
+import pkgutil
+from datetime import datetime
+
+from sqlalchemy import inspect, select, insert, text
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime
+
+
+# 迁移版本记录表
+schema_version = Table(
+    'tb_schema_version', MetaData(),
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('description', String(255)),
+    Column('applied_at', DateTime),
+)
+
+
+def load_migrations():
+    """按版本号顺序返回全部迁移模块"""
+    modules = []
+    for info in pkgutil.iter_modules(__path__):
+        if info.name.startswith('v'):
+            modules.append(importlib.import_module(f'{__name__}.{info.name}'))
+    modules.sort(key=lambda module: module.VERSION)
+    versions = [module.VERSION for module in modules]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f'迁移版本号重复: {versions}')
+    return modules
+
+
+def applied_versions(conn):
+    """已执行的迁移版本"""
+    if not inspect(conn).has_table(schema_version.name):
+        return set()
+    return set(conn.execute(select(schema_version.c.version)).scalars())
+
+
+def pending_migrations(engine):
+    """尚未执行的迁移"""
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+    return [module for module in load_migrations() if module.VERSION not in applied]
+
+
+def upgrade(engine, log=print):
+    """执行全部未执行的迁移，返回本次执行的版本号列表"""
+    with engine.begin() as conn:
+        schema_version.create(conn, checkfirst=True)
+
+    done = []
+    for module in pending_migrations(engine):
+        log(f"执行迁移 {module.VERSION:03d}: {module.DESCRIPTION}")
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(insert(schema_version).values(
+                version=module.VERSION, description=module.DESCRIPTION, applied_at=datetime.now(),
+            ))
+        done.append(module.VERSION)
+    return done
+
+
+# ---- 迁移中使用的结构检查函数，每次调用重新读取，反映同一事务中已执行的变更 ----
+
+def has_table(conn, table_name):
+    return inspect(conn).has_table(table_name)
+
+
+def has_column(conn, table_name, column_name):
+    return any(column['name'] == column_name for column in inspect(conn).get_columns(table_name))
+
+
+def has_index(conn, table_name, index_name):
+    """索引或唯一约束是否存在（MySQL/PostgreSQL 的唯一约束也会以索引的形式出现）"""
+    inspector = inspect(conn)
+    names = {index['name'] for index in inspector.get_indexes(table_name)}
+    names |= {constraint['name'] for constraint in inspector.get_unique_constraints(table_name)}
+    return index_name in names
+
+
+def has_foreign_key(conn, table_name, referred_table):
+    return any(fk['referred_table'] == referred_table for fk in inspect(conn).get_foreign_keys(table_name))
+
+
+def add_column(conn, table_name, column_name, column_type, default=None):
+    """添加字段，column_type 为 SQLAlchemy 类型，按当前数据库方言生成字段类型"""
+    ddl = f'ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type.compile(dialect=conn.dialect)}'
+    if default is not None:
+        ddl += f' DEFAULT {default}'
+    conn.execute(text(ddl))
@@ -0,0 +1,27 @@
+"""
+补齐早期版本部署中缺少的表和字段
+缺少的表按当前模型创建，PostgreSQL 没有建表脚本，新建的库直接由此创建全部表
+"""
+from sqlalchemy import Boolean, String, Text
+
+from migrations import has_column, add_column
+
+VERSION = 1
+DESCRIPTION = '补齐缺少的表和字段（tb_sync_job、sync_marker、is_partition、phase、checkpoint）'
+
+# (表名, 字段名, 字段类型, 默认值)
+COLUMNS = [
+    ('tb_table', 'sync_marker', String(64), None),
+    ('tb_column', 'is_partition', Boolean(), 'FALSE'),
+    ('tb_sync_job', 'phase', String(20), None),
+    ('tb_sync_job', 'checkpoint', Text(), None),
+]
+
+
+def upgrade(conn):
+    from models import db
+    db.metadata.create_all(conn, checkfirst=True)
+
+    for table_name, column_name, column_type, default in COLUMNS:
+        if not has_column(conn, table_name, column_name):
+            add_column(conn, table_name, column_name, column_type, default)
@@ -0,0 +1,23 @@
+"""
+创建表/字段搜索索引（SQLite FTS5、MySQL FULLTEXT、PostgreSQL pg_trgm）
+索引创建失败（SQLite 不支持 trigram 分词、没有创建 pg_trgm 扩展的权限等）时不中断迁移，搜索回退为 LIKE 查询
+"""
+VERSION = 2
+DESCRIPTION = '创建表/字段搜索索引'
+
+
+def upgrade(conn):
+    import search
+    backend = search.SEARCH_BACKENDS.get(conn.dialect.name)
+    if backend is None:
+        return
+    # PostgreSQL 中语句失败后整个事务不可用，在保存点中执行；MySQL 的 DDL 会隐式提交，不能使用保存点
+    savepoint = conn.begin_nested() if conn.dialect.name == 'postgresql' else None
+    try:
+        backend(None).create_index(conn)
+        if savepoint is not None:
+            savepoint.commit()
+    except Exception as e:
+        if savepoint is not None:
+            savepoint.rollback()
+        print(f"搜索索引创建失败，搜索将回退为LIKE查询: {e}")
@@ -0,0 +1,76 @@
+"""
+tb_table、tb_column 添加组合唯一索引，覆盖页面查询和同步比对使用的查询条件：
+- uk_table_name (db_id, schema_name, table_name)：按数据库加载表、表信息页按模式名+表名查询
+- idx_db_table_name (db_id, table_name)：表列表按表名游标分页
+- uk_column_name (table_id, column_name)：按表加载字段、字段比对
+建唯一索引前删除重复记录，每组保留ID最小的一条（重复的表连同其字段一起删除）
+"""
+from sqlalchemy import text
+
+from migrations import has_index
+
+VERSION = 3
+DESCRIPTION = 'tb_table/tb_column 添加组合唯一索引'
+
+INDEXES = [
+    ('tb_table', 'uk_table_name', 'CREATE UNIQUE INDEX uk_table_name ON tb_table (db_id, schema_name, table_name)'),
+    ('tb_table', 'idx_db_table_name', 'CREATE INDEX idx_db_table_name ON tb_table (db_id, table_name)'),
+    ('tb_column', 'uk_column_name', 'CREATE UNIQUE INDEX uk_column_name ON tb_column (table_id, column_name)'),
+]
+
+# 被组合索引覆盖的旧索引（MySQL 建表脚本中的单列索引）
+REDUNDANT_INDEXES = [
+    ('tb_table', 'idx_db_id'),
+    ('tb_column', 'idx_table_id'),
+]
+
+
+def _delete_duplicate_tables(conn):
+    groups = conn.execute(text("""
+    SELECT db_id, schema_name, table_name, MIN(id) FROM tb_table
+    GROUP BY db_id, schema_name, table_name HAVING COUNT(*) > 1
+    """)).fetchall()
+    for db_id, schema_name, table_name, keep_id in groups:
+        schema_filter = 'schema_name IS NULL' if schema_name is None else 'schema_name = :schema_name'
+        ids = conn.execute(text(f"""
+        SELECT id FROM tb_table
+        WHERE db_id = :db_id AND {schema_filter} AND table_name = :table_name AND id <> :keep_id
+        """), {'db_id': db_id, 'schema_name': schema_name, 'table_name': table_name, 'keep_id': keep_id}).scalars().all()
+        for table_id in ids:
+            conn.execute(text('DELETE FROM tb_column WHERE table_id = :table_id'), {'table_id': table_id})
+            conn.execute(text('DELETE FROM tb_table WHERE id = :table_id'), {'table_id': table_id})
+        print(f"删除重复的表 {schema_name}.{table_name}（数据库 {db_id}）{len(ids)} 条")
+
+
+def _delete_duplicate_columns(conn):
+    groups = conn.execute(text("""
+    SELECT table_id, column_name, MIN(id) FROM tb_column
+    GROUP BY table_id, column_name HAVING COUNT(*) > 1
+    """)).fetchall()
+    for table_id, column_name, keep_id in groups:
+        conn.execute(text("""
+        DELETE FROM tb_column WHERE table_id = :table_id AND column_name = :column_name AND id <> :keep_id
+        """), {'table_id': table_id, 'column_name': column_name, 'keep_id': keep_id})
+    if groups:
+        print(f"删除重复的字段 {len(groups)} 组")
+
+
+def upgrade(conn):
+    if not has_index(conn, 'tb_table', 'uk_table_name'):
+        _delete_duplicate_tables(conn)
+    if not has_index(conn, 'tb_column', 'uk_column_name'):
+        _delete_duplicate_columns(conn)
+
+    for table_name, index_name, ddl in INDEXES:
+        if not has_index(conn, table_name, index_name):
+            conn.execute(text(ddl))
+
+    # 更新统计信息，查询优化器据此判断按 db_id 查询时使用索引还是全表扫描（MySQL 建索引时自动更新）
+    if conn.dialect.name in ('sqlite', 'postgresql'):
+        conn.execute(text('ANALYZE tb_table'))
+        conn.execute(text('ANALYZE tb_column'))
+
+    if conn.dialect.name == 'mysql':
+        for table_name, index_name in REDUNDANT_INDEXES:
+            if has_index(conn, table_name, index_name):
+                conn.execute(text(f'DROP INDEX {index_name} ON {table_name}'))
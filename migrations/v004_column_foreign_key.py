@@ -0,0 +1,55 @@
+"""
+tb_column.table_id 添加外键 fk_column_table 引用 tb_table.id，删除表时级联删除其字段
+添加前删除所属表已不存在的字段；SQLite 不支持给已有的表添加外键，按官方推荐的方式重建 tb_column
+"""
+from sqlalchemy import text
+
+from migrations import has_foreign_key, has_table
+
+VERSION = 4
+DESCRIPTION = 'tb_column 添加外键 ON DELETE CASCADE'
+
+SQLITE_COLUMNS = 'id, table_id, column_name, column_type, is_primary, is_unique, is_partition, column_comment, ordinal_position'
+
+SQLITE_REBUILD = [
+    """
+    CREATE TABLE tb_column_new (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      table_id INTEGER NOT NULL REFERENCES tb_table (id) ON DELETE CASCADE,
+      column_name TEXT NOT NULL,
+      column_type TEXT NOT NULL,
+      is_primary INTEGER DEFAULT 0,
+      is_unique INTEGER DEFAULT 0,
+      is_partition INTEGER DEFAULT 0,
+      column_comment TEXT DEFAULT NULL,
+      ordinal_position INTEGER DEFAULT NULL
+    )
+    """,
+    f"INSERT INTO tb_column_new ({SQLITE_COLUMNS}) SELECT {SQLITE_COLUMNS} FROM tb_column",
+    "DROP TABLE tb_column",
+    "ALTER TABLE tb_column_new RENAME TO tb_column",
+    "CREATE UNIQUE INDEX uk_column_name ON tb_column (table_id, column_name)",
+]
+
+
+def upgrade(conn):
+    if has_foreign_key(conn, 'tb_column', 'tb_table'):
+        return
+
+    conn.execute(text("""
+    DELETE FROM tb_column WHERE NOT EXISTS (SELECT 1 FROM tb_table t WHERE t.id = tb_column.table_id)
+    """))
+
+    if conn.dialect.name != 'sqlite':
+        conn.execute(text("""
+        ALTER TABLE tb_column ADD CONSTRAINT fk_column_table
+        FOREIGN KEY (table_id) REFERENCES tb_table (id) ON DELETE CASCADE
+        """))
+        return
+
+    for ddl in SQLITE_REBUILD:
+        conn.execute(text(ddl))
+    # 重建后字段ID不变，字段搜索索引的内容仍然有效，只需重新创建随旧表删除的索引和触发器
+    if has_table(conn, 'tb_column_fts'):
+        import search
+        search.SqliteFtsSearch(None).create_index(conn)
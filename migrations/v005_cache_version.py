@@ -0,0 +1,12 @@
+"""tb_database 添加页面缓存版本 cache_version，元数据变化时加1"""
+from sqlalchemy import Integer
+
+from migrations import has_column, add_column
+
+VERSION = 5
+DESCRIPTION = 'tb_database 添加页面缓存版本 cache_version'
+
+
+def upgrade(conn):
+    if not has_column(conn, 'tb_database', 'cache_version'):
+        add_column(conn, 'tb_database', 'cache_version', Integer(), '0')
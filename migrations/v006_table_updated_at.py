@@ -0,0 +1,20 @@
+"""
+tb_table 添加 updated_at（同步时表或字段最近一次变化的时间）及 (db_id, updated_at) 索引
+已有记录的 updated_at 取迁移时间
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, text
+
+from migrations import has_column, has_index, add_column
+
+VERSION = 6
+DESCRIPTION = 'tb_table 添加 updated_at 及索引'
+
+
+def upgrade(conn):
+    if not has_column(conn, 'tb_table', 'updated_at'):
+        add_column(conn, 'tb_table', 'updated_at', DateTime())
+        conn.execute(text('UPDATE tb_table SET updated_at = :now WHERE updated_at IS NULL'), {'now': datetime.now()})
+    if not has_index(conn, 'tb_table', 'idx_db_updated_at'):
+        conn.execute(text('CREATE INDEX idx_db_updated_at ON tb_table (db_id, updated_at)'))
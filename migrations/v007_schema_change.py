@@ -0,0 +1,19 @@
+"""
+tb_table 添加内容哈希 content_hash，新建表结构变更历史表 tb_schema_change
+已有表的 content_hash 为空，下次同步时完整比对字段后写入
+"""
+from sqlalchemy import String
+
+from migrations import has_column, add_column
+
+VERSION = 7
+DESCRIPTION = 'tb_table 添加 content_hash，新建 tb_schema_change'
+
+
+def upgrade(conn):
+    from models import SchemaChange
+
+    if not has_column(conn, 'tb_table', 'content_hash'):
+        add_column(conn, 'tb_table', 'content_hash', String(32))
+    # 表不存在时连同索引一起创建
+    SchemaChange.__table__.create(conn, checkfirst=True)
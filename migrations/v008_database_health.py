@@ -0,0 +1,10 @@
+"""新建数据库连接检查结果表 tb_database_health"""
+
+VERSION = 8
+DESCRIPTION = '新建 tb_database_health'
+
+
+def upgrade(conn):
+    from models import DatabaseHealth
+
+    DatabaseHealth.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,10 @@
+"""新建定时同步设置表 tb_sync_schedule"""
+
+VERSION = 9
+DESCRIPTION = '新建 tb_sync_schedule'
+
+
+def upgrade(conn):
+    from models import SyncSchedule
+
+    SyncSchedule.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,58 @@
+"""
+MySQL 元数据库的模式名、表名、字段名改为区分大小写的 utf8mb4_bin 排序规则
+utf8mb4_unicode_ci 下 uk_table_name、uk_column_name 不区分大小写（也不区分重音和末尾空格），源库中只有大小写不同的表或字段
+（如 User 和 user）同步时违反唯一索引，表名、字段名只改了大小写时也会被当作新增而同步失败
+全文索引的各字段排序规则必须相同，全文索引改为建在不区分大小写的生成列 table_name_ci、column_name_ci 上，搜索仍不区分大小写
+SQLite、PostgreSQL 的文本比较本来就区分大小写，不需要修改
+"""
+from sqlalchemy import text
+
+VERSION = 10
+DESCRIPTION = 'MySQL 表名、字段名改为区分大小写'
+
+# 表名 -> (全文索引名, [(字段名, 字段定义)])
+BINARY_COLUMNS = {
+    'tb_table': ('ft_table_search', [
+        ('schema_name', "varchar(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin DEFAULT NULL COMMENT '模式名'"),
+        ('table_name', "varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL COMMENT '表名'"),
+    ]),
+    'tb_column': ('ft_column_search', [
+        ('column_name', "varchar(100) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL COMMENT '字段名'"),
+    ]),
+}
+
+
+def _collations(conn, table_name):
+    return dict(conn.execute(text("""
+    SELECT COLUMN_NAME, COLLATION_NAME FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name
+    """), {'table_name': table_name}).fetchall())
+
+
+def _index_columns(conn, table_name, index_name):
+    return set(conn.execute(text("""
+    SELECT COLUMN_NAME FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name AND INDEX_NAME = :index_name
+    """), {'table_name': table_name, 'index_name': index_name}).scalars())
+
+
+def upgrade(conn):
+    if conn.dialect.name != 'mysql':
+        return
+    import search
+
+    for table_name, (fulltext_index, columns) in BINARY_COLUMNS.items():
+        collations = _collations(conn, table_name)
+        pending = [(column_name, ddl) for column_name, ddl in columns if collations.get(column_name) != 'utf8mb4_bin']
+        if not pending:
+            continue
+        # 旧的全文索引包含表名/字段名，改排序规则前删除，由下面的 create_index 在生成列上重建
+        if _index_columns(conn, table_name, fulltext_index) & {column_name for column_name, _ in pending}:
+            conn.execute(text(f'DROP INDEX {fulltext_index} ON {table_name}'))
+        conn.execute(text(f'ALTER TABLE {table_name} ' + ', '.join(f'MODIFY {name} {ddl}' for name, ddl in pending)))
+
+    # 添加生成列、重建全文索引
+    try:
+        search.MysqlFulltextSearch(None).create_index(conn)
+    except Exception as e:
+        print(f"搜索索引创建失败，搜索将回退为LIKE查询: {e}")
@@ -16,11 +16,45 @@ class Database(db.Model):
     db_user = db.Column(db.String(100), nullable=False)
     db_password = db.Column(db.String(100), nullable=False)
     remark = db.Column(db.String(512), nullable=True)  # 新增备注字段
+    cache_version = db.Column(db.Integer, default=0)  # 页面缓存版本，元数据变化时加1
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
+class DatabaseHealth(db.Model):
+    __tablename__ = 'tb_database_health'
+    id = db.Column(db.Integer, primary_key=True)
+    db_id = db.Column(db.Integer, nullable=False, unique=True)  # 每个数据库一条记录，保存最近一次连接检查的结果
+    status = db.Column(db.String(20))  # ok、error、unsupported（不支持同步的类型不检查）
+    latency_ms = db.Column(db.Integer)  # 最近一次成功建立连接的耗时（毫秒）
+    checked_at = db.Column(db.DateTime)
+    last_success_at = db.Column(db.DateTime)
+    last_error = db.Column(db.String(1024))
+    last_error_at = db.Column(db.DateTime)
+    failures = db.Column(db.Integer, default=0)  # 连续失败次数
+
+class SyncSchedule(db.Model):
+    __tablename__ = 'tb_sync_schedule'
+    id = db.Column(db.Integer, primary_key=True)
+    db_id = db.Column(db.Integer, nullable=False, unique=True)  # 每个数据库一条定时同步设置
+    enabled = db.Column(db.Boolean, default=False)
+    interval_minutes = db.Column(db.Integer, nullable=False, default=1440)  # 同步间隔（分钟）
+    window_start = db.Column(db.String(5))  # 允许同步的时间段 HH:MM，为空时不限制；结束早于开始时跨零点
+    window_end = db.Column(db.String(5))
+    next_run_at = db.Column(db.DateTime, index=True)  # 下次同步时间，各进程以条件更新该字段抢占
+    last_run_at = db.Column(db.DateTime)
+    last_status = db.Column(db.String(20))  # queued、success、error、skipped、unreachable
+    last_message = db.Column(db.String(1024))
+    failures = db.Column(db.Integer, default=0)  # 连续失败次数，失败后按间隔的 2^n 倍推迟
+    token = db.Column(db.String(16))  # 最近一次定时触发的同步任务
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
 class Table(db.Model):
     __tablename__ = 'tb_table'
+    __table_args__ = (
+        db.Index('uk_table_name', 'db_id', 'schema_name', 'table_name', unique=True),
+        db.Index('idx_db_table_name', 'db_id', 'table_name'),  # 表列表按 (table_name, id) 游标分页
+        db.Index('idx_db_updated_at', 'db_id', 'updated_at'),  # 按更新时间增量拉取
+    )
     id = db.Column(db.Integer, primary_key=True)
     db_id = db.Column(db.Integer, nullable=False)
     schema_name = db.Column(db.String(64), nullable=True)
@@ -29,18 +63,63 @@ class Table(db.Model):
     remark = db.Column(db.String(512))
     create_time = db.Column(db.DateTime)
     update_time = db.Column(db.DateTime)
+    sync_marker = db.Column(db.String(64))  # 源库变更标记，增量同步时用于跳过未变化的表
+    updated_at = db.Column(db.DateTime)  # 同步时表或字段最近一次发生变化的时间
+    content_hash = db.Column(db.String(32))  # 表注释和全部字段信息的哈希，与源库一致时同步不再比对和写入字段
     
     # 关系
-    columns = db.relationship('Column', backref='table', lazy=True)
+    columns = db.relationship('Column', backref='table', lazy=True, passive_deletes=True)  # 字段由外键级联删除
 
 class Column(db.Model):
     __tablename__ = 'tb_column'
+    __table_args__ = (
+        db.Index('uk_column_name', 'table_id', 'column_name', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    table_id = db.Column(db.Integer, db.ForeignKey('tb_table.id'), nullable=False)
+    table_id = db.Column(db.Integer, db.ForeignKey('tb_table.id', name='fk_column_table', ondelete='CASCADE'), nullable=False)
     column_name = db.Column(db.String(100), nullable=False)
     column_type = db.Column(db.String(100), nullable=False)
     is_primary = db.Column(db.Boolean, default=False)
     is_unique = db.Column(db.Boolean, default=False)
+    is_partition = db.Column(db.Boolean, default=False)  # 是否分区字段（Hive）
     column_comment = db.Column(db.String(255))
     ordinal_position = db.Column(db.Integer)
 
+class SchemaChange(db.Model):
+    __tablename__ = 'tb_schema_change'
+    __table_args__ = (
+        db.Index('idx_change_db', 'db_id', 'id'),  # 按数据库查询变更历史
+        db.Index('idx_change_table', 'db_id', 'schema_name', 'table_name', 'id'),  # 按表查询变更历史
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    db_id = db.Column(db.Integer, nullable=False)
+    table_id = db.Column(db.Integer)  # 不设外键，表删除后保留历史
+    schema_name = db.Column(db.String(64))
+    table_name = db.Column(db.String(100), nullable=False)
+    column_name = db.Column(db.String(100))  # 表级变更为空
+    change_type = db.Column(db.String(20), nullable=False)  # add_table、drop_table、alter_table、add_column、drop_column、alter_column
+    detail = db.Column(db.Text)  # 变更内容（JSON），修改时为 {字段: [旧值, 新值]}
+    sync_token = db.Column(db.String(16))  # 产生变更的同步任务
+    changed_at = db.Column(db.DateTime, default=datetime.now)
+
+class SyncJob(db.Model):
+    __tablename__ = 'tb_sync_job'
+    id = db.Column(db.Integer, primary_key=True)
+    db_id = db.Column(db.Integer, nullable=False, unique=True)  # 每个数据库一条记录，保存当前/最近一次同步任务
+    status = db.Column(db.String(20), nullable=False, default='none')  # none、queued、loading、success、error
+    phase = db.Column(db.String(20))  # 执行阶段：connect、fetch_tables、fetch_columns、write
+    token = db.Column(db.String(16))
+    full_sync = db.Column(db.Boolean, default=False)
+    worker = db.Column(db.String(100))  # 执行任务的进程（主机名:进程号）
+    queued_at = db.Column(db.DateTime)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)  # 最近一次状态更新时间，用于识别进程退出后遗留的任务
+    tables_total = db.Column(db.Integer, default=0)
+    tables_done = db.Column(db.Integer, default=0)
+    columns_done = db.Column(db.Integer, default=0)
+    new_tables = db.Column(db.Integer, default=0)
+    updated_tables = db.Column(db.Integer, default=0)
+    message = db.Column(db.String(1024))
+    error = db.Column(db.Text)
+    checkpoint = db.Column(db.Text)  # 分批同步的断点（JSON），同步成功后清空
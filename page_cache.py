@@ -0,0 +1,93 @@
+"""
+页面响应缓存
+元数据只在同步、修改表备注、修改数据库信息时变化，数据表页和表信息页读多写少，渲染模板是主要开销：
+- 渲染结果按 (路由, 数据库ID, 数据库缓存版本, 请求路径) 缓存在进程内，按条数和总字节数限制，超出后淘汰最久未使用的
+- 缓存版本保存在 tb_database.cache_version，元数据变化时加1，各进程读到新版本后自然不再命中旧缓存
+- 响应带 ETag（页面内容的哈希），浏览器再次请求时内容未变化直接返回 304
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, make_response, request
+
+
+class PageCache:
+    """线程安全的 LRU 页面缓存，值为 (etag, 页面内容)"""
+
+    def __init__(self, max_entries=1000, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, max_entries=1000, max_bytes=64 * 1024 * 1024):
+        """按配置文件修改缓存上限，清空已有缓存"""
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self._entries.clear()
+            self._bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, body):
+        """缓存页面内容，返回 (etag, 页面内容)；超过总字节数上限的页面不缓存"""
+        entry = (hashlib.md5(body).hexdigest(), body)
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted[1])
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def cached(self, version_of):
+        """
+        路由装饰器：缓存 GET 请求渲染的页面并支持 ETag/304
+        version_of(db_id) 返回数据库的缓存版本，数据库不存在时返回 None，此时不使用缓存
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(db_id, **kwargs):
+                version = version_of(db_id)
+                if version is None:
+                    return view(db_id, **kwargs)
+                key = (request.endpoint, db_id, version, request.full_path)
+                entry = self.get(key)
+                if entry is None:
+                    response = make_response(view(db_id, **kwargs))
+                    # 只缓存正常渲染的页面，404、跳转等直接返回
+                    if response.status_code != 200:
+                        return response
+                    entry = self.put(key, response.get_data())
+                etag, body = entry
+                response = Response(body, mimetype='text/html')
+                response.set_etag(etag)
+                # 浏览器每次都向服务端确认，内容未变化时返回 304
+                response.headers['Cache-Control'] = 'no-cache'
+                return response.make_conditional(request)
+            return wrapper
+        return decorator
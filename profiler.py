@@ -0,0 +1,118 @@
+"""
+按需性能剖析，用于定位生产环境中较慢的页面和同步
+- 使用 cProfile 剖析按比例抽样的请求、带剖析口令的请求，以及指定数据库或带口令触发的同步
+- 结果保存为 pstats 文件（可用 python -m pstats、snakeviz 等查看）和按累计耗时排序的文本摘要，
+  目录中最多保留 keep 份，超出后删除最早的
+- 未开启时不注册任何请求钩子，没有额外开销
+cProfile 只剖析当前线程，同一时间只剖析一个请求或同步，其余的跳过（同步时并行拉取线程中的耗时体现为等待队列）
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+from datetime import datetime
+
+
+# 文件名：时间_类型_名称_耗时ms.pstats
+_FILE_PATTERN = re.compile(r'^(\d{8}-\d{6}-\d{6})_(request|sync)_(.+)_(\d+)ms\.pstats$')
+_NAME_PATTERN = re.compile(r'[^\w.-]+')
+
+# 文本摘要中的函数数
+_REPORT_LINES = 60
+
+
+class Profiler:
+    """剖析结果保存在 directory 中，最多保留 keep 份"""
+
+    def __init__(self, directory=None, keep=50):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def configure(self, directory, keep=50):
+        self.directory = directory
+        self.keep = keep
+
+    def start(self):
+        """开始剖析当前线程，已有剖析进行中时返回 None"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except Exception:
+            self._lock.release()
+            raise
+        return profile
+
+    def stop(self, profile, kind, name, seconds):
+        """结束剖析并保存结果，返回文件名"""
+        try:
+            profile.disable()
+        finally:
+            self._lock.release()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        filename = f"{stamp}_{kind}_{_NAME_PATTERN.sub('-', name).strip('-')[:80]}_{int(seconds * 1000)}ms.pstats"
+        path = os.path.join(self.directory, filename)
+        profile.dump_stats(path)
+        with open(path[:-len('.pstats')] + '.txt', 'w', encoding='utf-8') as report:
+            report.write(self._report(profile))
+        self._prune()
+        return filename
+
+    @staticmethod
+    def _report(source):
+        """按累计耗时排序的文本摘要，source 为 Profile 或 pstats 文件路径"""
+        output = io.StringIO()
+        pstats.Stats(source, stream=output).sort_stats('cumulative').print_stats(_REPORT_LINES)
+        return output.getvalue()
+
+    def _prune(self):
+        """删除超出保留份数的最早结果"""
+        filenames = sorted(name for name in os.listdir(self.directory) if _FILE_PATTERN.match(name))
+        for filename in filenames[:max(len(filenames) - self.keep, 0)]:
+            for path in (filename, filename[:-len('.pstats')] + '.txt'):
+                try:
+                    os.remove(os.path.join(self.directory, path))
+                except FileNotFoundError:
+                    pass
+
+    def list(self):
+        """已保存的剖析结果，按时间倒序"""
+        if not os.path.isdir(self.directory):
+            return []
+        records = []
+        for filename in sorted(os.listdir(self.directory), reverse=True):
+            match = _FILE_PATTERN.match(filename)
+            if match is None:
+                continue
+            records.append({
+                'filename': filename,
+                'created_at': datetime.strptime(match.group(1), '%Y%m%d-%H%M%S-%f'),
+                'kind': match.group(2),
+                'name': match.group(3),
+                'milliseconds': int(match.group(4)),
+                'size': os.path.getsize(os.path.join(self.directory, filename)),
+            })
+        return records
+
+    def path(self, filename):
+        """剖析结果文件的路径，文件名不合法或不存在时返回 None"""
+        if os.path.basename(filename) != filename or _FILE_PATTERN.match(filename) is None:
+            return None
+        path = os.path.join(self.directory, filename)
+        return path if os.path.isfile(path) else None
+
+    def report(self, filename):
+        """剖析结果的文本摘要，不存在时返回 None"""
+        path = self.path(filename)
+        if path is None:
+            return None
+        try:
+            with open(path[:-len('.pstats')] + '.txt', encoding='utf-8') as report:
+                return report.read()
+        except FileNotFoundError:
+            return self._report(path)
@@ -0,0 +1,159 @@
+"""
+SQL 查询统计，用于尽早发现 N+1 查询
+- 通过 SQLAlchemy 引擎事件统计每个页面请求和每次同步执行的语句数、数据库耗时，以及相同形状语句的重复次数
+  （形状为去掉字面量、合并 IN 列表后的语句，循环中逐条查询的语句形状相同）
+- 超过配置的阈值时输出 [QUERY LOG] 警告
+- 语句最多的记录保留在进程内，由 /debug/queries 页面查看
+统计按线程区分：只统计开启了统计的线程中执行的语句，同步时并行拉取线程中的源库查询不计入
+"""
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_STRING_PATTERN = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_PATTERN = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PARAM_LIST_PATTERN = re.compile(r'\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))+\s*\)')
+_SPACE_PATTERN = re.compile(r'\s+')
+
+# 每条记录保留的重复语句形状数
+_TOP_SHAPES = 5
+
+
+def statement_shape(statement):
+    """语句形状：字面量替换为 ?，IN 列表合并为 (...)，空白合并为一个空格"""
+    shape = _STRING_PATTERN.sub('?', statement)
+    shape = _NUMBER_PATTERN.sub('?', shape)
+    shape = _PARAM_LIST_PATTERN.sub('(...)', shape)
+    return _SPACE_PATTERN.sub(' ', shape).strip()
+
+
+class QueryScope:
+    """一次请求或一次同步执行的查询统计"""
+
+    def __init__(self, name, max_queries=None, max_repeats=None):
+        self.name = name
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+        self.started_at = datetime.now()
+        self.count = 0
+        self.seconds = 0.0
+        # 语句形状 -> [次数, 耗时]
+        self.shapes = defaultdict(lambda: [0, 0.0])
+
+    def add(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.shapes[statement_shape(statement)]
+        entry[0] += 1
+        entry[1] += seconds
+
+    @property
+    def max_repeat(self):
+        return max((count for count, _ in self.shapes.values()), default=0)
+
+    def top_shapes(self, limit=_TOP_SHAPES):
+        """重复次数最多的语句形状，[(形状, 次数, 耗时)]"""
+        items = sorted(self.shapes.items(), key=lambda item: (-item[1][0], -item[1][1]))[:limit]
+        return [(shape, count, seconds) for shape, (count, seconds) in items]
+
+    def exceeded(self):
+        """超出的阈值说明，未超出时为空列表"""
+        reasons = []
+        if self.max_queries and self.count > self.max_queries:
+            reasons.append(f'语句数 {self.count} 超过 {self.max_queries}')
+        if self.max_repeats and self.max_repeat > self.max_repeats:
+            reasons.append(f'相同语句重复 {self.max_repeat} 次，超过 {self.max_repeats}')
+        return reasons
+
+    def header(self):
+        """调试响应头 X-DB-Queries 的值"""
+        return f'count={self.count}; time_ms={self.seconds * 1000:.1f}; max_repeat={self.max_repeat}'
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'count': self.count,
+            'seconds': self.seconds,
+            'max_repeat': self.max_repeat,
+            'shapes': self.top_shapes(),
+        }
+
+
+class QueryStats:
+    """
+    按线程记录当前的统计范围，监听所有引擎的语句执行事件
+    begin/end 之间当前线程执行的语句计入该范围，end 时检查阈值并保留语句最多的 keep 条记录
+    """
+
+    def __init__(self, keep=50):
+        self.keep = keep
+        self._local = threading.local()
+        self._worst = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._installed = False
+
+    def configure(self, keep=50):
+        self.keep = keep
+
+    def install(self):
+        if not self._installed:
+            event.listen(Engine, 'before_cursor_execute', self._before_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_execute)
+            self._installed = True
+
+    def begin(self, name, max_queries=None, max_repeats=None):
+        scope = QueryScope(name, max_queries, max_repeats)
+        self._local.scope = scope
+        return scope
+
+    def current(self):
+        return getattr(self._local, 'scope', None)
+
+    def end(self):
+        """结束当前线程的统计，返回统计结果；未开启统计时返回 None"""
+        scope = self.current()
+        if scope is None:
+            return None
+        self._local.scope = None
+        reasons = scope.exceeded()
+        if reasons:
+            shape, count, _ = scope.top_shapes(1)[0]
+            print(f"[QUERY LOG] {scope.name} {'，'.join(reasons)}，耗时 {scope.seconds * 1000:.1f}ms，"
+                  f"重复最多的语句（{count} 次）：{shape[:300]}")
+        if scope.count:
+            with self._lock:
+                item = (scope.count, next(self._sequence), scope.to_dict())
+                if len(self._worst) < self.keep:
+                    heapq.heappush(self._worst, item)
+                else:
+                    heapq.heappushpop(self._worst, item)
+        return scope
+
+    def worst(self):
+        """语句数最多的记录，按语句数倒序"""
+        with self._lock:
+            items = sorted(self._worst, reverse=True)
+        return [record for _, _, record in items]
+
+    # 开始时间记录在本次语句的执行上下文上：语句出错时不会触发 after_cursor_execute，记录随上下文一起丢弃，
+    # 不会与同一连接上的下一条语句错配
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.current() is not None and context is not None:
+            context._query_stats_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        scope = self.current()
+        started = getattr(context, '_query_stats_started', None)
+        if scope is None or started is None:
+            return
+        scope.add(statement, time.perf_counter() - started)
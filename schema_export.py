@@ -0,0 +1,133 @@
+"""
+数据库完整表结构的流式导出，供 /api/database/<id>/schema 使用
+- 表和字段各用一个有序查询流式读取（按表ID排序），在内存中按表ID归并，不再逐表查询字段
+- 查询使用独立连接和服务端游标分批读取，内存中只保留当前批次和当前表的字段，与表数量无关
+- 支持字段投影、按模式名和更新时间筛选，输出 NDJSON（每行一张表）或 JSON 数组，可按块 gzip 压缩
+"""
+import json
+import zlib
+from datetime import datetime
+
+from sqlalchemy import select
+
+
+# 可导出的表字段和字段（列）字段
+TABLE_FIELDS = ('id', 'schema_name', 'table_name', 'table_comment', 'remark', 'create_time', 'update_time', 'updated_at')
+COLUMN_FIELDS = ('column_name', 'column_type', 'is_primary', 'is_unique', 'is_partition', 'column_comment', 'ordinal_position')
+
+# 服务端游标每批读取的行数
+FETCH_SIZE = 1000
+
+
+def parse_fields(value):
+    """
+    解析 fields 参数，如 "table_name,table_comment,columns.column_name"
+    "columns" 表示全部字段（列）字段，不包含 columns 时不查询字段
+    返回 (表字段列表, 字段（列）字段列表)，参数无效时抛出 ValueError
+    """
+    if not value:
+        return list(TABLE_FIELDS), list(COLUMN_FIELDS)
+    table_fields, column_fields = [], []
+    for name in (item.strip() for item in value.split(',')):
+        if not name:
+            continue
+        if name == 'columns':
+            column_fields.extend(f for f in COLUMN_FIELDS if f not in column_fields)
+        elif name.startswith('columns.'):
+            field = name[len('columns.'):]
+            if field not in COLUMN_FIELDS:
+                raise ValueError(f'不支持的字段: {name}')
+            if field not in column_fields:
+                column_fields.append(field)
+        elif name in TABLE_FIELDS:
+            if name not in table_fields:
+                table_fields.append(name)
+        else:
+            raise ValueError(f'不支持的字段: {name}')
+    return table_fields, column_fields
+
+
+def parse_datetime(value):
+    """解析 updated_since 参数（ISO 8601，如 2024-01-01 或 2024-01-01T08:00:00），参数无效时抛出 ValueError"""
+    return datetime.fromisoformat(value) if value else None
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_schema(engine, Table, Column, db_id, table_fields, column_fields, schemas=None, updated_since=None):
+    """
+    按表ID顺序逐个产出表记录，字段（列）按 ordinal_position 排序放在 columns 中
+    表和字段两个查询各占用一个独立连接，生成器关闭（客户端断开）时释放
+    """
+    conditions = [Table.db_id == db_id]
+    if schemas:
+        conditions.append(Table.schema_name.in_(schemas))
+    if updated_since is not None:
+        conditions.append(Table.updated_at >= updated_since)
+
+    tables = select(Table.id, *[getattr(Table, f) for f in table_fields if f != 'id']) \
+        .where(*conditions).order_by(Table.id)
+
+    with engine.connect() as table_conn:
+        table_rows = table_conn.execution_options(yield_per=FETCH_SIZE).execute(tables)
+        if not column_fields:
+            for row in table_rows:
+                yield {f: getattr(row, f) for f in table_fields}
+            return
+
+        # 字段只按表ID排序（可使用 (table_id, column_name) 索引），同一张表的字段在内存中按顺序排序
+        columns = select(Column.table_id, Column.ordinal_position, Column.id, *[getattr(Column, f) for f in column_fields]) \
+            .join(Table, Table.id == Column.table_id).where(*conditions).order_by(Column.table_id)
+        with engine.connect() as column_conn:
+            column_rows = iter(column_conn.execution_options(yield_per=FETCH_SIZE).execute(columns))
+            pending = next(column_rows, None)
+            for row in table_rows:
+                # 两个查询使用不同的连接，读取期间有同步删除或新增表时两边可能不一致，
+                # 跳过表ID小于当前表的字段（所属的表不在表查询结果中），避免后续的表都读不到字段
+                while pending is not None and pending.table_id < row.id:
+                    pending = next(column_rows, None)
+                table_columns = []
+                while pending is not None and pending.table_id == row.id:
+                    table_columns.append(pending)
+                    pending = next(column_rows, None)
+                table_columns.sort(key=lambda c: (c.ordinal_position is None, c.ordinal_position or 0, c.id))
+                record = {f: getattr(row, f) for f in table_fields}
+                record['columns'] = [{f: getattr(c, f) for f in column_fields} for c in table_columns]
+                yield record
+
+
+def encode(records, fmt='ndjson'):
+    """把表记录编码为 NDJSON 行或 JSON 数组片段"""
+    if fmt == 'json':
+        yield '['
+        first = True
+        for record in records:
+            yield ('\n' if first else ',\n') + json.dumps(record, ensure_ascii=False, default=_json_default)
+            first = False
+        yield '\n]\n'
+    else:
+        for record in records:
+            yield json.dumps(record, ensure_ascii=False, default=_json_default) + '\n'
+
+
+def gzip_stream(chunks, min_size=64 * 1024):
+    """按块 gzip 压缩，累积到 min_size 字节后才输出一次，避免产生大量很小的压缩块"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= min_size:
+            out = compressor.compress(b''.join(buffer))
+            buffer, size = [], 0
+            if out:
+                yield out
+    out = compressor.compress(b''.join(buffer)) + compressor.flush()
+    if out:
+        yield out
@@ -0,0 +1,344 @@
+"""
+表/字段搜索索引
+根据元数据库类型使用不同的全文/模糊索引，索引由数据库自动维护（SQLite使用触发器），同步写入无需额外处理：
+- SQLite：FTS5 trigram 分词的外部内容表，支持中文注释的任意子串匹配，按 bm25 排序
+- MySQL：FULLTEXT 索引（ngram 分词），按 MATCH ... AGAINST 相关度排序
+- PostgreSQL：pg_trgm 三元组 GIN 索引，ILIKE 走索引，按相似度排序
+索引不可用时回退为 LIKE 查询；关键字太短时，表搜索回退为 LIKE 查询，字段搜索只按字段名完全匹配（走普通索引，避免扫描全部字段）
+"""
+from sqlalchemy import case, func, literal, literal_column, or_, select, text, union_all
+from sqlalchemy.dialects.mysql import match as mysql_match
+from sqlalchemy.sql import column as sa_column, table as sa_table
+
+
+def like_pattern(keyword):
+    """生成包含关键字的 LIKE 匹配串，转义关键字中的通配符"""
+    escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+class LikeSearch:
+    """LIKE 模糊查询，不依赖索引，作为各索引的回退方式"""
+
+    name = 'like'
+
+    def __init__(self, db):
+        self.db = db
+        # 索引是否可用，None 表示尚未检查，首次搜索时由 ensure_index 检查
+        self.available = None
+
+    def ensure_index(self):
+        """创建或检查搜索索引，索引不可用时回退为 LIKE 查询"""
+        try:
+            with self.db.engine.begin() as conn:
+                self.create_index(conn)
+            self.available = True
+        except Exception as e:
+            # SQLite 版本低于3.34不支持 trigram 分词、PostgreSQL 没有创建扩展的权限等情况
+            print(f"搜索索引不可用，回退为LIKE查询: {e}")
+            self.available = False
+        return self.available
+
+    def create_index(self, conn):
+        """在给定连接上创建搜索索引，供 ensure_index 和迁移使用；LIKE 查询不需要索引"""
+
+    def use_index(self, keyword):
+        """关键字是否可以使用索引查询"""
+        return False
+
+    def filter_tables(self, query, Table, keyword):
+        """
+        为表查询添加搜索条件和相关度排序
+        表名、表注释包含关键字，或模式名与关键字完全相同的表
+        """
+        if self.available is None:
+            self.ensure_index()
+        if self.available and self.use_index(keyword):
+            return self._filter_tables_indexed(query, Table, keyword)
+        return self._filter_tables_like(query, Table, keyword)
+
+    def _filter_tables_like(self, query, Table, keyword):
+        pattern = like_pattern(keyword)
+        query = query.filter(
+            Table.table_name.ilike(pattern, escape='\\') |
+            (Table.schema_name == keyword) |  # 模式名使用完全匹配查询
+            Table.table_comment.ilike(pattern, escape='\\')
+        )
+        # 表名或表注释完全匹配的排最前，其次是表名以关键字开头的，再按表名排序
+        rank = case(
+            (func.lower(Table.table_name) == keyword.lower(), 0),
+            (Table.table_comment == keyword, 0),
+            (Table.table_name.ilike(like_pattern(keyword)[1:], escape='\\'), 1),
+            else_=2,
+        )
+        return query.order_by(rank, Table.table_name.asc())
+
+    def _filter_tables_indexed(self, query, Table, keyword):
+        return self._filter_tables_like(query, Table, keyword)
+
+    def filter_columns(self, query, Column, keyword):
+        """
+        为字段查询添加搜索条件和相关度排序
+        字段名或字段注释包含关键字的字段
+        """
+        if self.available is None:
+            self.ensure_index()
+        if not self.available:
+            return self._filter_columns_like(query, Column, keyword)
+        if self.use_index(keyword):
+            return self._filter_columns_indexed(query, Column, keyword)
+        return self._filter_columns_short(query, Column, keyword)
+
+    def _filter_columns_short(self, query, Column, keyword):
+        return self._filter_columns_like(query, Column, keyword)
+
+    def _filter_columns_like(self, query, Column, keyword):
+        pattern = like_pattern(keyword)
+        query = query.filter(
+            Column.column_name.ilike(pattern, escape='\\') |
+            Column.column_comment.ilike(pattern, escape='\\')
+        )
+        # 字段名或字段注释完全匹配的排最前，再按字段名排序
+        rank = case(
+            (func.lower(Column.column_name) == keyword.lower(), 0),
+            (Column.column_comment == keyword, 0),
+            else_=1,
+        )
+        return query.order_by(rank, Column.column_name.asc(), Column.id.asc())
+
+    def _filter_columns_indexed(self, query, Column, keyword):
+        return self._filter_columns_like(query, Column, keyword)
+
+
+class IndexedSearch(LikeSearch):
+    """
+    使用全文/模糊索引的搜索，关键字不少于 min_keyword_length 个字符时走索引
+    字段数量通常是表的几十倍，关键字太短时字段搜索不回退为 LIKE 全表扫描，只按字段名完全匹配
+    """
+
+    min_keyword_length = 3
+
+    def use_index(self, keyword):
+        return len(keyword) >= self.min_keyword_length
+
+    def _filter_columns_short(self, query, Column, keyword):
+        query = query.filter(Column.column_name == keyword)
+        return query.order_by(Column.id.asc())
+
+
+class SqliteFtsSearch(IndexedSearch):
+    """SQLite FTS5 trigram 索引，trigram 分词至少需要3个字符"""
+
+    name = 'sqlite_fts5'
+    min_keyword_length = 3
+
+    # 建索引后需要导入已有数据的 FTS 表
+    FTS_TABLES = ['tb_table_fts', 'tb_column_fts']
+    # 字段搜索按相关度排序的最大匹配数
+    rank_limit = 10000
+
+    DDL = [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tb_table_fts USING fts5(
+            table_name, table_comment, content='tb_table', content_rowid='id', tokenize='trigram'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tb_table_fts_ai AFTER INSERT ON tb_table BEGIN
+            INSERT INTO tb_table_fts(rowid, table_name, table_comment) VALUES (new.id, new.table_name, new.table_comment);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tb_table_fts_ad AFTER DELETE ON tb_table BEGIN
+            INSERT INTO tb_table_fts(tb_table_fts, rowid, table_name, table_comment) VALUES ('delete', old.id, old.table_name, old.table_comment);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tb_table_fts_au AFTER UPDATE OF table_name, table_comment ON tb_table BEGIN
+            INSERT INTO tb_table_fts(tb_table_fts, rowid, table_name, table_comment) VALUES ('delete', old.id, old.table_name, old.table_comment);
+            INSERT INTO tb_table_fts(rowid, table_name, table_comment) VALUES (new.id, new.table_name, new.table_comment);
+        END
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tb_column_fts USING fts5(
+            column_name, column_comment, content='tb_column', content_rowid='id', tokenize='trigram'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tb_column_fts_ai AFTER INSERT ON tb_column BEGIN
+            INSERT INTO tb_column_fts(rowid, column_name, column_comment) VALUES (new.id, new.column_name, new.column_comment);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tb_column_fts_ad AFTER DELETE ON tb_column BEGIN
+            INSERT INTO tb_column_fts(tb_column_fts, rowid, column_name, column_comment) VALUES ('delete', old.id, old.column_name, old.column_comment);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tb_column_fts_au AFTER UPDATE OF column_name, column_comment ON tb_column BEGIN
+            INSERT INTO tb_column_fts(tb_column_fts, rowid, column_name, column_comment) VALUES ('delete', old.id, old.column_name, old.column_comment);
+            INSERT INTO tb_column_fts(rowid, column_name, column_comment) VALUES (new.id, new.column_name, new.column_comment);
+        END
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_column_name ON tb_column (column_name)",
+    ]
+
+    def create_index(self, conn):
+        existing = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+        for ddl in self.DDL:
+            conn.execute(text(ddl))
+        for fts_table in self.FTS_TABLES:
+            if fts_table not in existing:
+                # 新建索引时导入已有数据
+                conn.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+
+    @staticmethod
+    def _match(fts_table, keyword):
+        """FTS 查询子查询：匹配的 rowid 和 bm25 相关度（越小越相关）"""
+        # 关键字作为短语查询，trigram 分词下即为子串匹配
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        fts = sa_table(fts_table, sa_column('rowid'))
+        return (
+            select(fts.c.rowid.label('row_id'), func.bm25(literal_column(fts_table)).label('rank'))
+            .select_from(fts)
+            .where(literal_column(fts_table).op('MATCH')(phrase))
+            .subquery()
+        )
+
+    def _filter_tables_indexed(self, query, Table, keyword):
+        matched = self._match('tb_table_fts', keyword)
+        query = query.outerjoin(matched, matched.c.row_id == Table.id).filter(
+            or_(matched.c.row_id.isnot(None), Table.schema_name == keyword)
+        )
+        # 只匹配模式名的表排在后面
+        return query.order_by(case((matched.c.row_id.is_(None), 1), else_=0), matched.c.rank, Table.table_name.asc())
+
+    def _filter_columns_indexed(self, query, Column, keyword):
+        matched = self._match('tb_column_fts', keyword)
+        query = query.join(matched, matched.c.row_id == Column.id)
+        # bm25 需要对全部匹配结果计算，常见词匹配几十万字段时很慢，超过 rank_limit 条时按ID排序
+        # 只需判断匹配数是否超过 rank_limit，最多读取 rank_limit + 1 条，不统计全部匹配数
+        probe = select(matched.c.row_id).limit(self.rank_limit + 1).subquery()
+        total = self.db.session.execute(select(func.count()).select_from(probe)).scalar()
+        if total > self.rank_limit:
+            return query.order_by(Column.id.asc())
+        return query.order_by(matched.c.rank, Column.column_name.asc(), Column.id.asc())
+
+
+class MysqlFulltextSearch(IndexedSearch):
+    """MySQL FULLTEXT 索引（ngram 分词），关键字不少于 ngram_token_size（默认2）个字符时使用"""
+
+    name = 'mysql_fulltext'
+    min_keyword_length = 2
+
+    # 表名、字段名使用区分大小写的 utf8mb4_bin 排序规则，全文索引的各字段排序规则必须相同，
+    # 全文索引建在按表默认排序规则（不区分大小写）复制表名、字段名的生成列上
+    # (表名, 字段名, 创建语句)
+    GENERATED_COLUMNS = [
+        ('tb_table', 'table_name_ci', "ALTER TABLE tb_table ADD COLUMN table_name_ci varchar(100) GENERATED ALWAYS AS (table_name) STORED COMMENT '表名（全文搜索用）'"),
+        ('tb_column', 'column_name_ci', "ALTER TABLE tb_column ADD COLUMN column_name_ci varchar(100) GENERATED ALWAYS AS (column_name) STORED COMMENT '字段名（全文搜索用）'"),
+    ]
+    # (表名, 索引名, 创建语句)
+    INDEXES = [
+        ('tb_table', 'ft_table_search', "ALTER TABLE tb_table ADD FULLTEXT INDEX ft_table_search (table_name_ci, table_comment) WITH PARSER ngram"),
+        ('tb_column', 'ft_column_search', "ALTER TABLE tb_column ADD FULLTEXT INDEX ft_column_search (column_name_ci, column_comment) WITH PARSER ngram"),
+        ('tb_column', 'idx_column_name', "ALTER TABLE tb_column ADD INDEX idx_column_name (column_name)"),
+    ]
+
+    def create_index(self, conn):
+        columns = {
+            (row[0], row[1]) for row in conn.execute(text("""
+            SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ('tb_table', 'tb_column')
+            """))
+        }
+        for table_name, column_name, ddl in self.GENERATED_COLUMNS:
+            if (table_name, column_name) not in columns:
+                conn.execute(text(ddl))
+        existing = {
+            (row[0], row[1]) for row in conn.execute(text("""
+            SELECT TABLE_NAME, INDEX_NAME FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ('tb_table', 'tb_column')
+            """))
+        }
+        for table_name, index_name, ddl in self.INDEXES:
+            if (table_name, index_name) not in existing:
+                conn.execute(text(ddl))
+
+    @staticmethod
+    def _phrase(keyword):
+        # 布尔模式下的短语查询，ngram 分词下即为子串匹配
+        return '"' + keyword.replace('"', ' ') + '"'
+
+    def _filter_tables_indexed(self, query, Table, keyword):
+        score = mysql_match(literal_column('tb_table.table_name_ci'), Table.table_comment, against=self._phrase(keyword)).in_boolean_mode()
+        # MATCH 与其他条件用 OR 组合时不会使用 FULLTEXT 索引，全文匹配和模式名匹配分别查询后合并，只匹配模式名的表相关度为0
+        matched = union_all(
+            select(Table.id.label('row_id'), score.label('score')).where(score > 0),
+            select(Table.id.label('row_id'), literal(0.0).label('score')).where(Table.schema_name == keyword),
+        ).subquery()
+        ranked = (
+            select(matched.c.row_id, func.max(matched.c.score).label('score'))
+            .group_by(matched.c.row_id)
+            .subquery()
+        )
+        query = query.join(ranked, ranked.c.row_id == Table.id)
+        return query.order_by(ranked.c.score.desc(), Table.table_name.asc())
+
+    def _filter_columns_indexed(self, query, Column, keyword):
+        score = mysql_match(literal_column('tb_column.column_name_ci'), Column.column_comment, against=self._phrase(keyword)).in_boolean_mode()
+        query = query.filter(score > 0)
+        return query.order_by(score.desc(), Column.column_name.asc(), Column.id.asc())
+
+
+class PostgresTrgmSearch(IndexedSearch):
+    """PostgreSQL pg_trgm GIN 索引，ILIKE 查询直接使用索引，关键字不少于3个字符时按相似度排序"""
+
+    name = 'postgres_trgm'
+    min_keyword_length = 3
+
+    DDL = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS idx_table_name_trgm ON tb_table USING gin (table_name gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS idx_table_comment_trgm ON tb_table USING gin (table_comment gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS idx_column_name_trgm ON tb_column USING gin (column_name gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS idx_column_comment_trgm ON tb_column USING gin (column_comment gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS idx_column_name ON tb_column (column_name)",
+    ]
+
+    def create_index(self, conn):
+        for ddl in self.DDL:
+            conn.execute(text(ddl))
+
+    def _filter_tables_indexed(self, query, Table, keyword):
+        pattern = like_pattern(keyword)
+        query = query.filter(
+            Table.table_name.ilike(pattern, escape='\\') |
+            (Table.schema_name == keyword) |
+            Table.table_comment.ilike(pattern, escape='\\')
+        )
+        similarity = func.greatest(
+            func.similarity(Table.table_name, keyword),
+            func.similarity(func.coalesce(Table.table_comment, ''), keyword),
+        )
+        return query.order_by(similarity.desc(), Table.table_name.asc())
+
+    def _filter_columns_indexed(self, query, Column, keyword):
+        pattern = like_pattern(keyword)
+        query = query.filter(
+            Column.column_name.ilike(pattern, escape='\\') |
+            Column.column_comment.ilike(pattern, escape='\\')
+        )
+        similarity = func.greatest(
+            func.similarity(Column.column_name, keyword),
+            func.similarity(func.coalesce(Column.column_comment, ''), keyword),
+        )
+        return query.order_by(similarity.desc(), Column.column_name.asc(), Column.id.asc())
+
+
+# 元数据库类型 -> 搜索索引实现
+SEARCH_BACKENDS = {
+    'sqlite': SqliteFtsSearch,
+    'mysql': MysqlFulltextSearch,
+    'postgresql': PostgresTrgmSearch,
+}
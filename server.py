@@ -0,0 +1,95 @@
+"""
+应用服务方式，由配置文件 server.mode 选择
+- dev：Flask 开发服务器，单进程，用于本地开发调试
+- gunicorn：多进程服务，workers 个工作进程、每个进程 threads 个线程；preload 为 true 时在主进程创建应用后再创建工作进程，
+  收到 TERM 信号后等待进行中的请求完成（最长 graceful_timeout 秒）再退出，收到 HUP 信号时逐个重启工作进程
+- waitress：单进程多线程，用于不支持 gunicorn 的 Windows
+"""
+import os
+
+DEFAULTS = {
+    'mode': 'dev',
+    'workers': 4,
+    'threads': 8,
+    'preload': True,
+    'timeout': 120,
+    'graceful_timeout': 30,
+    'max_requests': 0,
+}
+
+
+def get_options(config):
+    """配置文件 server 节点与默认值合并"""
+    options = dict(DEFAULTS)
+    options.update(config.get('server') or {})
+    return options
+
+
+def run(app, create_app, config, host, port, mode=None, post_fork=None, on_start=None):
+    """
+    按配置启动服务
+    app 为主进程中已创建的应用，gunicorn 未开启 preload 时每个工作进程调用 create_app 重新创建
+    post_fork(app) 在 gunicorn 工作进程创建后调用，用于释放从主进程继承的连接
+    on_start(app) 在开始处理请求前调用，gunicorn 在每个工作进程载入应用后调用，不在主进程中调用
+    """
+    options = get_options(config)
+    mode = mode or options['mode']
+    if mode == 'gunicorn':
+        _run_gunicorn(app, create_app, options, host, port, post_fork, on_start)
+    elif mode == 'waitress':
+        if on_start is not None:
+            on_start(app)
+        _run_waitress(app, options, host, port)
+    elif mode == 'dev':
+        debug = config['app'].get('debug', False)
+        # debug 模式下重新加载代码的监视进程不处理请求，只在实际服务的子进程中调用
+        if on_start is not None and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+            on_start(app)
+        app.run(debug=debug, host=host, port=port, threaded=True)
+    else:
+        raise ValueError(f'不支持的服务方式：{mode}')
+
+
+def _run_gunicorn(app, create_app, options, host, port, post_fork, on_start):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise RuntimeError('请安装gunicorn: pip install gunicorn，或将 server.mode 设置为 dev/waitress')
+
+    settings = {
+        'bind': f'{host}:{port}',
+        'workers': options['workers'],
+        'threads': options['threads'],
+        # 同步进度推送是长连接，使用线程工作模式避免占满工作进程
+        'worker_class': 'gthread',
+        'preload_app': options['preload'],
+        'timeout': options['timeout'],
+        'graceful_timeout': options['graceful_timeout'],
+        'max_requests': options['max_requests'],
+        'max_requests_jitter': options['max_requests'] // 10,
+    }
+    if post_fork is not None and options['preload']:
+        settings['post_fork'] = lambda server, worker: post_fork(app)
+    if on_start is not None:
+        settings['post_worker_init'] = lambda worker: on_start(worker.wsgi)
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app if options['preload'] else create_app()
+
+    print(f"使用gunicorn启动服务：{settings['bind']}，{options['workers']}个工作进程，每个进程{options['threads']}个线程")
+    Application().run()
+
+
+def _run_waitress(app, options, host, port):
+    try:
+        from waitress import serve
+    except ImportError:
+        raise RuntimeError('请安装waitress: pip install waitress，或将 server.mode 设置为 dev/gunicorn')
+
+    print(f"使用waitress启动服务：{host}:{port}，{options['threads']}个线程")
+    serve(app, host=host, port=port, threads=options['threads'])
@@ -2,7 +2,8 @@
 # -*- coding: utf-8 -*-
 """
 数据库初始化脚本
-根据配置文件config.yml连接数据库并执行create_tables.sql创建表结构和测试数据
+根据配置文件config.yml连接数据库并执行create_tables.sql创建表结构和测试数据，
+再执行 migrations 目录下未执行的迁移；已初始化的库只执行迁移，用于升级已有部署的表结构
 """
 
 import yaml
@@ -11,6 +12,10 @@ import sys
 import logging
 from pathlib import Path
 
+from sqlalchemy import create_engine, inspect
+
+import migrations
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -96,6 +101,16 @@ def get_db_connection(config):
         sys.exit(1)
 
 
+def get_migration_engine(config):
+    """迁移使用的SQLAlchemy engine，SQLite 数据库文件与 get_db_connection 一致放在 instance 目录"""
+    db_config = config['database']
+    if db_config['type'] == 'sqlite':
+        os.makedirs('instance', exist_ok=True)
+        return create_engine(f"sqlite:///{os.path.join('instance', db_config['name'])}")
+    from db_util import generate_db_uri
+    return create_engine(generate_db_uri(config))
+
+
 def execute_sql_script(conn, sql_file_path):
     """执行SQL脚本文件"""
     try:
@@ -156,35 +171,53 @@ def main():
     # 根据数据库类型选择对应的SQL脚本
     db_type = config['database']['type']
     
-    # SQL脚本文件名映射
+    # SQL脚本文件名映射，PostgreSQL 没有建表脚本，由迁移按模型创建表结构
     sql_file_map = {
         'mysql': 'create_tables.mysql.sql',
         'sqlite': 'create_tables.sqlite.sql',
-        'postgresql': 'create_tables.mysql.sql'  # PostgreSQL暂时使用MySQL脚本，后续可单独创建
+        'postgresql': None,
     }
-    
-    # 获取SQL脚本路径
-    sql_file_name = sql_file_map.get(db_type)
-    sql_file_path = base_dir / 'sql' / sql_file_name
-    
-    # 检查SQL脚本文件是否存在
-    if not sql_file_path.exists():
-        logger.error(f"SQL脚本文件不存在: {sql_file_path}")
+    if db_type not in sql_file_map:
+        logger.error(f"不支持的数据库类型: {db_type}")
         sys.exit(1)
     
-    logger.info(f"使用SQL脚本: {sql_file_name}")
+    engine = get_migration_engine(config)
     
-    # 获取数据库连接
-    conn = get_db_connection(config)
+    # 已初始化的库只执行迁移，不再重复执行建表脚本和插入测试数据
+    if inspect(engine).has_table('tb_database'):
+        logger.info("数据库已初始化，跳过建表脚本")
+    elif sql_file_map[db_type]:
+        sql_file_name = sql_file_map[db_type]
+        sql_file_path = base_dir / 'sql' / sql_file_name
+        
+        # 检查SQL脚本文件是否存在
+        if not sql_file_path.exists():
+            logger.error(f"SQL脚本文件不存在: {sql_file_path}")
+            sys.exit(1)
+        
+        logger.info(f"使用SQL脚本: {sql_file_name}")
+        
+        # 获取数据库连接
+        conn = get_db_connection(config)
+        
+        try:
+            # 执行SQL脚本
+            execute_sql_script(conn, sql_file_path)
+            logger.info("数据库初始化完成！")
+        finally:
+            # 关闭连接
+            conn.close()
+            logger.info("数据库连接已关闭")
     
+    # 执行未执行的迁移：补齐字段、索引和约束，新建的库上只记录版本
     try:
-        # 执行SQL脚本
-        execute_sql_script(conn, sql_file_path)
-        logger.info("数据库初始化完成！")
+        applied = migrations.upgrade(engine, log=logger.info)
+        logger.info(f"迁移完成，本次执行 {len(applied)} 个版本" if applied else "数据库结构已是最新版本")
+    except Exception as e:
+        logger.error(f"迁移执行失败: {e}")
+        sys.exit(1)
     finally:
-        # 关闭连接
-        conn.close()
-        logger.info("数据库连接已关闭")
+        engine.dispose()
 
 
 if __name__ == '__main__':
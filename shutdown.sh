@@ -19,16 +19,23 @@ fi
 
 # 检查进程是否存在
 if ps -p "${pid}" > /dev/null 2>&1; then
-    # 杀掉进程
-    echo "杀掉进程 ${pid}..."
+    # 发送TERM信号，gunicorn 等待进行中的请求完成后退出（server.graceful_timeout，默认30秒）
+    echo "停止进程 ${pid}..."
     kill "${pid}"
     
-    # 等待进程终止
-    sleep 1
+    # 等待进程终止，超过等待时间后强制杀死
+    wait_seconds=${STOP_WAIT_SECONDS:-40}
+    for ((i = 0; i < wait_seconds; i++)); do
+        if ! ps -p "${pid}" > /dev/null 2>&1; then
+            break
+        fi
+        sleep 1
+    done
     
     # 再次检查进程是否还存在
     if ps -p "${pid}" > /dev/null 2>&1; then
         echo "警告：进程 ${pid} 无法正常终止，尝试强制杀死..."
+        pkill -9 -P "${pid}"
         kill -9 "${pid}"
         sleep 1
     fi
@@ -9,6 +9,7 @@ CREATE TABLE if not exists `tb_database` (
   `db_user` varchar(100) NOT NULL COMMENT '数据库用户名',
   `db_password` varchar(100) NOT NULL COMMENT '数据库密码',
   `remark` varchar(512) DEFAULT NULL COMMENT '数据库备注信息',
+  `cache_version` int(11) DEFAULT '0' COMMENT '页面缓存版本(元数据变化时加1)',
   `created_at` datetime DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
   `updated_at` datetime DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
   PRIMARY KEY (`id`)
@@ -18,30 +19,119 @@ CREATE TABLE if not exists `tb_database` (
 CREATE TABLE if not exists `tb_table` (
   `id` int(11) NOT NULL AUTO_INCREMENT COMMENT '主键',
   `db_id` int(11) NOT NULL COMMENT '数据库ID',
-  `schema_name` varchar(64) DEFAULT NULL COMMENT '模式名',
-  `table_name` varchar(100) NOT NULL COMMENT '表名',
+  `schema_name` varchar(64) COLLATE utf8mb4_bin DEFAULT NULL COMMENT '模式名',
+  `table_name` varchar(100) COLLATE utf8mb4_bin NOT NULL COMMENT '表名',
   `table_comment` varchar(255) DEFAULT NULL COMMENT '表注释',
   `remark` varchar(512) DEFAULT NULL COMMENT '表备注',
   `create_time` datetime DEFAULT NULL COMMENT '创建时间',
   `update_time` datetime DEFAULT NULL COMMENT '更新时间',
+  `sync_marker` varchar(64) DEFAULT NULL COMMENT '源库变更标记(增量同步用)',
+  `updated_at` datetime DEFAULT NULL COMMENT '同步时表或字段最近一次变化的时间',
+  `content_hash` varchar(32) DEFAULT NULL COMMENT '表注释和字段信息的哈希',
+  `table_name_ci` varchar(100) GENERATED ALWAYS AS (`table_name`) STORED COMMENT '表名（全文搜索用）',
   PRIMARY KEY (`id`),
-  KEY `idx_db_id` (`db_id`)
+  UNIQUE KEY `uk_table_name` (`db_id`, `schema_name`, `table_name`),
+  KEY `idx_db_table_name` (`db_id`, `table_name`),
+  KEY `idx_db_updated_at` (`db_id`, `updated_at`),
+  FULLTEXT KEY `ft_table_search` (`table_name_ci`, `table_comment`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='表信息表';
 
 -- 创建tb_column表
 CREATE TABLE if not exists`tb_column` (
   `id` int(11) NOT NULL AUTO_INCREMENT COMMENT '主键',
   `table_id` int(11) NOT NULL COMMENT '表ID',
-  `column_name` varchar(100) NOT NULL COMMENT '字段名',
+  `column_name` varchar(100) COLLATE utf8mb4_bin NOT NULL COMMENT '字段名',
   `column_type` varchar(100) NOT NULL COMMENT '字段类型',
   `is_primary` tinyint(1) DEFAULT '0' COMMENT '是否主键(0:否,1:是)',
   `is_unique` tinyint(1) DEFAULT '0' COMMENT '是否唯一索引(0:否,1:是)',
+  `is_partition` tinyint(1) DEFAULT '0' COMMENT '是否分区字段(0:否,1:是)',
   `column_comment` varchar(255) DEFAULT NULL COMMENT '字段备注',
   `ordinal_position` int(11) DEFAULT NULL COMMENT '字段顺序',
+  `column_name_ci` varchar(100) GENERATED ALWAYS AS (`column_name`) STORED COMMENT '字段名（全文搜索用）',
   PRIMARY KEY (`id`),
-  KEY `idx_table_id` (`table_id`)
+  UNIQUE KEY `uk_column_name` (`table_id`, `column_name`),
+  KEY `idx_column_name` (`column_name`),
+  FULLTEXT KEY `ft_column_search` (`column_name_ci`, `column_comment`) WITH PARSER ngram,
+  CONSTRAINT `fk_column_table` FOREIGN KEY (`table_id`) REFERENCES `tb_table` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='字段信息表';
 
+-- 创建tb_schema_change表
+CREATE TABLE if not exists `tb_schema_change` (
+  `id` int(11) NOT NULL AUTO_INCREMENT COMMENT '主键',
+  `db_id` int(11) NOT NULL COMMENT '数据库ID',
+  `table_id` int(11) DEFAULT NULL COMMENT '表ID',
+  `schema_name` varchar(64) DEFAULT NULL COMMENT '模式名',
+  `table_name` varchar(100) NOT NULL COMMENT '表名',
+  `column_name` varchar(100) DEFAULT NULL COMMENT '字段名(表级变更为空)',
+  `change_type` varchar(20) NOT NULL COMMENT '变更类型',
+  `detail` text COMMENT '变更内容(JSON)',
+  `sync_token` varchar(16) DEFAULT NULL COMMENT '同步任务token',
+  `changed_at` datetime DEFAULT NULL COMMENT '变更时间',
+  PRIMARY KEY (`id`),
+  KEY `idx_change_db` (`db_id`, `id`),
+  KEY `idx_change_table` (`db_id`, `schema_name`, `table_name`, `id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='表结构变更历史表';
+
+-- 创建tb_sync_job表
+CREATE TABLE if not exists `tb_sync_job` (
+  `id` int(11) NOT NULL AUTO_INCREMENT COMMENT '主键',
+  `db_id` int(11) NOT NULL COMMENT '数据库ID',
+  `status` varchar(20) NOT NULL DEFAULT 'none' COMMENT '同步状态(none、queued、loading、success、error)',
+  `phase` varchar(20) DEFAULT NULL COMMENT '执行阶段(connect、fetch_tables、fetch_columns、write)',
+  `token` varchar(16) DEFAULT NULL COMMENT '同步任务token',
+  `full_sync` tinyint(1) DEFAULT '0' COMMENT '是否全量同步(0:否,1:是)',
+  `worker` varchar(100) DEFAULT NULL COMMENT '执行任务的进程(主机名:进程号)',
+  `queued_at` datetime DEFAULT NULL COMMENT '排队时间',
+  `started_at` datetime DEFAULT NULL COMMENT '开始时间',
+  `finished_at` datetime DEFAULT NULL COMMENT '结束时间',
+  `heartbeat_at` datetime DEFAULT NULL COMMENT '最近一次状态更新时间',
+  `tables_total` int(11) DEFAULT '0' COMMENT '表总数',
+  `tables_done` int(11) DEFAULT '0' COMMENT '已处理表数',
+  `columns_done` int(11) DEFAULT '0' COMMENT '已处理字段数',
+  `new_tables` int(11) DEFAULT '0' COMMENT '新增表数',
+  `updated_tables` int(11) DEFAULT '0' COMMENT '更新表数',
+  `message` varchar(1024) DEFAULT NULL COMMENT '同步结果信息',
+  `error` text COMMENT '错误详情',
+  `checkpoint` text COMMENT '分批同步断点(JSON)',
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_db_id` (`db_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='同步任务表';
+
+-- 创建tb_database_health表
+CREATE TABLE if not exists `tb_database_health` (
+  `id` int(11) NOT NULL AUTO_INCREMENT COMMENT '主键',
+  `db_id` int(11) NOT NULL COMMENT '数据库ID',
+  `status` varchar(20) DEFAULT NULL COMMENT '检查结果(ok、error、unsupported)',
+  `latency_ms` int(11) DEFAULT NULL COMMENT '最近一次成功建立连接的耗时(毫秒)',
+  `checked_at` datetime DEFAULT NULL COMMENT '检查时间',
+  `last_success_at` datetime DEFAULT NULL COMMENT '最近一次成功时间',
+  `last_error` varchar(1024) DEFAULT NULL COMMENT '最近一次错误',
+  `last_error_at` datetime DEFAULT NULL COMMENT '最近一次错误时间',
+  `failures` int(11) DEFAULT '0' COMMENT '连续失败次数',
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_health_db_id` (`db_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='数据库连接检查结果表';
+
+-- 创建tb_sync_schedule表
+CREATE TABLE if not exists `tb_sync_schedule` (
+  `id` int(11) NOT NULL AUTO_INCREMENT COMMENT '主键',
+  `db_id` int(11) NOT NULL COMMENT '数据库ID',
+  `enabled` tinyint(1) DEFAULT '0' COMMENT '是否开启定时同步',
+  `interval_minutes` int(11) NOT NULL DEFAULT '1440' COMMENT '同步间隔(分钟)',
+  `window_start` varchar(5) DEFAULT NULL COMMENT '允许同步的开始时间(HH:MM)',
+  `window_end` varchar(5) DEFAULT NULL COMMENT '允许同步的结束时间(HH:MM)',
+  `next_run_at` datetime DEFAULT NULL COMMENT '下次同步时间',
+  `last_run_at` datetime DEFAULT NULL COMMENT '最近一次触发时间',
+  `last_status` varchar(20) DEFAULT NULL COMMENT '最近一次结果(queued、success、error、skipped、unreachable)',
+  `last_message` varchar(1024) DEFAULT NULL COMMENT '最近一次结果信息',
+  `failures` int(11) DEFAULT '0' COMMENT '连续失败次数',
+  `token` varchar(16) DEFAULT NULL COMMENT '最近一次触发的同步任务token',
+  `updated_at` datetime DEFAULT NULL COMMENT '更新时间',
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_schedule_db_id` (`db_id`),
+  KEY `ix_tb_sync_schedule_next_run_at` (`next_run_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='定时同步设置表';
+
 -- 插入测试数据
 INSERT INTO `tb_database` (`db_type`, `db_alias`, `db_host`, `db_port`, `db_name`, `db_user`, `db_password`) VALUES
 ('MySQL', '测试MySQL数据库', '127.0.0.1', 3306, 'testdb', 'root', 'password'),
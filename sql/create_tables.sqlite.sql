@@ -10,6 +10,7 @@ CREATE TABLE if not exists `tb_database` (
   `db_user` TEXT NOT NULL,
   `db_password` TEXT NOT NULL,
   `remark` TEXT DEFAULT NULL,
+  `cache_version` INTEGER DEFAULT 0,
   `created_at` TEXT DEFAULT CURRENT_TIMESTAMP,
   `updated_at` TEXT DEFAULT CURRENT_TIMESTAMP
 );
@@ -23,21 +24,130 @@ CREATE TABLE if not exists `tb_table` (
   `table_comment` TEXT DEFAULT NULL,
   `remark` TEXT DEFAULT NULL,
   `create_time` TEXT DEFAULT NULL,
-  `update_time` TEXT DEFAULT NULL
+  `update_time` TEXT DEFAULT NULL,
+  `sync_marker` TEXT DEFAULT NULL,
+  `updated_at` TEXT DEFAULT NULL,
+  `content_hash` TEXT DEFAULT NULL
 );
+CREATE UNIQUE INDEX IF NOT EXISTS uk_table_name ON tb_table (db_id, schema_name, table_name);
+CREATE INDEX IF NOT EXISTS idx_db_table_name ON tb_table (db_id, table_name);
+CREATE INDEX IF NOT EXISTS idx_db_updated_at ON tb_table (db_id, updated_at);
+
+-- 表搜索索引：FTS5 trigram 分词，支持中文注释的子串匹配，由触发器与tb_table保持同步
+CREATE VIRTUAL TABLE IF NOT EXISTS tb_table_fts USING fts5(
+  table_name, table_comment, content='tb_table', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS tb_table_fts_ai AFTER INSERT ON tb_table BEGIN
+  INSERT INTO tb_table_fts(rowid, table_name, table_comment) VALUES (new.id, new.table_name, new.table_comment);
+END;
+CREATE TRIGGER IF NOT EXISTS tb_table_fts_ad AFTER DELETE ON tb_table BEGIN
+  INSERT INTO tb_table_fts(tb_table_fts, rowid, table_name, table_comment) VALUES ('delete', old.id, old.table_name, old.table_comment);
+END;
+CREATE TRIGGER IF NOT EXISTS tb_table_fts_au AFTER UPDATE OF table_name, table_comment ON tb_table BEGIN
+  INSERT INTO tb_table_fts(tb_table_fts, rowid, table_name, table_comment) VALUES ('delete', old.id, old.table_name, old.table_comment);
+  INSERT INTO tb_table_fts(rowid, table_name, table_comment) VALUES (new.id, new.table_name, new.table_comment);
+END;
 
 -- 创建tb_column表
 CREATE TABLE if not exists `tb_column` (
   `id` INTEGER PRIMARY KEY AUTOINCREMENT,
-  `table_id` INTEGER NOT NULL,
+  `table_id` INTEGER NOT NULL REFERENCES `tb_table` (`id`) ON DELETE CASCADE,
   `column_name` TEXT NOT NULL,
   `column_type` TEXT NOT NULL,
   `is_primary` INTEGER DEFAULT 0,
   `is_unique` INTEGER DEFAULT 0,
+  `is_partition` INTEGER DEFAULT 0,
   `column_comment` TEXT DEFAULT NULL,
   `ordinal_position` INTEGER DEFAULT NULL
 );
+CREATE UNIQUE INDEX IF NOT EXISTS uk_column_name ON tb_column (table_id, column_name);
+CREATE INDEX IF NOT EXISTS idx_column_name ON tb_column (column_name);
+
+-- 字段搜索索引：FTS5 trigram 分词，由触发器与tb_column保持同步
+CREATE VIRTUAL TABLE IF NOT EXISTS tb_column_fts USING fts5(
+  column_name, column_comment, content='tb_column', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS tb_column_fts_ai AFTER INSERT ON tb_column BEGIN
+  INSERT INTO tb_column_fts(rowid, column_name, column_comment) VALUES (new.id, new.column_name, new.column_comment);
+END;
+CREATE TRIGGER IF NOT EXISTS tb_column_fts_ad AFTER DELETE ON tb_column BEGIN
+  INSERT INTO tb_column_fts(tb_column_fts, rowid, column_name, column_comment) VALUES ('delete', old.id, old.column_name, old.column_comment);
+END;
+CREATE TRIGGER IF NOT EXISTS tb_column_fts_au AFTER UPDATE OF column_name, column_comment ON tb_column BEGIN
+  INSERT INTO tb_column_fts(tb_column_fts, rowid, column_name, column_comment) VALUES ('delete', old.id, old.column_name, old.column_comment);
+  INSERT INTO tb_column_fts(rowid, column_name, column_comment) VALUES (new.id, new.column_name, new.column_comment);
+END;
+
+-- 创建tb_schema_change表（同步时记录的表结构变更历史）
+CREATE TABLE if not exists `tb_schema_change` (
+  `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `db_id` INTEGER NOT NULL,
+  `table_id` INTEGER DEFAULT NULL,
+  `schema_name` TEXT DEFAULT NULL,
+  `table_name` TEXT NOT NULL,
+  `column_name` TEXT DEFAULT NULL,
+  `change_type` TEXT NOT NULL,
+  `detail` TEXT DEFAULT NULL,
+  `sync_token` TEXT DEFAULT NULL,
+  `changed_at` TEXT DEFAULT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_change_db ON tb_schema_change (db_id, id);
+CREATE INDEX IF NOT EXISTS idx_change_table ON tb_schema_change (db_id, schema_name, table_name, id);
 
+-- 创建tb_sync_job表
+CREATE TABLE if not exists `tb_sync_job` (
+  `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `db_id` INTEGER NOT NULL UNIQUE,
+  `status` TEXT NOT NULL DEFAULT 'none',
+  `phase` TEXT,
+  `token` TEXT DEFAULT NULL,
+  `full_sync` INTEGER DEFAULT 0,
+  `worker` TEXT DEFAULT NULL,
+  `queued_at` TEXT DEFAULT NULL,
+  `started_at` TEXT DEFAULT NULL,
+  `finished_at` TEXT DEFAULT NULL,
+  `heartbeat_at` TEXT DEFAULT NULL,
+  `tables_total` INTEGER DEFAULT 0,
+  `tables_done` INTEGER DEFAULT 0,
+  `columns_done` INTEGER DEFAULT 0,
+  `new_tables` INTEGER DEFAULT 0,
+  `updated_tables` INTEGER DEFAULT 0,
+  `message` TEXT DEFAULT NULL,
+  `error` TEXT DEFAULT NULL,
+  `checkpoint` TEXT DEFAULT NULL
+);
+
+
+-- 创建tb_database_health表（数据库连接检查结果）
+CREATE TABLE if not exists `tb_database_health` (
+  `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `db_id` INTEGER NOT NULL UNIQUE,
+  `status` TEXT DEFAULT NULL,
+  `latency_ms` INTEGER DEFAULT NULL,
+  `checked_at` TEXT DEFAULT NULL,
+  `last_success_at` TEXT DEFAULT NULL,
+  `last_error` TEXT DEFAULT NULL,
+  `last_error_at` TEXT DEFAULT NULL,
+  `failures` INTEGER DEFAULT 0
+);
+
+-- 创建tb_sync_schedule表（定时同步设置）
+CREATE TABLE if not exists `tb_sync_schedule` (
+  `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `db_id` INTEGER NOT NULL UNIQUE,
+  `enabled` INTEGER DEFAULT 0,
+  `interval_minutes` INTEGER NOT NULL DEFAULT 1440,
+  `window_start` TEXT DEFAULT NULL,
+  `window_end` TEXT DEFAULT NULL,
+  `next_run_at` TEXT DEFAULT NULL,
+  `last_run_at` TEXT DEFAULT NULL,
+  `last_status` TEXT DEFAULT NULL,
+  `last_message` TEXT DEFAULT NULL,
+  `failures` INTEGER DEFAULT 0,
+  `token` TEXT DEFAULT NULL,
+  `updated_at` TEXT DEFAULT NULL
+);
+CREATE INDEX if not exists `ix_tb_sync_schedule_next_run_at` ON `tb_sync_schedule` (`next_run_at`);
 
 -- 插入测试数据
 INSERT INTO `tb_database` (`db_type`, `db_alias`, `db_host`, `db_port`, `db_name`, `db_user`, `db_password`) VALUES
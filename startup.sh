@@ -1,4 +1,23 @@
 #!/bin/bash
+pid_file=".app_pid"
+
+# ./startup.sh reload：向主进程发送HUP信号，gunicorn 逐个重启工作进程（preload 开启时不重新加载代码，更新代码后需停止后重新启动）
+if [ "$1" == "reload" ]; then
+    if [ ! -f "${pid_file}" ] || ! ps -p "$(cat "${pid_file}")" > /dev/null 2>&1; then
+        echo "错误：项目未启动"
+        exit 1
+    fi
+    pid=$(cat "${pid_file}")
+    kill -HUP "${pid}"
+    echo "已通知进程 ${pid} 重启工作进程"
+    exit 0
+fi
+
+# 检查项目是否已启动
+if [ -f "${pid_file}" ] && ps -p "$(cat "${pid_file}")" > /dev/null 2>&1; then
+    echo "错误：项目已启动，进程ID：$(cat "${pid_file}")，请先执行 ./shutdown.sh"
+    exit 1
+fi
 
 current_date=$(date +%Y%m%d)
 log_file="meta-app-${current_date}.log"
@@ -8,13 +27,14 @@ if [ ! -f "${log_file}" ]; then
 fi
 
 # 启动项目，将输出重定向到日志文件，并放到后台执行
+# 服务方式由 config.yml 中 server.mode 决定（dev/gunicorn/waitress），启动前在主进程执行一次数据库迁移
 echo "启动项目..."
 echo "日志输出到：${log_file}"
 python app.py >> "${log_file}" 2>&1 &
 
-# 获取进程ID
+# 获取进程ID（gunicorn 为主进程）
 pid=$!
 echo "项目已启动，进程ID：${pid}"
 
 # 将进程ID写入文件，方便后续管理
-echo "${pid}" > .app_pid
+echo "${pid}" > "${pid_file}"